@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+创作者主页解析基准：比较Selector+json.loads整页解析与按字节定位js-initialData的快速路径
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/bench_creator_html.py                  # 使用生成的大体积主页
+    python benchmarks/bench_creator_html.py --html page.html --token zhangkangkang
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsel import Selector
+from zhihu_core.extractor import ZhihuExtractor
+
+
+def legacy_extract_users(html_content: str) -> dict:
+    """改造前的解析方式，作为对照"""
+    selector = Selector(text=html_content)
+    js_init_data = selector.xpath("//script[@id='js-initialData']/text()").get(default="").strip()
+    return json.loads(js_init_data).get("initialState", {}).get("entities", {}).get("users", {})
+
+
+def generate_profile_page(url_token: str, answer_count: int = 200, seed: int = 3) -> bytes:
+    """生成结构接近知乎主页的HTML：initialData里带大量回答、问题实体"""
+    rng = random.Random(seed)
+    users = {
+        url_token: {
+            "id": f"{rng.getrandbits(128):032x}", "urlToken": url_token, "name": "测试用户",
+            "avatarUrl": "https://pic1.zhimg.com/v2-abc_l.jpg", "gender": 1, "ipInfo": "IP 属地北京",
+            "followingCount": 12, "followerCount": 34567, "answerCount": 3000, "zvideoCount": 3,
+            "questionCount": 5, "articlesCount": 40, "columnsCount": 1, "voteupCount": 123456,
+        }
+    }
+    answers = {}
+    questions = {}
+    for i in range(answer_count):
+        question_id = str(rng.randint(10 ** 8, 10 ** 10))
+        answer_id = str(rng.randint(10 ** 9, 10 ** 11))
+        paragraphs = "".join(f"<p data-pid=\"{i}-{j}\">{'知乎回答内容' * rng.randint(10, 80)}</p>" for j in range(rng.randint(3, 15)))
+        answers[answer_id] = {
+            "id": answer_id, "type": "answer", "content": paragraphs, "excerpt": "摘要" * 30,
+            "voteupCount": rng.randint(0, 10000), "commentCount": rng.randint(0, 500),
+            "question": {"id": question_id}, "author": url_token,
+        }
+        questions[question_id] = {"id": question_id, "title": "问题标题" * 5, "answerCount": rng.randint(1, 500)}
+
+    initial_data = {
+        "initialState": {
+            "entities": {"users": users, "questions": questions, "answers": answers, "articles": {}, "columns": {}},
+            "people": {"followersByUser": {}, "answersByUser": {url_token: {"ids": list(answers)}}},
+        },
+        "subAppName": "main",
+    }
+    blob = json.dumps(initial_data, ensure_ascii=False, separators=(",", ":"))
+    filler = "".join(f"<div class=\"List-item\"><span>{'占位' * 50}</span></div>" for _ in range(500))
+    html = (
+        "<!doctype html><html lang=\"zh\"><head><meta charset=\"utf-8\"/><title>测试用户 - 知乎</title></head>"
+        f"<body><div id=\"root\">{filler}</div>"
+        f"<script id=\"js-initialData\" type=\"text/json\">{blob}</script></body></html>"
+    )
+    return html.encode("utf-8")
+
+
+def bench(name: str, func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    per_page = (time.perf_counter() - start) / rounds
+    print(f"{name:<24} {per_page * 1000:8.2f} ms/页")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="创作者主页解析基准")
+    parser.add_argument("--html", help="保存下来的主页HTML文件")
+    parser.add_argument("--token", default="zhangkangkang", help="创作者url_token")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, "rb") as f:
+            body = f.read()
+    else:
+        body = generate_profile_page(args.token)
+    text = body.decode("utf-8")
+    print(f"页面大小: {len(body) / 1e6:.2f} MB")
+
+    extractor = ZhihuExtractor()
+    assert extractor._extract_users_fast(body) == legacy_extract_users(text)
+
+    legacy = bench("Selector + json.loads", lambda: legacy_extract_users(text), args.rounds)
+    fast = bench("字节定位 + users子树", lambda: extractor._extract_users_fast(body), args.rounds)
+    print(f"提速: {legacy / fast:.1f}x")
+    bench("extract_creator_from_html", lambda: extractor.extract_creator_from_html(args.token, body), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+API响应解码基准：json.loads(response.text) 与 zhihu_core.decoder 按字段解码的CPU时间和峰值内存
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/bench_decode.py [--pages 200] [--content-kb 40]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zhihu_core import decoder
+from zhihu_core.extractor import ZhihuExtractor
+
+
+def generate_answer_page(content_kb: int, seed: int) -> bytes:
+    """生成20条回答的列表页，字段与/api/v4/members/{token}/answers的返回接近"""
+    rng = random.Random(seed)
+    answers = []
+    for _ in range(20):
+        answer_id = rng.randint(10 ** 9, 10 ** 11)
+        paragraph = "<p data-pid=\"x\">" + "知乎回答内容，包含一些文字和<b>加粗</b>。" * 10 + "</p>"
+        content = paragraph * max(1, content_kb * 1024 // len(paragraph.encode("utf-8")))
+        author = {
+            "id": f"{rng.getrandbits(128):032x}", "url_token": "creator", "name": "创作者",
+            "avatar_url": "https://pic1.zhimg.com/v2-abc_l.jpg", "headline": "简介" * 20,
+            "badge": [{"type": "best_answerer", "topics": [{"id": str(i), "name": "话题"} for i in range(5)]}],
+            "vip_info": {"is_vip": False, "vip_icon": {"url": "https://pic.zhimg.com/x.png"}},
+        }
+        answers.append({
+            "id": answer_id, "type": "answer", "answer_type": "normal",
+            "question": {"id": rng.randint(10 ** 8, 10 ** 10), "title": "问题" * 10, "type": "question",
+                         "has_publishing_draft": False, "relationship": {}},
+            "author": author, "url": f"https://api.zhihu.com/answers/{answer_id}",
+            "content": content, "editable_content": content, "excerpt": "摘要" * 50,
+            "attachment": {"type": "video", "video": {"thumbnail": "https://pic.zhimg.com/v.jpg", "play_count": 10}},
+            "reaction_instruction": {"REACTION_CONTENT_SEGMENT_LIKE": "HIDE"},
+            "reward_info": {"can_open_reward": False, "is_rewardable": False, "reward_member_count": 0},
+            "relationship": {"is_authorized": False, "voting": 0, "is_thanked": False, "is_nothelp": False},
+            "label_info": {"type": "", "text": ""}, "review_info": {"type": "", "edit_tip": ""},
+            "created_time": 1700000000, "updated_time": 1700000001,
+            "voteup_count": rng.randint(0, 10 ** 5), "comment_count": rng.randint(0, 1000),
+        })
+    page = {"data": answers, "paging": {"is_end": False, "is_start": True, "totals": 3000,
+                                        "next": "https://www.zhihu.com/api/v4/members/creator/answers?offset=20&limit=20"}}
+    return json.dumps(page, ensure_ascii=False).encode("utf-8")
+
+
+def legacy_parse(body: bytes, extractor: ZhihuExtractor):
+    data = json.loads(body.decode("utf-8"))
+    return [extractor.extract_answer_content(answer) for answer in data.get("data", [])]
+
+
+def decoder_parse(body: bytes, extractor: ZhihuExtractor):
+    data = decoder.decode_answer_page(body)
+    return [extractor.extract_answer_content(answer) for answer in data.get("data", [])]
+
+
+def legacy_decode_only(body: bytes, extractor: ZhihuExtractor):
+    return json.loads(body.decode("utf-8"))
+
+
+def decoder_decode_only(body: bytes, extractor: ZhihuExtractor):
+    return decoder.decode_answer_page(body)
+
+
+def bench(name: str, func, pages, extractor):
+    start = time.process_time()
+    for body in pages:
+        func(body, extractor)
+    cpu = time.process_time() - start
+
+    tracemalloc.start()
+    func(pages[0], extractor)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<24} CPU {cpu / len(pages) * 1000:7.2f} ms/页   峰值内存 {peak / 1e6:6.2f} MB/页")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API响应解码基准")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--content-kb", type=int, default=40, help="每条回答content的大小")
+    args = parser.parse_args()
+
+    pages = [generate_answer_page(args.content_kb, seed) for seed in range(args.pages)]
+    print(f"{len(pages)} 页, 平均 {sum(map(len, pages)) / len(pages) / 1e6:.2f} MB/页")
+    extractor = ZhihuExtractor()
+    assert legacy_parse(pages[0], extractor) == decoder_parse(pages[0], extractor)
+
+    decoder_name = "decoder" if decoder.msgspec is not None else "decoder(未安装msgspec)"
+    print("仅解码:")
+    bench("  json.loads(text)", legacy_decode_only, pages, extractor)
+    bench(f"  {decoder_name}", decoder_decode_only, pages, extractor)
+    print("解码 + ZhihuExtractor:")
+    bench("  json.loads(text)", legacy_parse, pages, extractor)
+    bench(f"  {decoder_name}", decoder_parse, pages, extractor)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+HTML转文本基准：比较旧版re.sub、当前预编译正则实现和lxml后端的吞吐（字符/秒）
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/bench_html_text.py                      # 使用生成的知乎回答风格语料
+    python benchmarks/bench_html_text.py --corpus answers.jsonl   # 每行一个回答JSON（取content字段）
+    python benchmarks/bench_html_text.py --corpus html_dir/       # 目录下的 *.html 文件
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zhihu_core import utils
+
+_WORDS = ["知乎", "回答", "Python", "数据", "模型", "我们", "这个", "问题", "其实", "因为", "所以",
+          "性能", "优化", "内存", "并发", "the", "of", "and", "系统", "架构", "经验", "建议"]
+
+
+def legacy_extract_text_from_html(html: str) -> str:
+    """改造前的实现，作为对照"""
+    if not html:
+        return ""
+    clean_html = re.sub(r'<(script|style)[^>]*>.*?</\1>', '', html, flags=re.DOTALL)
+    clean_text = re.sub(r'<[^>]+>', '', clean_html).strip()
+    return clean_text
+
+
+def _sentence(rng: random.Random) -> str:
+    text = "".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 40)))
+    if rng.random() < 0.3:
+        text += rng.choice(["&amp;", "&lt;", "&gt;", "&quot;", "&#34;", "&nbsp;"])
+    if rng.random() < 0.2:
+        text += f'<b>{rng.choice(_WORDS)}</b>'
+    if rng.random() < 0.1:
+        url = f"https://link.zhihu.com/?target=https%3A//example.com/{rng.randint(1, 10 ** 6)}"
+        text += f'<a href="{url}" class=" wrap external" target="_blank" rel="nofollow noreferrer">{rng.choice(_WORDS)}</a>'
+    return text
+
+
+def _block(rng: random.Random) -> str:
+    kind = rng.random()
+    pid = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(8))
+    if kind < 0.7:
+        return f'<p data-pid="{pid}">{_sentence(rng)}</p>'
+    if kind < 0.8:
+        img = f"https://pic{rng.randint(1, 4)}.zhimg.com/v2-{rng.getrandbits(64):x}_720w.jpg"
+        return (
+            f'<figure data-size="normal"><noscript><img src="{img}" data-caption="" data-size="normal" '
+            f'data-rawwidth="1080" data-rawheight="720" class="origin_image zh-lightbox-thumb" width="1080"/></noscript>'
+            f'<img src="data:image/svg+xml;utf8,&lt;svg xmlns=&#39;http://www.w3.org/2000/svg&#39; width=&#39;1080&#39; height=&#39;720&#39;&gt;&lt;/svg&gt;" '
+            f'data-caption="" data-size="normal" class="origin_image zh-lightbox-thumb lazy" width="1080" data-actualsrc="{img}"/>'
+            f'<figcaption>{rng.choice(_WORDS)}</figcaption></figure>'
+        )
+    if kind < 0.85:
+        code = "\n".join(f"    x = {i} &lt; {i + 1}" for i in range(rng.randint(3, 30)))
+        return f'<div class="highlight"><pre><code class="language-python">{code}</code></pre></div>'
+    if kind < 0.9:
+        return f"<blockquote data-pid=\"{pid}\">{_sentence(rng)}</blockquote>"
+    if kind < 0.95:
+        return f"<h2>{_sentence(rng)}</h2>"
+    items = "".join(f"<li>{_sentence(rng)}</li>" for _ in range(rng.randint(2, 6)))
+    return f"<ul>{items}</ul>"
+
+
+def generate_corpus(count: int = 200, seed: int = 7) -> List[str]:
+    """生成知乎回答风格的HTML，长度从几KB到几百KB不等"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        target = int(rng.paretovariate(1.2) * 3000)
+        target = min(target, 500_000)
+        blocks = []
+        size = 0
+        while size < target:
+            block = _block(rng)
+            blocks.append(block)
+            size += len(block)
+        corpus.append("".join(blocks))
+    return corpus
+
+
+def load_corpus(path: str) -> List[str]:
+    if os.path.isdir(path):
+        corpus = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".html"):
+                with open(os.path.join(path, name), encoding="utf-8") as f:
+                    corpus.append(f.read())
+        return corpus
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line).get("content", "") for line in f if line.strip()]
+
+
+def bench(name: str, func, corpus: List[str], rounds: int):
+    total_chars = sum(len(doc) for doc in corpus) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for doc in corpus:
+            func(doc)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<16} {elapsed:8.3f}s  {total_chars / elapsed / 1e6:8.1f} M字符/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML转文本基准")
+    parser.add_argument("--corpus", help="回答JSONL文件或HTML目录，默认使用生成语料")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus()
+    total = sum(len(doc) for doc in corpus)
+    print(f"语料: {len(corpus)} 篇, {total / 1e6:.1f} M字符, 最长 {max(len(doc) for doc in corpus) / 1e3:.0f} K字符")
+
+    bench("legacy re.sub", legacy_extract_text_from_html, corpus, args.rounds)
+    # 旧实现不解码实体；补上html.unescape作为同等输出的对照
+    bench("legacy+unescape", lambda doc: html.unescape(legacy_extract_text_from_html(doc)), corpus, args.rounds)
+    bench("python 正则", utils._extract_text_python, corpus, args.rounds)
+    if utils.lxml_html is not None:
+        bench("lxml", utils._extract_text_lxml, corpus, args.rounds)
+        # 切换后端不应改变存储的content_text（以及去重摘要）
+        mismatches = sum(utils._extract_text_lxml(doc) != utils._extract_text_python(doc) for doc in corpus)
+        print(f"lxml与python输出不一致: {mismatches}/{len(corpus)} 篇")
+    else:
+        print(f"{'lxml':<16} 未安装lxml，跳过")
+
+
+if __name__ == "__main__":
+    main()
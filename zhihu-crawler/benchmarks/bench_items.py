@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+数据Item表示的基准：大量评论从提取到序列化的CPU时间，以及在内存中保留时的占用
+
+    legacy   提取为dict -> scrapy.Item(**dict) -> Pipeline中dict(item) -> 编码（改为Struct之前的做法）
+    compact  ZhihuExtractor直接构造ZhihuCommentItem -> Pipeline直接取值/编码
+
+每种做法在单独的子进程中运行，互不影响RSS。
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/bench_items.py [--comments 1000000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrapy
+from scrapy_zhihu.items import ZhihuCommentItem, encode_item, item_fields, item_values
+from scrapy_zhihu.pipelines import _dumps_line
+from zhihu_core import decoder
+from zhihu_core.extractor import ZhihuExtractor
+from zhihu_core.utils import extract_text_from_html
+
+# 改动前的评论Item：字段相同的scrapy.Item
+LegacyCommentItem = type(
+    "LegacyCommentItem", (scrapy.Item,), {name: scrapy.Field() for name in item_fields(ZhihuCommentItem)}
+)
+_COLUMNS = list(item_fields(ZhihuCommentItem))
+
+
+def generate_comments(count: int, seed: int = 7):
+    """生成一页评论并用decoder解码，字段与/api/v4/comment_v5的返回接近"""
+    rng = random.Random(seed)
+    comments = []
+    for i in range(count):
+        comments.append({
+            "id": 10 ** 10 + i, "type": "comment", "reply_comment_id": rng.choice([0, 10 ** 10 + i // 2]),
+            "content": "<p>" + "评论内容" * rng.randint(2, 40) + "</p>",
+            "created_time": 1700000000 + i, "child_comment_count": rng.randint(0, 30),
+            "like_count": rng.randint(0, 500), "dislike_count": 0,
+            "comment_tag": [{"type": "ip_info", "text": "IP 属地" + rng.choice(["北京", "上海", "广东"])}],
+            "author": {"id": f"{rng.getrandbits(128):032x}", "url_token": f"user{i}", "name": f"用户{i}",
+                       "avatar_url": "https://pic1.zhimg.com/v2-abc_l.jpg"},
+        })
+    body = json.dumps({"data": comments, "paging": {"is_end": True}}, ensure_ascii=False).encode("utf-8")
+    return decoder.decode_comment_page(body).get("data")
+
+
+def legacy_extract_comment(extractor: ZhihuExtractor, comment, content_id: str, content_type: str) -> dict:
+    """改动前的extract_comment：返回dict"""
+    author = extractor._extract_author(comment.get("author"))
+    return {
+        "comment_id": str(comment.get("id", "")),
+        "parent_comment_id": str(comment.get("reply_comment_id", "")),
+        "content": extract_text_from_html(comment.get("content", "")),
+        "publish_time": comment.get("created_time", 0),
+        "ip_location": extractor._extract_comment_ip_location(comment.get("comment_tag", [])),
+        "sub_comment_count": comment.get("child_comment_count", 0),
+        "like_count": comment.get("like_count", 0),
+        "dislike_count": comment.get("dislike_count", 0),
+        "content_id": content_id,
+        "content_type": content_type,
+        **author
+    }
+
+
+def build_legacy(extractor, comment, index: int):
+    return LegacyCommentItem(**legacy_extract_comment(extractor, comment, str(index), "answer"))
+
+
+def build_compact(extractor, comment, index: int):
+    return extractor.extract_comment(comment, str(index), "answer")
+
+
+def save_legacy_jsonl(item, ts: int) -> bytes:
+    item_dict = dict(item)
+    item_dict["last_modify_ts"] = ts
+    return _dumps_line(item_dict)
+
+
+def save_compact_jsonl(item, ts: int) -> bytes:
+    item["last_modify_ts"] = ts
+    return encode_item(item) + b"\n"
+
+
+def save_legacy_row(item, ts: int) -> tuple:
+    item_dict = dict(item)
+    item_dict["last_modify_ts"] = ts
+    return tuple(item_dict.get(col) for col in _COLUMNS)
+
+
+def save_compact_row(item, ts: int) -> tuple:
+    item["last_modify_ts"] = ts
+    return item_values(item)
+
+
+MODES = {
+    "legacy": (build_legacy, save_legacy_jsonl, save_legacy_row),
+    "compact": (build_compact, save_compact_jsonl, save_compact_row),
+}
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def run_mode(mode: str, count: int) -> dict:
+    """在当前进程中运行一种做法"""
+    build, save_jsonl, save_row = MODES[mode]
+    extractor = ZhihuExtractor()
+    comments = generate_comments(1000)
+    pool = len(comments)
+    ts = int(time.time() * 1000)
+
+    # 保留count条Item（例如JSON输出方式在内存中攒到结束）：RSS增量和一次完整GC的耗时
+    gc.collect()
+    before = _rss_mb()
+    held = [build(extractor, comments[i % pool], i) for i in range(count)]
+    gc.collect()
+    held_mb = _rss_mb() - before
+    start = time.perf_counter()
+    gc.collect()
+    gc_ms = (time.perf_counter() - start) * 1000
+    del held
+    gc.collect()
+
+    # 流式：提取 -> Item -> Pipeline编码
+    result = {"mode": mode, "count": count, "held_mb": held_mb, "gc_ms": gc_ms}
+    for name, save in (("jsonl", save_jsonl), ("row", save_row)):
+        start = time.process_time()
+        for i in range(count):
+            save(build(extractor, comments[i % pool], i), ts)
+        result[f"{name}_cpu"] = time.process_time() - start
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def check_parity():
+    """两种做法的输出一致"""
+    extractor = ZhihuExtractor()
+    ts = int(time.time() * 1000)
+    for index, comment in enumerate(generate_comments(50)):
+        legacy = build_legacy(extractor, comment, index)
+        compact = build_compact(extractor, comment, index)
+        assert json.loads(save_legacy_jsonl(legacy, ts)) == json.loads(save_compact_jsonl(compact, ts))
+        assert save_legacy_row(legacy, ts) == save_compact_row(compact, ts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据Item表示的基准")
+    parser.add_argument("--comments", type=int, default=1000000)
+    parser.add_argument("--mode", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.comments)))
+        return
+
+    check_parity()
+    compact = "msgspec.Struct" if decoder.msgspec is not None else "scrapy.Item(未安装msgspec)"
+    print(f"{args.comments} 条评论，compact的ZhihuCommentItem为{compact}")
+    print(f"{'':<10}{'保留内存(MB)':>14}{'B/条':>8}{'完整GC(ms)':>12}"
+          f"{'提取+JSONL(s)':>15}{'条/秒':>10}{'提取+行(s)':>12}{'峰值RSS(MB)':>13}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--comments", str(args.comments)],
+            check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<10}{r['held_mb']:>14.1f}{r['held_mb'] * 1e6 / r['count']:>8.0f}{r['gc_ms']:>12.1f}"
+              f"{r['jsonl_cpu']:>15.2f}{r['count'] / r['jsonl_cpu']:>10.0f}{r['row_cpu']:>12.2f}{r['peak_rss_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
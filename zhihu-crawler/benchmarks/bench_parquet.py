@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Parquet与CSV输出对比：文件大小、pandas加载耗时、整数列类型
+
+用法（在zhihu-crawler目录下，需要pyarrow和pandas）:
+    python benchmarks/bench_parquet.py [--rows 200000]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from scrapy_zhihu.items import ZhihuContentItem
+from scrapy_zhihu.pipelines import ParquetWriter, _item_columns
+
+_WORDS = ["知乎", "回答", "Python", "数据", "模型", "我们", "这个", "问题", "其实", "因为", "所以", "性能"]
+
+
+def generate_contents(rows: int, seed: int = 11):
+    """生成与ZhihuContentItem字段一致的记录，content_text为较长文本"""
+    rng = random.Random(seed)
+    for i in range(rows):
+        text = "".join(rng.choice(_WORDS) for _ in range(rng.randint(50, 800)))
+        content_id = str(rng.randint(10 ** 9, 10 ** 19))
+        yield {
+            "content_id": content_id, "content_type": rng.choice(["answer", "pin", "article"]),
+            "content_text": text, "question_id": str(rng.randint(10 ** 8, 10 ** 10)),
+            "content_url": f"https://www.zhihu.com/question/1/answer/{content_id}",
+            "title": text[:30], "desc": text[:200],
+            "created_time": 1600000000 + i, "updated_time": 1600000000 + i,
+            "voteup_count": rng.randint(0, 10 ** 5), "comment_count": rng.randint(0, 1000),
+            "source_keyword": "", "user_id": f"{rng.getrandbits(128):032x}",
+            "user_link": "https://www.zhihu.com/people/creator", "user_nickname": "创作者",
+            "user_avatar": "https://pic1.zhimg.com/v2-abc_l.jpg", "user_url_token": "creator",
+            "last_modify_ts": 1700000000000 + i,
+        }
+
+
+def _rows(records):
+    """按列顺序排成行，与ZhihuPipeline交给写入器的一致"""
+    columns = _item_columns(ZhihuContentItem)
+    for record in records:
+        yield tuple(record.get(col) for col in columns)
+
+
+def write_csv(path: Path, records):
+    """与ZhihuPipeline的CSV写法一致"""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(_item_columns(ZhihuContentItem))
+        writer.writerows(_rows(records))
+
+
+def write_parquet(path: Path, records):
+    writer = ParquetWriter(path, ZhihuContentItem)
+    for row in _rows(records):
+        writer.write(row)
+    writer.close()
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet与CSV输出对比")
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "contents.csv"
+        parquet_path = Path(tmp) / "contents.parquet"
+        _, csv_write = timed(write_csv, csv_path, generate_contents(args.rows))
+        _, parquet_write = timed(write_parquet, parquet_path, generate_contents(args.rows))
+
+        csv_df, csv_load = timed(pd.read_csv, csv_path, encoding="utf-8-sig", dtype={"content_id": str})
+        parquet_df, parquet_load = timed(pd.read_parquet, parquet_path)
+
+        print(f"{args.rows} 行")
+        print(f"{'':<10}{'大小(MB)':>10}{'写入(s)':>10}{'加载(s)':>10}  voteup_count类型")
+        for name, path, write_time, load_time, df in [
+            ("CSV", csv_path, csv_write, csv_load, csv_df),
+            ("Parquet", parquet_path, parquet_write, parquet_load, parquet_df),
+        ]:
+            size = path.stat().st_size / 1e6
+            print(f"{name:<10}{size:>10.1f}{write_time:>10.2f}{load_time:>10.2f}  {df['voteup_count'].dtype}")
+
+
+if __name__ == "__main__":
+    main()
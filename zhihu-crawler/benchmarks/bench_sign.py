@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+签名微基准：比较各签名引擎每秒签名次数
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/bench_sign.py [-n 5000] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zhihu_core.native_sign import NativeSigner
+from zhihu_core.sign import JS_PATH, ZhihuSignPool
+from sign_parity import generate_cases
+
+
+def _report(name: str, count: int, elapsed: float):
+    print(f"{name:<28} {count:>7} 次  {elapsed:8.3f}s  {count / elapsed:10.0f} 次/秒")
+
+
+def bench_execjs(cases, limit: int = 50):
+    """旧实现：每次call都会重新拉起node进程，只取少量样本"""
+    try:
+        import execjs
+    except ImportError:
+        print(f"{'execjs (逐次启动node)':<28} 未安装PyExecJS，跳过")
+        return
+    with open(JS_PATH, mode="r", encoding="utf-8-sig") as f:
+        ctx = execjs.compile(f.read())
+    cases = cases[:limit]
+    start = time.perf_counter()
+    for case in cases:
+        ctx.call("get_sign", case["path"], case["cookies"])
+    _report("execjs (逐次启动node)", len(cases), time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知乎签名微基准")
+    parser.add_argument("-n", type=int, default=5000, help="签名次数")
+    parser.add_argument("--workers", type=int, default=0, help="node进程池大小，0表示按CPU核数")
+    args = parser.parse_args()
+
+    cases = generate_cases(args.n)
+    paths = [case["path"] for case in cases]
+    cookies = cases[0]["cookies"]
+
+    bench_execjs(cases)
+
+    pool = ZhihuSignPool(args.workers or None)
+    try:
+        pool.sign(paths[0], cookies)  # 预热
+        start = time.perf_counter()
+        for path in paths:
+            pool.sign(path, cookies)
+        _report(f"node进程池 sign ({pool.size}进程)", len(paths), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pool.sign_many(paths, cookies)
+        _report(f"node进程池 sign_many ({pool.size}进程)", len(paths), time.perf_counter() - start)
+    finally:
+        pool.close()
+
+    signer = NativeSigner()
+    start = time.perf_counter()
+    for path in paths:
+        signer.sign(path, cookies)
+    _report("python sign", len(paths), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
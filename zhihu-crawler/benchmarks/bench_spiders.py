@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫端到端基准：在录制存档上离线回放 creator / detail 爬虫，
+统计 items/s、各回调的CPU时间和峰值RSS
+
+录制存档（需要有效Cookie，会访问知乎）:
+    在config/zhihu_config.py中设置 FIXTURE_RECORD_PATH = "benchmarks/data/fixtures.db" 后正常运行爬虫
+
+回放基准（在zhihu-crawler目录下）:
+    python benchmarks/bench_spiders.py --archive benchmarks/data/fixtures.db [--concurrency 16]
+    python benchmarks/bench_spiders.py --synthetic --archive /tmp/zhihu_fixtures.db   # 生成合成存档后回放
+    python benchmarks/bench_spiders.py --archive /tmp/zhihu_fixtures.db --workers 4   # 同时对比多进程模式
+
+每个爬虫在独立子进程中运行，峰值RSS互不影响（不含Node签名进程）。
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from config import zhihu_config
+
+
+class CallbackTimer:
+    """
+    爬虫中间件：统计每个回调的调用次数和CPU时间
+    回调是生成器，按next()逐段计时；使用线程CPU时间，不含签名线程和CSV写入线程
+    """
+
+    cpu = defaultdict(float)
+    calls = defaultdict(int)
+
+    def process_spider_output(self, response, result, spider):
+        callback = response.request.callback if response.request is not None else None
+        name = getattr(callback, '__name__', 'parse')
+        self.calls[name] += 1
+        iterator = iter(result)
+        while True:
+            start = time.thread_time()
+            try:
+                value = next(iterator)
+            except StopIteration:
+                self.cpu[name] += time.thread_time() - start
+                return
+            self.cpu[name] += time.thread_time() - start
+            yield value
+
+    async def process_spider_output_async(self, response, result, spider):
+        # 上游中间件产出异步生成器时走这里，计时方式相同
+        callback = response.request.callback if response.request is not None else None
+        name = getattr(callback, '__name__', 'parse')
+        self.calls[name] += 1
+        iterator = result.__aiter__()
+        while True:
+            start = time.thread_time()
+            try:
+                value = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.cpu[name] += time.thread_time() - start
+                return
+            self.cpu[name] += time.thread_time() - start
+            yield value
+
+
+# ---------------------------------------------------------------- 合成存档
+
+def _author(rng, url_token):
+    return {"id": f"{rng.getrandbits(128):032x}", "url_token": url_token, "name": "创作者",
+            "avatar_url": "https://pic1.zhimg.com/v2-abc_l.jpg", "headline": "简介" * 10}
+
+
+def _html_paragraphs(rng, size_kb):
+    paragraph = "<p data-pid=\"x\">" + "知乎回答内容，包含一些文字和<b>加粗</b>以及&nbsp;实体。" * 8 + "</p>"
+    return paragraph * max(1, size_kb * 1024 // len(paragraph.encode("utf-8")))
+
+
+def _answer(rng, answer_id, author, created_time, comment_count, content_kb):
+    return {
+        "id": answer_id, "type": "answer", "question": {"id": rng.randint(10 ** 8, 10 ** 10), "title": "问题"},
+        "author": author, "content": _html_paragraphs(rng, content_kb), "excerpt": "摘要" * 40,
+        "editable_content": "", "reaction_instruction": {}, "relationship": {"voting": 0},
+        "created_time": created_time, "updated_time": created_time + 10,
+        "voteup_count": rng.randint(0, 10 ** 5), "comment_count": comment_count,
+    }
+
+
+def _comment(rng, created_time, reply_comment_id="0", child_comment_count=0):
+    return {
+        "id": rng.randint(10 ** 10, 10 ** 11), "type": "comment", "reply_comment_id": reply_comment_id,
+        "content": "<p>评论内容" + "很有道理。" * rng.randint(1, 20) + "</p>",
+        "created_time": created_time, "child_comment_count": child_comment_count,
+        "like_count": rng.randint(0, 500), "dislike_count": 0,
+        "comment_tag": [{"type": "ip_info", "text": "IP 属地北京"}],
+        "author": _author(rng, f"user{rng.randint(0, 10 ** 6)}"),
+    }
+
+
+def _paged(base_url, comments, page_size):
+    """按游标分页，返回 [(url, body)]"""
+    pages = []
+    url = base_url
+    for start in range(0, max(len(comments), 1), page_size):
+        is_end = start + page_size >= len(comments)
+        next_url = f"{base_url.split('?')[0]}?order=score&offset={start + page_size}&limit={page_size}"
+        pages.append((url, {"data": comments[start:start + page_size],
+                            "paging": {"is_end": is_end, "next": "" if is_end else next_url}}))
+        url = next_url
+    return pages
+
+
+def _comments_pages(rng, base_url, total, replies=0):
+    """
+    一级评论分页；replies>0时每4条一级评论带replies条二级评论（部分回复其他二级评论），
+    二级评论分页一并返回
+    """
+    from scrapy_zhihu.spiders.comments import CommentTreeMixin
+
+    roots = [_comment(rng, 1700000000 + i, child_comment_count=replies if i % 4 == 0 else 0) for i in range(total)]
+    pages = _paged(base_url, roots, zhihu_config.COMMENT_PAGE_SIZE)
+    for root in roots:
+        if not root["child_comment_count"]:
+            continue
+        children = []
+        reply_to = root["id"]
+        for j in range(replies):
+            children.append(_comment(rng, root["created_time"] + j + 1, str(reply_to)))
+            if j % 2:
+                reply_to = children[-1]["id"]
+        pages += _paged(CommentTreeMixin._child_comments_url(str(root["id"])), children,
+                        zhihu_config.COMMENT_CHILD_PAGE_SIZE)
+    return pages
+
+
+def build_synthetic_archive(path, creators, answers, pins, comments, details, content_kb, replies=0, seed=0):
+    """按爬虫实际请求的URL生成合成存档（URL由爬虫自身的请求构造方法生成，保证能命中）"""
+    from scrapy_zhihu.spiders.creator_spider import CreatorSpider, PAGE_SIZE
+    from zhihu_core.constants import ZHIHU_URL, ZHIHU_ZHUANLAN_URL
+    from zhihu_core.fixtures import FixtureArchive
+
+    zhihu_config.CREATOR_INCREMENTAL = False
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    archive = FixtureArchive(path)
+    spider = CreatorSpider()
+    json_headers = {"Content-Type": ["application/json; charset=utf-8"]}
+    html_headers = {"Content-Type": ["text/html; charset=utf-8"]}
+
+    def put_json(url, obj):
+        archive.put("GET", url, 200, json_headers, json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    archive.put("GET", f"{ZHIHU_URL}/search?q=python&search_source=Guess&utm_content=search_hot&type=content",
+                200, html_headers, b"<html><body>search</body></html>")
+
+    creator_urls = []
+    for c in range(creators):
+        token = f"bench-creator-{c}"
+        creator_urls.append(f"{ZHIHU_URL}/people/{token}")
+        users = {token: {"id": f"{rng.getrandbits(128):032x}", "urlToken": token, "name": f"创作者{c}",
+                         "avatarUrl": "https://pic1.zhimg.com/v2-abc_l.jpg", "gender": 1, "ipInfo": "IP 属地上海",
+                         "followingCount": 10, "followerCount": 1000, "answerCount": answers,
+                         "zvideoCount": 0, "questionCount": 0, "articlesCount": 0, "columnsCount": 0,
+                         "voteupCount": 12345}}
+        initial = {"initialState": {"entities": {"users": users, "answers": {}}, "people": {}}}
+        html = ("<html><head><title>知乎</title></head><body>" + "<div>" * 50 + "</div>" * 50 +
+                "<script id=\"js-initialData\" type=\"text/json\">" + json.dumps(initial, ensure_ascii=False) +
+                "</script></body></html>")
+        archive.put("GET", creator_urls[-1], 200, html_headers, html.encode("utf-8"))
+
+        author = _author(rng, token)
+        for offset in range(0, max(answers, 1), PAGE_SIZE):
+            data = []
+            for i in range(offset, min(offset + PAGE_SIZE, answers)):
+                answer_id = rng.randint(10 ** 9, 10 ** 11)
+                data.append(_answer(rng, answer_id, author, 1700000000 - i * 60, comments, content_kb))
+                for url, page in _comments_pages(rng, spider._root_comments_url(answer_id, "answer"), comments, replies):
+                    put_json(url, page)
+            paging = {"is_end": offset + PAGE_SIZE >= answers, "totals": answers}
+            put_json(spider._answers_request(token, offset).url, {"data": data, "paging": paging})
+
+        for offset in range(0, max(pins, 1), PAGE_SIZE):
+            data = []
+            for i in range(offset, min(offset + PAGE_SIZE, pins)):
+                pin_id = rng.randint(10 ** 9, 10 ** 11)
+                data.append({"id": pin_id, "type": "pin", "author": author,
+                             "content": [{"type": "text", "content": "<p>想法" + "内容" * 50 + "</p>"},
+                                         {"type": "image", "url": "https://pic.zhimg.com/p.jpg"}],
+                             "created": 1700000000 - i * 60, "updated": 1700000000,
+                             "like_count": 10, "comment_count": comments})
+                for url, page in _comments_pages(rng, spider._root_comments_url(pin_id, "pin"), comments, replies):
+                    put_json(url, page)
+            paging = {"is_end": offset + PAGE_SIZE >= pins, "totals": pins}
+            put_json(spider._pins_request(token, offset).url, {"data": data, "paging": paging})
+
+    detail_urls = []
+    for d in range(details):
+        if d % 2 == 0:
+            question_id, answer_id = rng.randint(10 ** 8, 10 ** 10), rng.randint(10 ** 9, 10 ** 11)
+            page_url = f"{ZHIHU_URL}/question/{question_id}/answer/{answer_id}"
+            put_json(f"{ZHIHU_URL}/api/v4/questions/{question_id}/answers/{answer_id}",
+                     {"data": _answer(rng, answer_id, _author(rng, "detail"), 1700000000, comments, content_kb)})
+            comment_url = spider._root_comments_url(answer_id, "answer")
+        else:
+            article_id = rng.randint(10 ** 8, 10 ** 10)
+            page_url = f"{ZHIHU_ZHUANLAN_URL}/p/{article_id}"
+            article = _answer(rng, article_id, _author(rng, "detail"), 1700000000, comments, content_kb)
+            article["title"] = "文章标题"
+            put_json(f"{ZHIHU_ZHUANLAN_URL}/api/posts/{article_id}", article)
+            comment_url = spider._root_comments_url(article_id, "article")
+        if d % 10 == 0:
+            # 部分回答以短链接给出，爬虫先用HEAD解析跳转地址
+            short_url = f"{ZHIHU_URL}/answer/{answer_id}"
+            archive.put("HEAD", short_url, 302, {"Location": [page_url]}, b"")
+            archive.put("HEAD", page_url, 200, html_headers, b"")
+            page_url = short_url
+        detail_urls.append(page_url)
+        for url, page in _comments_pages(rng, comment_url, comments, replies):
+            put_json(url, page)
+
+    archive.set_meta("creator_urls", creator_urls)
+    archive.set_meta("detail_urls", detail_urls)
+    archive.set_meta("sub_comments", bool(replies))
+    size = len(archive)
+    archive.close()
+    return size
+
+
+# ---------------------------------------------------------------- 回放运行
+
+class FirstResultTracker:
+    """
+    记录每个创作者第一条内容和第一条评论产出时已下载的请求数
+    回放时下载几乎不耗时，按请求数衡量先后，不受机器快慢影响
+    """
+
+    def __init__(self, crawler):
+        from scrapy import signals
+
+        self.crawler = crawler
+        self.owners = {}
+        self.first = {"content": {}, "comment": {}}
+        crawler.signals.connect(self.item_scraped, signal=signals.item_scraped)
+
+    def item_scraped(self, item, response, spider):
+        requests = self.crawler.stats.get_value("downloader/request_count", 0)
+        kind = type(item).__name__
+        if kind == "ZhihuContentItem":
+            owner = item.get("user_url_token", "")
+            self.owners[item.get("content_id")] = owner
+            self.first["content"].setdefault(owner, requests)
+        elif kind == "ZhihuCommentItem":
+            owner = self.owners.get(item.get("content_id"))
+            if owner is not None:
+                self.first["comment"].setdefault(owner, requests)
+
+    def summary(self):
+        result = {}
+        for kind, values in self.first.items():
+            values = sorted(values.values())
+            if values:
+                result[kind] = {"owners": len(values), "median": values[len(values) // 2], "max": values[-1]}
+        return result
+
+
+def replay_config(archive_path, save_option, sign_engine, priority=True):
+    """回放环境的配置：关闭限速、去重、增量爬取"""
+    from zhihu_core.fixtures import FixtureArchive
+
+    archive = FixtureArchive(archive_path, readonly=True)
+    config = {
+        "COOKIES": zhihu_config.COOKIES or "d_c0=AFDbench0000000000000000000000000000|1700000000",
+        "ACCOUNTS_FILE": "",
+        "ZHIHU_CREATOR_URL_LIST": archive.get_meta("creator_urls", []),
+        "ZHIHU_SPECIFIED_ID_LIST": archive.get_meta("detail_urls", []),
+        "ENABLE_GET_SUB_COMMENTS": archive.get_meta("sub_comments", zhihu_config.ENABLE_GET_SUB_COMMENTS),
+        "FIXTURE_REPLAY_PATH": archive_path,
+        "FIXTURE_RECORD_PATH": "",
+        "JOB_ID": "",
+        "RATE_LIMIT_ENABLED": False,
+        "DEDUP_ENABLED": False,
+        "CREATOR_INCREMENTAL": False,
+        "SAVE_DATA_OPTION": save_option,
+        "SIGN_ENGINE": sign_engine,
+        "PRIORITY_ENABLED": priority,
+        "SIGN_CACHE_PATH": "",
+    }
+    archive.close()
+    return config
+
+
+def run_spider(name, archive_path, concurrency, save_option, sign_engine, priority=True):
+    """在当前进程中回放运行一个爬虫，返回统计结果"""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.settings import Settings
+
+    # 数据写入临时目录
+    for key, value in replay_config(archive_path, save_option, sign_engine, priority).items():
+        setattr(zhihu_config, key, value)
+    workdir = tempfile.mkdtemp(prefix="zhihu-bench-")
+    os.chdir(workdir)
+
+    settings = Settings()
+    settings.setmodule("scrapy_zhihu.settings", priority="project")
+    settings.update({
+        "CONCURRENT_REQUESTS": concurrency,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": concurrency,
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+        "LOG_LEVEL": "WARNING",
+        "SPIDER_MIDDLEWARES": {**settings.getdict("SPIDER_MIDDLEWARES"), "__main__.CallbackTimer": 999},
+        "TELNETCONSOLE_ENABLED": False,
+    }, priority="cmdline")
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(name)
+    tracker = FirstResultTracker(crawler)
+    process.crawl(crawler)
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    elapsed = stats.get("elapsed_time_seconds") or 0.0
+    items = stats.get("item_scraped_count", 0)
+    return {
+        "spider": name,
+        "items": items,
+        "requests": stats.get("downloader/request_count", 0),
+        "missing": stats.get("zhihu/replay/missing", 0),
+        "comment_trees": stats.get("zhihu/comment_tree/completed", 0),
+        "first_results": tracker.summary(),
+        "elapsed": elapsed,
+        "items_per_sec": items / elapsed if elapsed else 0.0,
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "callbacks": {key: {"calls": CallbackTimer.calls[key], "cpu": CallbackTimer.cpu[key]}
+                      for key in CallbackTimer.calls},
+    }
+
+
+def run_distributed(name, archive_path, workers, concurrency, save_option, sign_engine, priority=True):
+    """以多进程模式（scrapy_zhihu.distributed）回放运行一个爬虫，返回统计结果"""
+    config = replay_config(archive_path, save_option, sign_engine, priority)
+    # 每个工作进程的签名线程数按核数平分
+    config["SIGN_WORKER_NUM"] = 0
+    cmd = [sys.executable, os.path.join(PROJECT_DIR, "scrapy_zhihu", "distributed.py"), name, "--workers", str(workers),
+           "-s", f"CONCURRENT_REQUESTS={concurrency}", "-s", f"CONCURRENT_REQUESTS_PER_DOMAIN={concurrency}",
+           "-s", "LOG_LEVEL=WARNING"]
+    for key, value in config.items():
+        cmd += ["-c", f"{key}={value!r}"]
+    workdir = tempfile.mkdtemp(prefix="zhihu-bench-")
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    with open(os.path.join(workdir, "data", "zhihu", "workers", f"{name}-summary.json"), encoding="utf-8") as f:
+        stats = json.load(f)["stats"]
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_seconds = usage.ru_utime + usage.ru_stime - before.ru_utime - before.ru_stime
+    items = stats.get("zhihu/writer/items", 0)
+    return {
+        "spider": f"{name} × {workers}进程",
+        "items": items,
+        "unfinished": stats.get("zhihu/frontier/unfinished", 0),
+        "dead": stats.get("zhihu/frontier/dead", 0),
+        "elapsed": elapsed,
+        "items_per_sec": items / elapsed if elapsed else 0.0,
+        "cpu_seconds": cpu_seconds,
+    }
+
+
+def print_distributed_report(result):
+    print(f"\n== {result['spider']} ==")
+    print(f"items: {result['items']}  未完成请求: {result['unfinished']}  已放弃请求: {result['dead']}")
+    print(f"耗时（含进程启动）: {result['elapsed']:.2f}s  吞吐: {result['items_per_sec']:.0f} items/s  "
+          f"全部进程CPU: {result['cpu_seconds']:.2f}s")
+
+
+def print_report(result):
+    print(f"\n== {result['spider']} ==")
+    print(f"items: {result['items']}  requests: {result['requests']}  评论树: {result['comment_trees']}  "
+          f"未命中存档: {result['missing']}")
+    labels = {"content": "内容", "comment": "评论"}
+    for kind, row in result["first_results"].items():
+        print(f"首条{labels[kind]}（{row['owners']}个创作者，按已下载请求数）: 中位 {row['median']}  最晚 {row['max']}")
+    print(f"耗时: {result['elapsed']:.2f}s  吞吐: {result['items_per_sec']:.0f} items/s  "
+          f"进程CPU: {result['cpu_seconds']:.2f}s  峰值RSS: {result['peak_rss_mb']:.0f} MB")
+    print(f"{'callback':<24}{'calls':>8}{'cpu_ms':>12}{'us/call':>12}")
+    for name, row in sorted(result["callbacks"].items(), key=lambda kv: -kv[1]["cpu"]):
+        per_call = row["cpu"] / row["calls"] * 1e6 if row["calls"] else 0.0
+        print(f"{name:<24}{row['calls']:>8}{row['cpu'] * 1000:>12.1f}{per_call:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在录制存档上离线回放爬虫并统计吞吐")
+    parser.add_argument("--archive", default=os.path.join(PROJECT_DIR, "benchmarks", "data", "fixtures.db"))
+    parser.add_argument("--spider", choices=["creator", "detail", "all"], default="all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--save-option", default="csv", help="csv | jsonl | sqlite | parquet ...")
+    parser.add_argument("--sign-engine", default=zhihu_config.SIGN_ENGINE, choices=["node", "python"])
+    parser.add_argument("--no-priority", action="store_true", help="关闭请求优先级（对比用）")
+    parser.add_argument("--workers", type=int, default=0, help=">0时以多进程模式运行（同时输出单进程结果对比）")
+    parser.add_argument("--synthetic", action="store_true", help="先生成合成存档（覆盖--archive）")
+    parser.add_argument("--creators", type=int, default=5)
+    parser.add_argument("--answers", type=int, default=200, help="每个创作者的回答数")
+    parser.add_argument("--pins", type=int, default=100, help="每个创作者的想法数")
+    parser.add_argument("--comments", type=int, default=20, help="每条内容的评论数")
+    parser.add_argument("--replies", type=int, default=0, help="每4条一级评论中一条的二级评论数，>0时开启二级评论")
+    parser.add_argument("--details", type=int, default=200, help="详情模式的URL数")
+    parser.add_argument("--content-kb", type=int, default=4, help="每条回答正文大小")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    archive_path = os.path.abspath(args.archive)
+
+    if args.child:
+        print(json.dumps(run_spider(args.spider, archive_path, args.concurrency, args.save_option, args.sign_engine,
+                                    not args.no_priority)))
+        return
+
+    if args.synthetic:
+        start = time.perf_counter()
+        size = build_synthetic_archive(archive_path, args.creators, args.answers, args.pins,
+                                       args.comments, args.details, args.content_kb, args.replies)
+        print(f"合成存档: {archive_path}（{size} 个响应，{os.path.getsize(archive_path) / 1024 / 1024:.1f} MB，"
+              f"{time.perf_counter() - start:.1f}s）")
+
+    spiders = ["creator", "detail"] if args.spider == "all" else [args.spider]
+    print(f"并发: {args.concurrency}  签名: {args.sign_engine}  存储: {args.save_option}  "
+          f"优先级: {'关闭' if args.no_priority else '开启'}")
+    for name in spiders:
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", "--spider", name, "--archive", archive_path,
+               "--concurrency", str(args.concurrency), "--save-option", args.save_option,
+               "--sign-engine", args.sign_engine] + (["--no-priority"] if args.no_priority else [])
+        output = subprocess.run(cmd, cwd=PROJECT_DIR, check=True, stdout=subprocess.PIPE, text=True).stdout
+        print_report(json.loads(output.strip().splitlines()[-1]))
+        if args.workers:
+            print_distributed_report(run_distributed(name, archive_path, args.workers, args.concurrency,
+                                                     args.save_option, args.sign_engine, not args.no_priority))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+接口分类校验：爬虫构造的每种请求URL都归到预期的接口（耗时统计、优先级）和接口族（限速）
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/endpoint_check.py
+"""
+import os
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import zhihu_config
+
+# 只构造请求，不打开水位线和预热会话存储
+zhihu_config.CREATOR_INCREMENTAL = False
+zhihu_config.WARMUP_CACHE_ENABLED = False
+zhihu_config.ZHIHU_CREATOR_URL_LIST = ["https://www.zhihu.com/people/zhangkangkang"]
+
+from scrapy.utils.test import get_crawler
+
+from scrapy_zhihu.spiders.creator_spider import WARMUP_URL, CreatorSpider
+from scrapy_zhihu.spiders.detail_spider import DetailSpider
+from zhihu_core.endpoints import endpoint_family, request_endpoint
+
+
+def build_cases():
+    """(请求, URL, 预期接口, 预期接口族)"""
+    creator = CreatorSpider.from_crawler(get_crawler(CreatorSpider))
+    detail = DetailSpider.from_crawler(get_crawler(DetailSpider))
+    profile = next(iter(creator._start_creators()))
+    return [
+        ("预热搜索页", WARMUP_URL, "page", "page"),
+        ("创作者主页", profile.url, "profile", "page"),
+        ("创作者回答列表", creator._answers_request("zhangkangkang", 40).url, "answers", "answers"),
+        ("创作者想法列表", creator._pins_request("zhangkangkang", 40).url, "pins", "pins"),
+        ("一级评论", creator._root_comments_url("4885821440", "answer"), "root_comment", "comments"),
+        ("文章一级评论", creator._root_comments_url("673461588", "article"), "root_comment", "comments"),
+        ("二级评论", creator._child_comments_url("10000000001"), "child_comment", "comments"),
+        ("回答详情", detail._content_request("https://www.zhihu.com/question/826896610/answer/4885821440").url,
+         "detail", "detail"),
+        ("文章详情", detail._content_request("https://zhuanlan.zhihu.com/p/673461588").url, "detail", "detail"),
+        ("视频详情", detail._content_request("https://www.zhihu.com/zvideo/1539542068422144000").url,
+         "detail", "detail"),
+    ]
+
+
+def main():
+    failures = 0
+    for name, url, endpoint, family in build_cases():
+        actual = (request_endpoint(url), endpoint_family(urlparse(url).path))
+        ok = actual == (endpoint, family)
+        failures += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<10} {actual[0]:<14}{actual[1]:<10}{url[:80]}")
+        if not ok:
+            print(f"     预期: {endpoint} / {family}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
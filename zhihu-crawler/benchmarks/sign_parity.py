@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+签名对拍：校验纯Python签名（zhihu_core.native_sign）与 libs/zhihu.js 输出一致
+
+用法（在zhihu-crawler目录下）:
+    python benchmarks/sign_parity.py                  # 用已录制的向量校验Python实现
+    python benchmarks/sign_parity.py --live           # 额外用Node实时校验一遍
+    python benchmarks/sign_parity.py --record 3000    # 用Node重新录制向量
+
+JS中x-zse-96首字节来自Math.random()，录制时为每条向量固定该随机数，
+Python侧通过get_sign(..., rand=...)复现。
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zhihu_core.native_sign import get_sign
+from zhihu_core.sign import JS_PATH, _find_node
+
+VECTORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sign_vectors.jsonl.gz")
+
+# 固定Math.random后调用get_sign
+_RECORD_DRIVER_JS = r"""
+;(function () {
+    const readline = require('readline');
+    const rl = readline.createInterface({input: process.stdin, terminal: false});
+    rl.on('line', function (line) {
+        const req = JSON.parse(line);
+        Math.random = function () { return (req.rand + 0.5) / 127; };
+        process.stdout.write(JSON.stringify(get_sign(req.path, req.cookies)) + '\n');
+    });
+})();
+"""
+
+_ANSWER_INCLUDE = "data[*].is_normal,admin_closed_comment,reward_info,is_collapsed,annotation_action,annotation_detail,collapse_reason,collapsed_by,suggest_edit,comment_count,can_comment,content,editable_content,attachment,voteup_count,reshipment_settings,comment_permission,created_time,updated_time,review_info,excerpt,paid_info,reaction_instruction,is_labeled,label_info,relationship.is_authorized,voting,is_author,is_thanked,is_nothelp;data[*].vessay_info;data[*].author.badge[?(type=best_answerer)].topics;data[*].author.vip_info;data[*].question.has_publishing_draft,relationship"
+
+
+def _random_token(rng: random.Random) -> str:
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789-_"
+    token = "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 24)))
+    # 少量非ASCII路径，覆盖utf-8编码后的md5
+    if rng.random() < 0.05:
+        token += rng.choice(["知乎", "用户", "测试"])
+    return token
+
+
+def _random_path(rng: random.Random) -> str:
+    """按爬虫实际请求的几类API构造相对路径"""
+    from urllib.parse import urlencode
+
+    kind = rng.randrange(6)
+    object_id = str(rng.randint(10 ** 8, 10 ** 19))
+    if kind == 0:
+        params = {"include": _ANSWER_INCLUDE, "offset": rng.randrange(0, 3000, 20), "limit": 20, "order_by": "created"}
+        return f"/api/v4/members/{_random_token(rng)}/answers?{urlencode(params)}"
+    if kind == 1:
+        params = {"offset": rng.randrange(0, 3000, 20), "limit": 20, "includes": "data[*].upvoted_followees,admin_closed_comment"}
+        return f"/api/v4/v2/pins/{_random_token(rng)}/moments?{urlencode(params)}"
+    if kind == 2:
+        content_type = rng.choice(["answers", "articles", "zvideos", "pins"])
+        params = {"order": "score", "offset": rng.choice(["", object_id]), "limit": rng.choice([10, 20])}
+        return f"/api/v4/comment_v5/{content_type}/{object_id}/root_comment?{urlencode(params)}"
+    if kind == 3:
+        params = {"order": "sort", "offset": "", "limit": 10}
+        return f"/api/v4/comment_v5/comment/{object_id}/child_comment?{urlencode(params)}"
+    if kind == 4:
+        return f"/api/v4/questions/{rng.randint(10 ** 6, 10 ** 10)}/answers/{object_id}"
+    return f"/api/v4/zvideos/{object_id}"
+
+
+def _random_cookies(rng: random.Random) -> str:
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/_-"
+    d_c0 = "".join(rng.choice(alphabet) for _ in range(rng.randint(20, 48))) + f"=|{rng.randint(1500000000, 1800000000)}"
+    parts = [
+        f"_zap={rng.getrandbits(64):x}",
+        f"d_c0={d_c0}",
+        f"z_c0=2|1:0|10:{rng.randint(10 ** 9, 10 ** 10)}",
+        f"_xsrf={rng.getrandbits(96):x}",
+    ]
+    rng.shuffle(parts)
+    if rng.random() < 0.02:
+        # 缺少d_c0的Cookie
+        parts = [p for p in parts if not p.startswith("d_c0=")]
+    return "; ".join(parts)
+
+
+def generate_cases(count: int, seed: int = 2024) -> List[Dict]:
+    """生成对拍用的(path, cookies, rand)"""
+    rng = random.Random(seed)
+    return [
+        {"path": _random_path(rng), "cookies": _random_cookies(rng), "rand": rng.randrange(127)}
+        for _ in range(count)
+    ]
+
+
+def sign_with_js(cases: List[Dict]) -> List[Dict]:
+    """用Node执行libs/zhihu.js签名"""
+    with open(JS_PATH, mode="r", encoding="utf-8-sig") as f:
+        js_source = f.read() + _RECORD_DRIVER_JS
+    payload = "".join(json.dumps(case) + "\n" for case in cases)
+    proc = subprocess.run(
+        [_find_node(), "-e", js_source],
+        input=payload, capture_output=True, encoding="utf-8", check=True,
+    )
+    return [json.loads(line) for line in proc.stdout.splitlines()]
+
+
+def record(count: int, path: str = VECTORS_PATH):
+    """录制签名向量"""
+    cases = generate_cases(count)
+    results = sign_with_js(cases)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for case, res in zip(cases, results):
+            case["x-zse-96"] = res["x-zse-96"]
+            case["x-zst-81"] = res["x-zst-81"]
+            f.write(json.dumps(case, ensure_ascii=False) + "\n")
+    print(f"已录制 {len(cases)} 条签名向量: {path}")
+
+
+def load_vectors(path: str = VECTORS_PATH) -> Iterator[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def check(vectors: List[Dict]) -> int:
+    """逐条比较Python签名结果，返回不一致的数量"""
+    failures = 0
+    for vector in vectors:
+        res = get_sign(vector["path"], vector["cookies"], rand=vector["rand"])
+        if res["x-zse-96"] != vector["x-zse-96"] or res["x-zst-81"] != vector["x-zst-81"]:
+            failures += 1
+            if failures <= 5:
+                print(f"不一致: path={vector['path'][:80]} rand={vector['rand']}")
+                print(f"  js:     {vector['x-zse-96']}")
+                print(f"  python: {res['x-zse-96']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知乎签名对拍")
+    parser.add_argument("--record", type=int, metavar="N", help="用Node重新录制N条向量")
+    parser.add_argument("--live", type=int, nargs="?", const=2000, metavar="N", help="额外用Node实时对拍N条随机向量")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+
+    vectors = list(load_vectors())
+    failures = check(vectors)
+    print(f"录制向量: {len(vectors) - failures}/{len(vectors)} 一致")
+
+    if args.live:
+        cases = generate_cases(args.live, seed=random.randrange(2 ** 32))
+        for case, res in zip(cases, sign_with_js(cases)):
+            case.update(res)
+        live_failures = check(cases)
+        print(f"实时对拍: {len(cases) - live_failures}/{len(cases)} 一致")
+        failures += live_failures
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
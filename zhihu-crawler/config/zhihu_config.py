@@ -16,9 +16,45 @@ ZHIHU_SPECIFIED_ID_LIST = [
     # "https://www.zhihu.com/zvideo/1539542068422144000",  # 视频
 ]
 
-# Cookie配置（用于登录）- 必须配置！
+# 详情模式批量URL文件：非空时代替ZHIHU_SPECIFIED_ID_LIST，逐行读取文本（每行一个URL）或JSONL（url字段），
+# "-" 表示标准输入；也可以用 scrapy crawl detail -a url_file=urls.txt 指定
+DETAIL_URL_FILE = ""
+
+# 批量模式调度队列上限：队列中等待的请求超过该值时暂停读取URL
+DETAIL_URL_CHUNK_SIZE = 1000
+
+# 批量模式进度日志间隔（秒）
+DETAIL_PROGRESS_INTERVAL = 30
+
+# Cookie配置（用于登录）- 必须配置！（配置了ACCOUNTS_FILE时可留空）
 COOKIES = ""
 
+# 多账号文件：每行一个Cookie字符串，或 {"name": "账号名", "cookies": "Cookie字符串"}
+# 配置后按账号轮换请求，总并发随健康账号数量扩展；留空则只使用COOKIES
+ACCOUNTS_FILE = ""
+
+# 账号分配策略: round_robin（轮询） | lru（最久未使用优先）
+ACCOUNT_STRATEGY = "round_robin"
+
+# 账号连续返回403的次数达到该值后自动隔离
+ACCOUNT_MAX_FORBIDDEN = 3
+
+# 账号隔离时长（秒）
+ACCOUNT_QUARANTINE_SECONDS = 600
+
+# 请求返回403时是否换一个健康账号重试
+ACCOUNT_RETRY_FORBIDDEN = True
+
+# 创作者模式预热（访问搜索页获取Cookie）的结果是否缓存：未过期时后续运行直接复用，
+# 不再访问搜索页；账号返回403时作废并重新预热
+WARMUP_CACHE_ENABLED = True
+
+# 预热会话缓存文件（多进程模式下各工作进程共用）
+WARMUP_CACHE_PATH = "data/zhihu/warmup.db"
+
+# 预热结果最长复用时间（秒），Cookie自身的过期时间更早时以其为准
+WARMUP_MAX_AGE = 6 * 3600
+
 
 # 登录方式: qrcode | phone | cookie
 LOGIN_TYPE = "cookie"
@@ -32,15 +68,181 @@ ENABLE_GET_COMMENTS = True
 # 是否爬取二级评论
 ENABLE_GET_SUB_COMMENTS = False
 
+# 评论每页条数（一级评论/二级评论）。知乎网页端使用20，更大的值可能被接口截断为默认值
+COMMENT_PAGE_SIZE = 20
+COMMENT_CHILD_PAGE_SIZE = 20
+
+# 每条内容同时展开的子评论串数，按回复数从多到少依次展开
+COMMENT_CHILD_CONCURRENCY = 4
+
+# 评论抓取层级：1只抓一级评论，2同时展开二级评论（ENABLE_GET_SUB_COMMENTS为False时只抓一级评论）
+COMMENT_MAX_DEPTH = 2
+
+# 每条内容最多抓取的评论数（一级和二级合计），0为不限
+COMMENT_MAX_PER_CONTENT = 0
+
+# 每条内容的评论抓取完成后额外输出一条带父子关系的评论树（comment_trees）
+COMMENT_TREE_OUTPUT = True
+
 # 爬取间隔时间（秒）
 CRAWLER_MAX_SLEEP_SEC = 2
 
 # 并发数量
 MAX_CONCURRENCY_NUM = 1
 
-# 数据保存方式: csv | json | db | sqlite | excel
+# 签名引擎: node（常驻Node进程执行libs/zhihu.js） | python（纯Python实现，无需Node）
+SIGN_ENGINE = "node"
+
+# 签名进程数量（0表示按CPU核数自动设置）
+SIGN_WORKER_NUM = 0
+
+# 签名缓存容量（按相对路径+d_c0缓存，0表示关闭）
+SIGN_CACHE_SIZE = 10000
+
+# 签名缓存落盘文件（为空则只缓存在内存中），例如 "data/zhihu/sign_cache.db"
+SIGN_CACHE_PATH = ""
+
+# HTML转文本后端: python（预编译正则，默认） | lxml（需安装lxml），两者输出的文本相同
+HTML_TEXT_BACKEND = "python"
+
+# 数据保存方式: csv | json | jsonl | parquet | db | sqlite | excel
 SAVE_DATA_OPTION = "csv"
 
+# CSV后台写入队列容量，写满后Pipeline会等待队列腾出空间（背压）
+CSV_WRITER_QUEUE_SIZE = 10000
+
+# CSV每批写入的最大行数
+CSV_WRITER_BATCH_SIZE = 500
+
+# JSONL压缩方式: "" | gzip | zstd（zstd需安装zstandard）
+JSONL_COMPRESSION = ""
+
+# JSONL落盘间隔（秒），崩溃时最多丢失这段时间内的数据
+JSONL_FSYNC_INTERVAL = 5
+
+# 是否启用按接口族的自适应限速（替代固定DOWNLOAD_DELAY/AutoThrottle）
+RATE_LIMIT_ENABLED = True
+
+# 各接口族每个账号的初始速率（次/秒）：answers回答列表 | pins想法 | comments评论 |
+# detail内容详情 | api其他接口 | page网页，未列出的使用default
+RATE_LIMIT_INITIAL = {
+    "answers": 0.5,
+    "pins": 0.5,
+    "comments": 0.5,
+    "detail": 0.5,
+    "page": 0.5,
+    "default": 0.5,
+}
+
+# 速率下限/上限（次/秒）
+RATE_LIMIT_MIN = 0.05
+RATE_LIMIT_MAX = 5.0
+
+# 持续正常响应时每秒增加的速率（加法增长）
+RATE_LIMIT_INCREASE = 0.05
+
+# 返回403/429时速率乘以的系数（乘法减速）；5xx、超时和响应过慢时减速一半幅度
+RATE_LIMIT_DECREASE = 0.5
+
+# 响应耗时超过该值（秒）时视为服务端过载
+RATE_LIMIT_LATENCY_TARGET = 3.0
+
+# 令牌桶容量（允许的突发请求数）
+RATE_LIMIT_BURST = 1
+
+# 创作者回答/想法并行翻页：每个创作者每个内容流同时在途的页数，1为逐页串行
+# 并行页数受settings.py中CONCURRENT_REQUESTS_PER_DOMAIN（按账号计算）限制，需同时调大
+CREATOR_PAGE_CONCURRENCY = 4
+
+# 请求优先级：按接口分档，数值越大越先下载；各档至少相隔100（档内按所属内容排序和公平份额浮动）
+# page网页（预热、短链接解析） | profile创作者主页 | answers/pins/detail内容 | root_comment/child_comment评论
+PRIORITY_ENABLED = True
+REQUEST_PRIORITIES = {
+    "page": 500,
+    "profile": 400,
+    "answers": 300,
+    "pins": 300,
+    "detail": 300,
+    "root_comment": 200,
+    "child_comment": 100,
+}
+
+# 同一档内评论请求按所属内容排序: newest（发布越新越先） | voteup（赞同越多越先）
+COMMENT_PRIORITY_ORDER = "newest"
+
+# 每个创作者在调度队列中的请求数份额：超出后该创作者的新请求在本档内逐级降低优先级，
+# 其他创作者的同档请求先下载；0为不限
+CREATOR_FAIR_SHARE = 50
+
+# 录制存档：非空时把下载到的响应保存到该文件（SQLite），用于离线回放和基准测试
+FIXTURE_RECORD_PATH = ""
+
+# 回放存档：非空时所有请求从该存档返回，不访问网络
+FIXTURE_REPLAY_PATH = ""
+
+# 耗时统计：按阶段（下载、签名、中间件、回调、解码、提取、Pipeline）和接口汇总耗时直方图，
+# 爬虫结束时写入Scrapy stats（zhihu/timing/*）
+METRICS_ENABLED = False
+
+# 耗时统计的Prometheus端口：非0时爬取过程中在 http://METRICS_PROMETHEUS_HOST:端口/metrics 提供实时数据
+METRICS_PROMETHEUS_PORT = 0
+METRICS_PROMETHEUS_HOST = "127.0.0.1"
+
+# 断点续爬任务ID：非空时启用Scrapy JOBDIR和分页检查点，中断后以相同ID重新运行即可继续
+JOB_ID = ""
+
+# 多进程模式（python -m scrapy_zhihu.distributed creator --workers N）：工作进程共用的调度队列、
+# 去重指纹和数据发件箱，由主进程作为唯一写入者保存数据；以 --resume 重新运行即从中断处继续
+FRONTIER_DB_PATH = "data/zhihu/frontier.db"
+
+# 调度队列后端类路径，换用网络后端时实现zhihu_core.frontier.SqliteFrontier的同名方法
+FRONTIER_BACKEND = "zhihu_core.frontier.SqliteFrontier"
+
+# 工作进程数量（0表示按CPU核数），可用 --workers 覆盖
+DISTRIBUTED_WORKERS = 0
+
+# 请求租约时长（秒）：工作进程崩溃后，其下载中的请求在租约到期后由其他进程重新下载
+FRONTIER_LEASE_SECONDS = 600
+
+# 同一请求最多被租用的次数（反复导致进程崩溃的请求不再下载）
+FRONTIER_MAX_ATTEMPTS = 3
+
+# 每个工作进程同时处理的共享请求数：creator按创作者计（翻页和评论留在领取它的进程中），
+# detail按内容计；调小则各进程分到的任务更均匀，调大则单个进程的并发更高
+FRONTIER_MAX_UNITS = {
+    "creator": 2,
+    "detail": 16,
+    "default": 4,
+}
+
+# 创作者模式增量爬取：记录每个创作者回答/想法的最新created_time，
+# 下次运行翻页到该时间即停止，只抓新发布的内容
+CREATOR_INCREMENTAL = True
+
+# 增量爬取水位线文件（删除后下次运行重新全量爬取）
+WATERMARK_DB_PATH = "data/zhihu/watermark.db"
+
+# 是否启用跨运行去重：与上次运行相比没有变化的内容/评论/创作者不再写出
+DEDUP_ENABLED = True
+
+# 去重索引文件
+DEDUP_DB_PATH = "data/zhihu/dedup.db"
+
+# 判断"是否变化"时忽略的字段，例如加入 "voteup_count", "like_count" 可忽略点赞数变化
+DEDUP_IGNORE_FIELDS = ["last_modify_ts"]
+
+# SQLite数据库文件（SAVE_DATA_OPTION = "sqlite"时使用）
+SQLITE_DB_PATH = "data/zhihu/zhihu.db"
+
+# SQLite每批提交的条数
+SQLITE_BATCH_SIZE = 500
+
+# SQLite最长提交间隔（秒）
+SQLITE_COMMIT_INTERVAL = 5
+
+# Parquet每个row group的行数（SAVE_DATA_OPTION = "parquet"时使用，需安装pyarrow）
+PARQUET_ROW_GROUP_SIZE = 50000
+
 # 是否启用代理
 ENABLE_IP_PROXY = False
 
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+多进程模式：N个工作进程共用一个frontier（调度队列、去重指纹、数据发件箱），主进程作为唯一写入者保存数据
+
+用法（在项目根目录运行）：
+    python -m scrapy_zhihu.distributed creator --workers 4
+    python -m scrapy_zhihu.distributed detail --workers 8 -a url_file=urls.txt
+    python -m scrapy_zhihu.distributed detail --resume          # 中断后从frontier继续
+    -c KEY=VALUE 覆盖config/zhihu_config.py中的配置，-s KEY=VALUE 覆盖Scrapy设置
+
+- 0号工作进程是种子进程：只有它读取创作者/URL列表，其他进程从frontier领取请求
+- 账号按工作进程分片；账号少于工作进程时共用账号，按共用的进程数平分限速
+- 工作进程日志写入 data/zhihu/workers/<爬虫>-<序号>.log
+"""
+import argparse
+import ast
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy.exceptions import DropItem
+from scrapy.utils.misc import load_object
+from config import zhihu_config
+
+logger = logging.getLogger("zhihu.distributed")
+
+# 主进程每次从发件箱取出的数据条数
+WRITER_BATCH_SIZE = 1000
+
+
+class WriterStats:
+    """主进程中存储Pipeline使用的统计（接口同Scrapy StatsCollector的常用方法）"""
+
+    def __init__(self):
+        self._stats = {}
+
+    def get_value(self, key, default=None):
+        return self._stats.get(key, default)
+
+    def set_value(self, key, value):
+        self._stats[key] = value
+
+    def inc_value(self, key, count=1, start=0):
+        self._stats[key] = self._stats.get(key, start) + count
+
+    def max_value(self, key, value):
+        self._stats[key] = max(self._stats.get(key, value), value)
+
+    def get_stats(self):
+        return self._stats
+
+
+def _parse_pairs(pairs, literal: bool = False) -> dict:
+    """解析 KEY=VALUE 参数；literal为True时按Python字面量解析值（失败则作为字符串）"""
+    result = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"参数格式应为 KEY=VALUE: {pair}")
+        if literal:
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                pass
+        result[key] = value
+    return result
+
+
+def _apply_config(overrides: dict):
+    for key, value in overrides.items():
+        if not hasattr(zhihu_config, key):
+            raise SystemExit(f"未知的配置项: {key}")
+        setattr(zhihu_config, key, value)
+
+
+def _worker_count(workers: int) -> int:
+    return workers or zhihu_config.DISTRIBUTED_WORKERS or os.cpu_count() or 1
+
+
+def _shard_accounts(index: int, workers: int):
+    """
+    为工作进程分配账号
+    Returns:
+        (账号列表, 共用这些账号的工作进程数)
+    """
+    from zhihu_core.account_pool import load_accounts
+
+    accounts = load_accounts(zhihu_config.ACCOUNTS_FILE)
+    if not accounts or len(accounts) >= workers:
+        return accounts[index::workers], 1
+    position = index % len(accounts)
+    return [accounts[position]], len(range(position, workers, len(accounts)))
+
+
+def run_worker(spider: str, index: int, workers: int, spider_args: dict, settings_overrides: dict):
+    """工作进程：以frontier调度器运行爬虫，数据写入发件箱"""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.settings import Settings
+    from zhihu_core.account_pool import init_account_pool
+
+    # frontier代替JOBDIR保存调度队列和去重指纹
+    zhihu_config.JOB_ID = ""
+    if index:
+        # 只有种子进程读取创作者/URL列表
+        zhihu_config.ZHIHU_CREATOR_URL_LIST = []
+        zhihu_config.ZHIHU_SPECIFIED_ID_LIST = []
+        zhihu_config.DETAIL_URL_FILE = ""
+        spider_args.pop("url_file", None)
+    if not zhihu_config.SIGN_WORKER_NUM:
+        zhihu_config.SIGN_WORKER_NUM = max(1, (os.cpu_count() or 1) // workers)
+    if zhihu_config.METRICS_PROMETHEUS_PORT:
+        zhihu_config.METRICS_PROMETHEUS_PORT += index
+    if zhihu_config.SIGN_CACHE_PATH:
+        root, ext = os.path.splitext(zhihu_config.SIGN_CACHE_PATH)
+        zhihu_config.SIGN_CACHE_PATH = f"{root}-{index}{ext}"
+
+    accounts, sharing = _shard_accounts(index, workers)
+    if accounts:
+        init_account_pool(accounts)
+    if sharing > 1:
+        # 同一账号的请求速率在共用它的进程之间平分
+        zhihu_config.RATE_LIMIT_INITIAL = {key: rate / sharing for key, rate in zhihu_config.RATE_LIMIT_INITIAL.items()}
+        zhihu_config.RATE_LIMIT_MIN /= sharing
+        zhihu_config.RATE_LIMIT_MAX /= sharing
+        zhihu_config.RATE_LIMIT_INCREASE /= sharing
+
+    log_dir = os.path.join("data", "zhihu", "workers")
+    os.makedirs(log_dir, exist_ok=True)
+    settings = Settings()
+    settings.setmodule("scrapy_zhihu.settings", priority="project")
+    settings.update({
+        "SCHEDULER": "scrapy_zhihu.scheduler.ZhihuFrontierScheduler",
+        "ZHIHU_FRONTIER_PATH": zhihu_config.FRONTIER_DB_PATH,
+        "ZHIHU_WORKER_INDEX": index,
+        "SPIDER_MIDDLEWARES": {**settings.getdict("SPIDER_MIDDLEWARES"),
+                               "scrapy_zhihu.middlewares.ZhihuFrontierMiddleware": 960},
+        "ITEM_PIPELINES": {"scrapy_zhihu.pipelines.ZhihuOutboxPipeline": 300},
+        "LOG_FILE": os.path.join(log_dir, f"{spider}-{index}.log"),
+    }, priority="cmdline")
+    settings.update(settings_overrides, priority="cmdline")
+
+    process = CrawlerProcess(settings)
+    process.crawl(spider, **spider_args)
+    process.start()
+
+
+def _item_classes() -> dict:
+    from scrapy_zhihu import items
+
+    return {
+        name: getattr(items, name)
+        for name in ("ZhihuContentItem", "ZhihuCommentItem", "ZhihuCreatorItem", "ZhihuCommentTreeItem")
+    }
+
+
+async def _write_items(frontier, processes, stats: WriterStats, started_at: float):
+    """唯一写入者：从发件箱取出数据，经过去重和存储Pipeline保存，直到所有工作进程退出且发件箱为空"""
+    from twisted.internet import reactor
+    from twisted.internet.defer import Deferred
+    from twisted.internet.task import deferLater
+    from scrapy_zhihu.pipelines import ZhihuDedupPipeline, ZhihuPipeline
+
+    item_classes = _item_classes()
+    dedup = ZhihuDedupPipeline(stats)
+    pipeline = ZhihuPipeline(stats)
+    pipeline.flush_listeners.append(dedup.storage_flushed)
+    dedup.open_spider(None)
+    pipeline.open_spider(None)
+
+    stopping = False
+
+    def _interrupt(signum, frame):
+        # 第一次Ctrl+C：工作进程各自收到信号并正常关闭，主进程继续保存它们已产出的数据
+        nonlocal stopping
+        if stopping:
+            reactor.callFromThread(reactor.stop)
+            return
+        stopping = True
+        logger.info("收到中断信号，等待工作进程退出（再按一次强制退出）")
+
+    def _terminate(signum, frame):
+        # 由进程管理器停止：转告工作进程正常关闭
+        logger.info("收到终止信号，通知工作进程关闭")
+        for proc in processes:
+            if proc.poll() is None:
+                proc.terminate()
+
+    signal.signal(signal.SIGINT, _interrupt)
+    signal.signal(signal.SIGTERM, _terminate)
+
+    exited = set()
+    written = 0
+    last_log = time.monotonic()
+    try:
+        while True:
+            for index, proc in enumerate(processes):
+                if index not in exited and proc.poll() is not None:
+                    exited.add(index)
+                    _worker_exited(frontier, index, proc.returncode)
+            # 先确认所有进程已退出再查发件箱，退出前写入的数据不会漏掉
+            finished = len(exited) == len(processes)
+            rows = frontier.take_items(WRITER_BATCH_SIZE)
+            if not rows:
+                if finished:
+                    break
+                await deferLater(reactor, 0.5, lambda: None)
+                continue
+
+            for _, kind, payload in rows:
+                item = item_classes[kind](**json.loads(payload))
+                try:
+                    item = dedup.process_item(item, None)
+                except DropItem:
+                    continue
+                result = pipeline.process_item(item, None)
+                if isinstance(result, Deferred):
+                    await result
+                dedup.item_saved(item)
+                written += 1
+            frontier.delete_items(rows[-1][0])
+            stats.set_value("zhihu/writer/items", written)
+
+            now = time.monotonic()
+            if now - last_log >= 10:
+                last_log = now
+                queued, leased, dead = frontier.counts()
+                logger.info(
+                    f"已保存 {written} 条数据（{written / (now - started_at):.1f} 条/秒），"
+                    f"队列中 {queued}，下载中 {leased}，已放弃 {dead}"
+                )
+    finally:
+        pipeline.close_spider(None)
+        dedup.close_spider(None)
+
+
+def _worker_exited(frontier, index: int, returncode: int):
+    if returncode:
+        # 崩溃的工作进程的租约立即回到队列，不必等租约到期
+        released = frontier.release_worker(f"worker-{index}")
+        logger.warning(f"工作进程 {index} 异常退出（{returncode}），{released} 个请求回到队列")
+    else:
+        logger.info(f"工作进程 {index} 已完成")
+    if index == 0 and frontier.get_meta("seeded") != "1":
+        # 种子进程未正常结束，不再等待它的起始请求，其他进程处理完队列即可退出
+        frontier.set_meta("seeded", "1")
+
+
+def run_coordinator(args):
+    """主进程：准备frontier，启动工作进程并保存数据"""
+    from twisted.internet import reactor
+    from twisted.internet.defer import Deferred
+
+    workers = _worker_count(args.workers)
+    path = zhihu_config.FRONTIER_DB_PATH
+    if not args.resume:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    frontier = load_object(zhihu_config.FRONTIER_BACKEND)(path)
+    if args.resume:
+        # 正常停止的工作进程已归还租约，这里收回被强制结束的进程留下的租约
+        frontier.release_all()
+        queued, _, dead = frontier.counts()
+        logger.info(f"续跑：队列中 {queued} 个请求，已放弃 {dead} 个")
+
+    command = [sys.executable, os.path.abspath(__file__), args.spider, "--workers", str(workers)]
+    for pair in args.spider_args or []:
+        command += ["-a", pair]
+    for pair in args.config or []:
+        command += ["-c", pair]
+    for pair in args.set or []:
+        command += ["-s", pair]
+
+    logger.info(f"启动 {workers} 个工作进程，frontier: {path}")
+    stats = WriterStats()
+    started_at = time.monotonic()
+    processes = [subprocess.Popen(command + ["--worker-index", str(i)]) for i in range(workers)]
+    failures = []
+
+    def _start():
+        d = Deferred.fromCoroutine(_write_items(frontier, processes, stats, started_at))
+        d.addErrback(failures.append)
+        d.addBoth(lambda _: reactor.stop())
+
+    try:
+        reactor.callWhenRunning(_start)
+        # 信号由_write_items处理（转告工作进程后继续保存数据），不使用Twisted默认的直接停止
+        reactor.run(installSignalHandlers=False)
+        if failures:
+            failures[0].raiseException()
+    finally:
+        for proc in processes:
+            if proc.poll() is None:
+                proc.terminate()
+        queued, leased, dead = frontier.counts()
+        frontier.close()
+    elapsed = time.monotonic() - started_at
+    stats.set_value("elapsed_time_seconds", round(elapsed, 3))
+    stats.set_value("zhihu/frontier/unfinished", queued + leased)
+    stats.set_value("zhihu/frontier/dead", dead)
+    for key, value in sorted(stats.get_stats().items()):
+        logger.info(f"{key}: {value}")
+    # 运行汇总，供监控和基准脚本读取
+    summary_path = os.path.join("data", "zhihu", "workers", f"{args.spider}-summary.json")
+    os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"spider": args.spider, "workers": workers, "stats": stats.get_stats()}, f, ensure_ascii=False)
+    logger.info(f"完成，用时 {elapsed:.1f} 秒，保存 {stats.get_value('zhihu/writer/items', 0)} 条数据；"
+                f"未完成的请求 {queued + leased} 个，已放弃 {dead} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程运行知乎爬虫（共享SQLite调度队列）")
+    parser.add_argument("spider", choices=["creator", "detail"])
+    parser.add_argument("--workers", type=int, default=0, help="工作进程数量（默认DISTRIBUTED_WORKERS或CPU核数）")
+    parser.add_argument("--resume", action="store_true", help="沿用已有的frontier，从中断处继续")
+    parser.add_argument("-a", dest="spider_args", action="append", metavar="NAME=VALUE", help="爬虫参数")
+    parser.add_argument("-c", dest="config", action="append", metavar="KEY=VALUE", help="覆盖zhihu_config配置")
+    parser.add_argument("-s", dest="set", action="append", metavar="KEY=VALUE", help="覆盖Scrapy设置")
+    parser.add_argument("--worker-index", type=int, default=-1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    _apply_config(_parse_pairs(args.config, literal=True))
+    if args.worker_index >= 0:
+        run_worker(args.spider, args.worker_index, _worker_count(args.workers),
+                   _parse_pairs(args.spider_args), _parse_pairs(args.set))
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    run_coordinator(args)
+
+
+if __name__ == "__main__":
+    main()
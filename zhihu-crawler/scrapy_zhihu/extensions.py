@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Scrapy扩展
+"""
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from zhihu_core.metrics import by_request, get_metrics
+from config import zhihu_config
+
+
+class ZhihuMetricsExtension:
+    """
+    耗时统计扩展
+    开启计时装饰器（中间件、签名、解码、提取、Pipeline）并记录下载耗时，
+    爬虫关闭时把各阶段/接口的直方图摘要写入Scrapy stats（zhihu/timing/*）；
+    配置METRICS_PROMETHEUS_PORT时在本地端口提供Prometheus文本格式的实时数据
+    """
+
+    def __init__(self, stats=None, port: int = 0, host: str = '127.0.0.1'):
+        self.stats = stats
+        self.port = port
+        self.host = host
+        self.server = None
+        self.metrics = get_metrics()
+        self.metrics.reset()
+        self.metrics.enabled = True
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not zhihu_config.METRICS_ENABLED:
+            raise NotConfigured
+        extension = cls(crawler.stats, zhihu_config.METRICS_PROMETHEUS_PORT, zhihu_config.METRICS_PROMETHEUS_HOST)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        return extension
+
+    def spider_opened(self, spider):
+        if self.port:
+            self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name='zhihu-metrics', daemon=True).start()
+            spider.logger.info(f"[ZhihuMetricsExtension] Prometheus指标: http://{self.host}:{self.port}/metrics")
+
+    def spider_closed(self, spider):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.stats is not None:
+            for key, value in self.metrics.to_stats().items():
+                self.stats.set_value(key, value)
+        self.metrics.enabled = False
+
+    def response_received(self, response, request, spider):
+        """下载耗时（从发出请求到收到响应，不含中间件排队和限速等待）"""
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            self.metrics.observe('download', by_request(self, request), latency)
+
+    def _handler(self):
+        metrics = self.metrics
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return MetricsHandler
@@ -1,72 +1,261 @@
 # -*- coding: utf-8 -*-
 """
 知乎爬虫数据模型
+
+安装msgspec时数据类型为msgspec.Struct：字段存放在固定槽位中，没有每条数据一个的dict，
+不参与循环垃圾回收；ZhihuExtractor直接构造，Pipeline按字段顺序取值或直接编码为JSON，
+不再经过中间dict。同时保留dict风格的 item['x'] / item.get('x') / dict(item)，
+并注册了ItemAdapter适配器，Scrapy和其他按Item处理的代码不需要改动。
+未安装msgspec时退回为字段相同的scrapy.Item。
 """
+import json
+from collections.abc import KeysView
+from typing import Any, List, Optional, Tuple
+
 import scrapy
 from itemadapter import ItemAdapter
+from itemadapter.adapter import AdapterInterface
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec为可选加速依赖
+    msgspec = None
+
+
+if msgspec is not None:
+    _ENCODER = msgspec.json.Encoder()
+
+    class ZhihuItem(msgspec.Struct, gc=False):
+        """数据类型的基类（评论树中的嵌套list/dict不会引用回Item，关闭GC跟踪是安全的）"""
+
+        def get(self, name: str, default: Any = None) -> Any:
+            if name in self.__struct_fields__:
+                return getattr(self, name)
+            return default
+
+        def keys(self) -> Tuple[str, ...]:
+            return self.__struct_fields__
+
+        def __getitem__(self, name: str) -> Any:
+            if name in self.__struct_fields__:
+                return getattr(self, name)
+            raise KeyError(name)
+
+        def __setitem__(self, name: str, value: Any):
+            if name not in self.__struct_fields__:
+                raise KeyError(f"{type(self).__name__} does not support field: {name}")
+            setattr(self, name, value)
+
+        def __contains__(self, name: str) -> bool:
+            return name in self.__struct_fields__
+
+    class ZhihuItemAdapter(AdapterInterface):
+        """让ItemAdapter（Scrapy判断回调输出、Feed导出等）识别ZhihuItem"""
+
+        @classmethod
+        def is_item_class(cls, item_class: type) -> bool:
+            return isinstance(item_class, type) and issubclass(item_class, ZhihuItem)
+
+        @classmethod
+        def get_field_names_from_class(cls, item_class: type) -> Optional[List[str]]:
+            return list(item_class.__struct_fields__)
+
+        def field_names(self) -> KeysView:
+            return KeysView(self.item.__struct_fields__)
+
+        def __getitem__(self, field_name: str) -> Any:
+            return self.item[field_name]
+
+        def __setitem__(self, field_name: str, value: Any):
+            self.item[field_name] = value
+
+        def __delitem__(self, field_name: str):
+            raise KeyError(f"{type(self.item).__name__} 的字段不能删除: {field_name}")
+
+        def __iter__(self):
+            return iter(self.item.__struct_fields__)
+
+        def __len__(self) -> int:
+            return len(self.item.__struct_fields__)
+
+    ItemAdapter.ADAPTER_CLASSES.appendleft(ZhihuItemAdapter)
+
+    class ZhihuContentItem(ZhihuItem):
+        """知乎内容（回答、文章、视频）"""
+        content_id: str = ''
+        content_type: str = ''  # article | answer | zvideo
+        content_text: str = ''
+        content_url: str = ''
+        question_id: str = ''  # 仅回答类型有值
+        title: str = ''
+        desc: str = ''
+        created_time: Optional[int] = 0
+        updated_time: Optional[int] = 0
+        voteup_count: Optional[int] = 0
+        comment_count: Optional[int] = 0
+        source_keyword: str = ''  # 来源关键词（creator/detail模式为空）
+
+        # 作者信息
+        user_id: str = ''
+        user_link: str = ''
+        user_nickname: str = ''
+        user_avatar: str = ''
+        user_url_token: str = ''
+        last_modify_ts: Optional[int] = None  # 最后修改时间戳
+
+    class ZhihuCommentItem(ZhihuItem):
+        """知乎评论"""
+        comment_id: str = ''
+        parent_comment_id: str = ''
+        content: str = ''
+        publish_time: Optional[int] = 0
+        ip_location: str = ''
+        sub_comment_count: Optional[int] = 0
+        like_count: Optional[int] = 0
+        dislike_count: Optional[int] = 0
+        content_id: str = ''
+        content_type: str = ''
+
+        # 评论者信息
+        user_id: str = ''
+        user_link: str = ''
+        user_nickname: str = ''
+        user_avatar: str = ''
+        user_url_token: str = ''
+        last_modify_ts: Optional[int] = None  # 最后修改时间戳
+
+    class ZhihuCommentTreeItem(ZhihuItem):
+        """知乎评论树（每条内容一条）"""
+        content_id: str = ''
+        content_type: str = ''
+        comment_count: int = 0
+        root_count: int = 0
+        max_depth: int = 0
+        truncated: int = 0  # 是否因COMMENT_MAX_PER_CONTENT截断
+        tree: Optional[list] = None  # 一级评论列表，每条的children为其下的二级评论
+        last_modify_ts: Optional[int] = None  # 最后修改时间戳
+
+    class ZhihuCreatorItem(ZhihuItem):
+        """知乎创作者"""
+        user_id: Optional[str] = ''
+        user_link: str = ''
+        user_nickname: Optional[str] = ''
+        user_avatar: Optional[str] = ''
+        url_token: str = ''
+        gender: str = ''
+        ip_location: Optional[str] = ''
+        follows: Optional[int] = 0
+        fans: Optional[int] = 0
+        anwser_count: Optional[int] = 0
+        video_count: Optional[int] = 0
+        question_count: Optional[int] = 0
+        article_count: Optional[int] = 0
+        column_count: Optional[int] = 0
+        get_voteup_count: Optional[int] = 0
+        last_modify_ts: Optional[int] = None  # 最后修改时间戳
+
+    def item_fields(item_cls) -> Tuple[str, ...]:
+        """数据类型的字段（按声明顺序，即输出的列顺序）"""
+        return item_cls.__struct_fields__
+
+    def item_values(item) -> tuple:
+        """按item_fields的顺序取出各字段的值"""
+        return msgspec.structs.astuple(item)
+
+    def encode_item(item) -> bytes:
+        """编码为JSON（UTF-8，不转义中文）"""
+        return _ENCODER.encode(item)
+
+else:
+    class ZhihuContentItem(scrapy.Item):
+        """知乎内容（回答、文章、视频）"""
+        content_id = scrapy.Field()
+        content_type = scrapy.Field()  # article | answer | zvideo
+        content_text = scrapy.Field()
+        content_url = scrapy.Field()
+        question_id = scrapy.Field()  # 仅回答类型有值
+        title = scrapy.Field()
+        desc = scrapy.Field()
+        created_time = scrapy.Field()
+        updated_time = scrapy.Field()
+        voteup_count = scrapy.Field()
+        comment_count = scrapy.Field()
+        source_keyword = scrapy.Field()  # 来源关键词（creator/detail模式为空）
+
+        # 作者信息
+        user_id = scrapy.Field()
+        user_link = scrapy.Field()
+        user_nickname = scrapy.Field()
+        user_avatar = scrapy.Field()
+        user_url_token = scrapy.Field()
+        last_modify_ts = scrapy.Field()  # 最后修改时间戳
+
+    class ZhihuCommentItem(scrapy.Item):
+        """知乎评论"""
+        comment_id = scrapy.Field()
+        parent_comment_id = scrapy.Field()
+        content = scrapy.Field()
+        publish_time = scrapy.Field()
+        ip_location = scrapy.Field()
+        sub_comment_count = scrapy.Field()
+        like_count = scrapy.Field()
+        dislike_count = scrapy.Field()
+        content_id = scrapy.Field()
+        content_type = scrapy.Field()
+
+        # 评论者信息
+        user_id = scrapy.Field()
+        user_link = scrapy.Field()
+        user_nickname = scrapy.Field()
+        user_avatar = scrapy.Field()
+        user_url_token = scrapy.Field()
+        last_modify_ts = scrapy.Field()  # 最后修改时间戳
+
+    class ZhihuCommentTreeItem(scrapy.Item):
+        """知乎评论树（每条内容一条）"""
+        content_id = scrapy.Field()
+        content_type = scrapy.Field()
+        comment_count = scrapy.Field()
+        root_count = scrapy.Field()
+        max_depth = scrapy.Field()
+        truncated = scrapy.Field()  # 是否因COMMENT_MAX_PER_CONTENT截断
+        tree = scrapy.Field()  # 一级评论列表，每条的children为其下的二级评论
+        last_modify_ts = scrapy.Field()  # 最后修改时间戳
+
+    class ZhihuCreatorItem(scrapy.Item):
+        """知乎创作者"""
+        user_id = scrapy.Field()
+        user_link = scrapy.Field()
+        user_nickname = scrapy.Field()
+        user_avatar = scrapy.Field()
+        url_token = scrapy.Field()
+        gender = scrapy.Field()
+        ip_location = scrapy.Field()
+        follows = scrapy.Field()
+        fans = scrapy.Field()
+        anwser_count = scrapy.Field()
+        video_count = scrapy.Field()
+        question_count = scrapy.Field()
+        article_count = scrapy.Field()
+        column_count = scrapy.Field()
+        get_voteup_count = scrapy.Field()
+        last_modify_ts = scrapy.Field()  # 最后修改时间戳
 
+    def item_fields(item_cls) -> Tuple[str, ...]:
+        """数据类型的字段（即输出的列顺序）"""
+        return tuple(item_cls.fields)
 
-class ZhihuContentItem(scrapy.Item):
-    """知乎内容（回答、文章、视频）"""
-    content_id = scrapy.Field()
-    content_type = scrapy.Field()  # article | answer | zvideo
-    content_text = scrapy.Field()
-    content_url = scrapy.Field()
-    question_id = scrapy.Field()  # 仅回答类型有值
-    title = scrapy.Field()
-    desc = scrapy.Field()
-    created_time = scrapy.Field()
-    updated_time = scrapy.Field()
-    voteup_count = scrapy.Field()
-    comment_count = scrapy.Field()
-    source_keyword = scrapy.Field()  # 来源关键词（creator/detail模式为空）
-    
-    # 作者信息
-    user_id = scrapy.Field()
-    user_link = scrapy.Field()
-    user_nickname = scrapy.Field()
-    user_avatar = scrapy.Field()
-    user_url_token = scrapy.Field()
-    last_modify_ts = scrapy.Field()  # 最后修改时间戳
-
-
-class ZhihuCommentItem(scrapy.Item):
-    """知乎评论"""
-    comment_id = scrapy.Field()
-    parent_comment_id = scrapy.Field()
-    content = scrapy.Field()
-    publish_time = scrapy.Field()
-    ip_location = scrapy.Field()
-    sub_comment_count = scrapy.Field()
-    like_count = scrapy.Field()
-    dislike_count = scrapy.Field()
-    content_id = scrapy.Field()
-    content_type = scrapy.Field()
-    
-    # 评论者信息
-    user_id = scrapy.Field()
-    user_link = scrapy.Field()
-    user_nickname = scrapy.Field()
-    user_avatar = scrapy.Field()
-    user_url_token = scrapy.Field()
-
-
-class ZhihuCreatorItem(scrapy.Item):
-    """知乎创作者"""
-    user_id = scrapy.Field()
-    user_link = scrapy.Field()
-    user_nickname = scrapy.Field()
-    user_avatar = scrapy.Field()
-    url_token = scrapy.Field()
-    gender = scrapy.Field()
-    ip_location = scrapy.Field()
-    follows = scrapy.Field()
-    fans = scrapy.Field()
-    anwser_count = scrapy.Field()
-    video_count = scrapy.Field()
-    question_count = scrapy.Field()
-    article_count = scrapy.Field()
-    column_count = scrapy.Field()
-    get_voteup_count = scrapy.Field()
-    last_modify_ts = scrapy.Field()  # 最后修改时间戳
+    def item_values(item) -> tuple:
+        """按item_fields的顺序取出各字段的值（未赋值的字段为None）"""
+        return tuple(item.get(name) for name in item.fields)
 
+    def encode_item(item) -> bytes:
+        """编码为JSON（UTF-8，不转义中文）"""
+        if orjson is not None:
+            return orjson.dumps(dict(item))
+        return json.dumps(dict(item), ensure_ascii=False).encode('utf-8')
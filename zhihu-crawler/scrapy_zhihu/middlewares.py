@@ -4,70 +4,477 @@ Scrapy中间件
 """
 import sys
 import os
+import time
 from urllib.parse import urlparse, urlencode
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
 from scrapy.http import Request
-from zhihu_core.sign import sign
-from zhihu_core.utils import convert_str_cookie_to_dict
+from scrapy.spidermiddlewares.base import BaseSpiderMiddleware
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import reactor
+from twisted.internet.task import deferLater
+from twisted.internet.threads import deferToThread
+from zhihu_core.account_pool import get_account_pool
+from zhihu_core.endpoints import endpoint_family
+from zhihu_core.fixtures import FixtureArchive
+from zhihu_core.metrics import by_request, get_metrics, timed
+from zhihu_core.priority import PriorityPolicy
+from zhihu_core.rate_limit import AimdRateController
+from zhihu_core.sign import SignCache, get_signer, close_sign_pool
 from config import zhihu_config
 
 
 class ZhihuCookieMiddleware:
-    """Cookie中间件"""
+    """
+    Cookie中间件：从账号池为请求分配账号
+    每个账号使用独立的Cookie jar和下载槽位，CONCURRENT_REQUESTS_PER_DOMAIN和DOWNLOAD_DELAY
+    按账号生效，总并发随健康账号数量线性扩展；被隔离的账号不再分配请求
+    """
     
-    def __init__(self):
-        self.cookies = convert_str_cookie_to_dict(zhihu_config.COOKIES)
-        self.cookie_str = zhihu_config.COOKIES
-        if not self.cookie_str:
+    def __init__(self, stats=None):
+        self.pool = get_account_pool()
+        self.stats = stats
+        # 已放入Cookie jar的账号
+        self._seeded = set()
+        if not len(self.pool):
             import warnings
-            warnings.warn("Cookie未配置！请在config/zhihu_config.py中设置COOKIES")
+            warnings.warn("Cookie未配置！请在config/zhihu_config.py中设置COOKIES或ACCOUNTS_FILE")
+        self._set_healthy_stats()
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
     
+    @timed('mw.cookie', by_request)
     def process_request(self, request, spider):
         """处理请求，添加Cookie"""
-        if self.cookie_str:
-            request.headers['Cookie'] = self.cookie_str
-            # 同时设置cookies参数（Scrapy会自动处理）
-            request.cookies = self.cookies
-        else:
+        account = self.pool.get(request.meta.get('zhihu_account', ''))
+        if account is None or not account.is_healthy(time.time()):
+            account = self.pool.acquire()
+        if account is None:
             spider.logger.warning("Cookie未配置，请求可能被拒绝")
+            return None
+        
+        request.meta['zhihu_account'] = account.name
+        request.meta['cookiejar'] = account.name
+        request.meta['download_slot'] = f"zhihu-{account.name}"
+        request.headers['Cookie'] = account.cookie_str
+        if account.name in self._seeded and not account.warmup_cookies:
+            # 该账号的Cookie jar已有Cookie，由jar附加到请求并按响应更新；
+            # 清掉换账号重试时从原请求复制来的Cookie，避免混入其他账号的jar
+            request.cookies = {}
+            return None
+        # 账号Cookie（以及缓存的预热Cookie）只随该账号的第一个请求放入jar：按.zhihu.com和路径/保存，
+        # 所有知乎域名和路径共用一份。每个请求都带上cookies参数时，Scrapy会按请求路径各存一份，
+        # jar随URL数量增长，每次匹配Cookie的开销也随之增长。
+        # 账号自身的Cookie排在预热Cookie后面，同名时优先
+        request.cookies = account.warmup_cookies + [
+            {'name': name, 'value': value, 'domain': '.zhihu.com', 'path': '/'}
+            for name, value in account.cookies.items()
+        ]
+        account.warmup_cookies = []
+        self._seeded.add(account.name)
         return None
+    
+    def process_response(self, request, response, spider):
+        """记录账号健康状况，403时换一个健康账号重试"""
+        account = self.pool.get(request.meta.get('zhihu_account', ''))
+        if account is None:
+            return response
+        
+        if self.pool.report(account, response.status):
+            spider.logger.warning(
+                f"[ZhihuCookieMiddleware] 账号 {account.name} 连续返回403，"
+                f"隔离 {self.pool.quarantine_seconds} 秒，剩余健康账号: {self.pool.healthy_count()}"
+            )
+            self._inc_stats('zhihu/accounts/quarantined')
+            self._set_healthy_stats()
+        
+        if response.status == 403:
+            self._inc_stats(f'zhihu/accounts/{account.name}/forbidden')
+            retries = request.meta.get('zhihu_account_retries', 0)
+            if zhihu_config.ACCOUNT_RETRY_FORBIDDEN and retries < len(self.pool) - 1:
+                other = self.pool.acquire(exclude=account.name)
+                if other is not None and other is not account and other.is_healthy(time.time()):
+                    spider.logger.info(f"[ZhihuCookieMiddleware] 账号 {account.name} 返回403，改用 {other.name} 重试")
+                    self._inc_stats('zhihu/accounts/forbidden_retry')
+                    retry_request = request.replace(dont_filter=True)
+                    retry_request.meta['zhihu_account'] = other.name
+                    retry_request.meta['zhihu_account_retries'] = retries + 1
+                    return retry_request
+        return response
+    
+    def _set_healthy_stats(self):
+        if self.stats is not None:
+            self.stats.set_value('zhihu/accounts/healthy', self.pool.healthy_count())
+    
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
 
 
 class ZhihuSignMiddleware:
-    """知乎API签名中间件"""
+    """知乎API签名中间件，使用ZhihuCookieMiddleware分配的账号的d_c0签名"""
     
-    def __init__(self):
-        self.cookies = convert_str_cookie_to_dict(zhihu_config.COOKIES)
-        self.cookie_str = zhihu_config.COOKIES
+    def __init__(self, stats=None):
+        self.pool = get_account_pool()
+        self.stats = stats
+        # 签名器：node为常驻Node进程池（worker数量默认按CPU核数设置），python为纯Python实现
+        self.sign_engine = zhihu_config.SIGN_ENGINE
+        self.signer = get_signer(self.sign_engine, zhihu_config.SIGN_WORKER_NUM or None)
+        # 签名缓存，重试和重复分页请求直接复用已有签名
+        self.sign_cache = None
+        if zhihu_config.SIGN_CACHE_SIZE > 0:
+            self.sign_cache = SignCache(zhihu_config.SIGN_CACHE_SIZE, zhihu_config.SIGN_CACHE_PATH)
     
-    def process_request(self, request, spider):
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler.stats)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+    
+    def spider_closed(self, spider):
+        """Spider关闭时释放签名进程和缓存"""
+        close_sign_pool()
+        if self.sign_cache is not None:
+            self.sign_cache.close()
+    
+    async def process_request(self, request, spider):
         """处理请求，添加签名"""
+        job = self._prepare_sign(request, spider)
+        if job is not None:
+            # 签名在线程池中执行，多个请求可同时占用不同的签名worker
+            relative_path, account = job
+            await maybe_deferred_to_future(deferToThread(self._sign_request, request, relative_path, account, spider))
+        return None
+    
+    @timed('mw.sign', by_request)
+    def _prepare_sign(self, request, spider):
+        """
+        在当前线程完成不需要签名进程的部分：命中签名缓存或纯Python签名时直接添加签名头
+        Returns:
+            需要在线程池中签名时返回 (相对路径, 账号)，否则返回None
+        """
         # 只对API请求进行签名
-        if '/api/v4/' in request.url or '/api/v5/' in request.url:
-            # 签名需要使用相对路径（不包含域名）
-            parsed = urlparse(request.url)
-            # 构建相对路径：路径 + 查询参数
-            relative_path = parsed.path
-            if parsed.query:
-                relative_path += '?' + parsed.query
-            
-            # 获取签名
-            try:
-                if not self.cookie_str:
-                    spider.logger.warning(f"[ZhihuSignMiddleware] Cookie为空，无法签名: {request.url}")
-                    return None
-                
-                sign_res = sign(relative_path, self.cookie_str)
-                # 添加签名到请求头
-                request.headers['x-zst-81'] = sign_res.get('x-zst-81', '')
-                request.headers['x-zse-96'] = sign_res.get('x-zse-96', '')
-                spider.logger.debug(f"[ZhihuSignMiddleware] 已为请求添加签名: {relative_path[:100]}")
-            except Exception as e:
-                spider.logger.error(f"[ZhihuSignMiddleware] 签名失败: {e}, URL: {relative_path[:100]}")
+        if '/api/v4/' not in request.url and '/api/v5/' not in request.url:
+            return None
+        account = self.pool.get(request.meta.get('zhihu_account', ''))
+        if account is None or not account.cookie_str:
+            spider.logger.warning(f"[ZhihuSignMiddleware] Cookie为空，无法签名: {request.url}")
+            return None
+        
+        # 签名需要使用相对路径（不包含域名）
+        parsed = urlparse(request.url)
+        # 构建相对路径：路径 + 查询参数
+        relative_path = parsed.path
+        if parsed.query:
+            relative_path += '?' + parsed.query
+        
+        if self.sign_cache is not None:
+            sign_res = self.sign_cache.get(relative_path, account.d_c0)
+            if sign_res is not None:
+                self._inc_stats('zhihu/sign_cache/hit')
+                self._apply_sign(request, sign_res)
+                return None
+            self._inc_stats('zhihu/sign_cache/miss')
+        
+        if self.sign_engine == 'python':
+            # 纯Python签名耗时很短，直接在当前线程完成
+            self._sign_request(request, relative_path, account, spider)
+            return None
+        return relative_path, account
+    
+    @timed('sign', by_request)
+    def _sign_request(self, request, relative_path, account, spider):
+        """为请求添加签名头"""
+        # 获取签名
+        try:
+            sign_res = self.signer.sign(relative_path, account.cookie_str)
+            if self.sign_cache is not None:
+                self.sign_cache.put(relative_path, account.d_c0, sign_res)
+            self._apply_sign(request, sign_res)
+            spider.logger.debug(f"[ZhihuSignMiddleware] 已为请求添加签名: {relative_path[:100]}")
+        except Exception as e:
+            spider.logger.error(f"[ZhihuSignMiddleware] 签名失败: {e}, URL: {relative_path[:100]}")
+        
+        return None
+    
+    @staticmethod
+    def _apply_sign(request, sign_res):
+        """添加签名到请求头"""
+        request.headers['x-zst-81'] = sign_res.get('x-zst-81', '')
+        request.headers['x-zse-96'] = sign_res.get('x-zse-96', '')
+    
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
+
+
+class ZhihuRateLimitMiddleware:
+    """
+    自适应限速中间件，替代固定的DOWNLOAD_DELAY/AutoThrottle
+    按接口族和账号用令牌桶排队发出请求，速率根据403/429和响应耗时按AIMD调整。
+    优先级需高于RetryMiddleware(550)，才能在重试之前看到原始的429/5xx响应
+    """
+    
+    def __init__(self, stats=None):
+        self.stats = stats
+        self.controller = AimdRateController(
+            zhihu_config.RATE_LIMIT_INITIAL,
+            min_rate=zhihu_config.RATE_LIMIT_MIN,
+            max_rate=zhihu_config.RATE_LIMIT_MAX,
+            increase=zhihu_config.RATE_LIMIT_INCREASE,
+            decrease=zhihu_config.RATE_LIMIT_DECREASE,
+            latency_target=zhihu_config.RATE_LIMIT_LATENCY_TARGET,
+            burst=zhihu_config.RATE_LIMIT_BURST,
+        )
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not zhihu_config.RATE_LIMIT_ENABLED:
+            raise NotConfigured
+        return cls(crawler.stats)
+    
+    async def process_request(self, request, spider):
+        """取令牌，令牌不足时延迟到可发送时刻"""
+        wait = self._reserve(request)
+        if wait > 0:
+            await maybe_deferred_to_future(deferLater(reactor, wait, lambda: None))
+        return None
+    
+    @timed('mw.ratelimit', by_request)
+    def _reserve(self, request) -> float:
+        """按接口族和账号预约令牌，返回需要等待的秒数"""
+        family = endpoint_family(urlparse(request.url).path)
+        request.meta['zhihu_rate_family'] = family
+        wait = self.controller.bucket(family, request.meta.get('zhihu_account', '')).reserve()
+        if wait > 0:
+            self._inc_stats(f'zhihu/ratelimit/{family}/throttled')
+            self._inc_stats(f'zhihu/ratelimit/{family}/throttle_seconds', wait)
+        return wait
+    
+    def process_response(self, request, response, spider):
+        """根据响应调整速率"""
+        family = request.meta.get('zhihu_rate_family')
+        if family is None:
+            return response
         
+        retry_after = None
+        if response.status == 429:
+            value = response.headers.get('Retry-After', b'').decode('latin-1').strip()
+            if value.isdigit():
+                retry_after = float(value)
+        
+        result = self.controller.on_response(
+            family, request.meta.get('zhihu_account', ''), response.status,
+            request.meta.get('download_latency', 0.0), retry_after
+        )
+        if result == 'decrease':
+            self._inc_stats(f'zhihu/ratelimit/{family}/decrease')
+            spider.logger.info(
+                f"[ZhihuRateLimitMiddleware] {family} 响应{response.status}，"
+                f"速率降至 {self.controller.family_rates()[family]:.3f}/s"
+            )
+        self._set_rate_stats(family)
+        return response
+    
+    def process_exception(self, request, exception, spider):
+        """下载超时等异常按服务端过载处理"""
+        family = request.meta.get('zhihu_rate_family')
+        if family is not None:
+            if self.controller.on_response(family, request.meta.get('zhihu_account', ''), 504, 0.0) == 'decrease':
+                self._inc_stats(f'zhihu/ratelimit/{family}/decrease')
+            self._set_rate_stats(family)
         return None
+    
+    def _set_rate_stats(self, family):
+        if self.stats is not None:
+            self.stats.set_value(f'zhihu/ratelimit/{family}/rate', round(self.controller.family_rates()[family], 3))
+    
+    def _inc_stats(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+
+class ZhihuFixtureRecorderMiddleware:
+    """
+    录制中间件：把下载到的原始响应保存到FIXTURE_RECORD_PATH，供离线回放和基准测试使用
+    优先级需高于HttpCompressionMiddleware(590)和RedirectMiddleware(600)，录制未解压的原始响应，
+    回放时响应会重新经过完整的中间件链
+    """
+    
+    def __init__(self, archive: FixtureArchive, stats=None):
+        self.archive = archive
+        self.stats = stats
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not zhihu_config.FIXTURE_RECORD_PATH:
+            raise NotConfigured
+        archive = FixtureArchive(zhihu_config.FIXTURE_RECORD_PATH)
+        # 记录爬取目标，回放基准测试按相同目标运行
+        archive.set_meta('creator_urls', zhihu_config.ZHIHU_CREATOR_URL_LIST)
+        archive.set_meta('detail_urls', zhihu_config.ZHIHU_SPECIFIED_ID_LIST)
+        middleware = cls(archive, crawler.stats)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+    
+    def spider_closed(self, spider):
+        self.archive.close()
+    
+    def process_response(self, request, response, spider):
+        headers = {
+            key.decode('latin-1'): [value.decode('latin-1') for value in values]
+            for key, values in response.headers.items()
+        }
+        self.archive.put(request.method, request.url, response.status, headers, response.body)
+        if self.stats is not None:
+            self.stats.inc_value('zhihu/fixtures/recorded')
+        return response
+
+
+class ZhihuCallbackTimerMiddleware:
+    """
+    爬虫中间件：统计每个回调的耗时和产出条数，按响应对应的接口归类
+    回调是生成器，按next()逐段计时；优先级应最接近爬虫，计时不含其他爬虫中间件。
+    回调执行期间设置current_endpoint，解码、字段提取等阶段据此归类
+    """
+    
+    def __init__(self):
+        self.metrics = get_metrics()
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not zhihu_config.METRICS_ENABLED:
+            raise NotConfigured
+        return cls()
+    
+    def process_spider_output(self, response, result, spider):
+        endpoint = by_request(self, response.request) if response.request is not None else 'page'
+        metrics = self.metrics
+        elapsed = 0.0
+        items = 0
+        iterator = iter(result)
+        try:
+            while True:
+                metrics.current_endpoint = endpoint
+                start = time.perf_counter()
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                if not isinstance(value, Request):
+                    items += 1
+                yield value
+        finally:
+            metrics.observe('callback', endpoint, elapsed)
+            metrics.count_items(endpoint, items)
+    
+    async def process_spider_output_async(self, response, result, spider):
+        # 上游产出异步生成器时走这里，计时方式相同
+        endpoint = by_request(self, response.request) if response.request is not None else 'page'
+        metrics = self.metrics
+        elapsed = 0.0
+        items = 0
+        iterator = result.__aiter__()
+        try:
+            while True:
+                metrics.current_endpoint = endpoint
+                start = time.perf_counter()
+                try:
+                    value = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                if not isinstance(value, Request):
+                    items += 1
+                yield value
+        finally:
+            metrics.observe('callback', endpoint, elapsed)
+            metrics.count_items(endpoint, items)
 
+
+class ZhihuPriorityMiddleware(BaseSpiderMiddleware):
+    """
+    爬虫中间件：按PriorityPolicy为爬虫产出的请求设置优先级
+    请求的所属创作者（zhihu_owner）和档内排序（zhihu_rank）从产生它的响应继承，
+    一级评论请求的排序按meta中的zhihu_content（所属内容的发布时间、赞同数）计算
+    """
+    
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self.policy = PriorityPolicy(
+            zhihu_config.REQUEST_PRIORITIES, zhihu_config.COMMENT_PRIORITY_ORDER, zhihu_config.CREATOR_FAIR_SHARE
+        )
+        self.stats = crawler.stats
+        crawler.signals.connect(self._request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(self._request_dequeued, signal=signals.request_dropped)
+        crawler.signals.connect(self._request_dequeued, signal=signals.request_reached_downloader)
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not zhihu_config.PRIORITY_ENABLED:
+            raise NotConfigured
+        return cls(crawler)
+    
+    def get_processed_request(self, request, response):
+        meta = request.meta
+        parent = response.meta if response is not None else {}
+        owner = meta.setdefault('zhihu_owner', meta.get('user_url_token') or parent.get('zhihu_owner', ''))
+        if 'zhihu_rank' not in meta:
+            if 'zhihu_content' in meta:
+                meta['zhihu_rank'] = self.policy.content_rank(*meta['zhihu_content'])
+            else:
+                meta['zhihu_rank'] = parent.get('zhihu_rank', 0)
+        
+        penalty = self.policy.penalty(owner)
+        if penalty:
+            self.stats.inc_value('zhihu/priority/fair_share_demoted')
+        request.priority = self.policy.priority(by_request(self, request), meta['zhihu_rank'], owner)
+        return request
+    
+    def _request_scheduled(self, request, spider):
+        self.policy.request_queued(request.meta.get('zhihu_owner', ''))
+    
+    def _request_dequeued(self, request, spider):
+        self.policy.request_dequeued(request.meta.get('zhihu_owner', ''))
+
+
+class ZhihuFrontierMiddleware(BaseSpiderMiddleware):
+    """
+    爬虫中间件（多进程模式）：记录共享请求在本进程产生的请求，
+    所有这些请求的回调执行完后，调度器才确认共享请求完成
+    """
+    
+    def get_processed_request(self, request, response):
+        if response is None or request.meta.get('frontier_shared'):
+            return request
+        unit = response.meta.get('frontier_unit') or response.meta.get('frontier_id')
+        if unit and 'frontier_unit' not in request.meta:
+            request.meta['frontier_unit'] = unit
+            self._scheduler().request_opened(request)
+        return request
+    
+    # *args：Scrapy 2.19之前的版本还会传入spider参数
+    def process_spider_output(self, response, result, *args):
+        try:
+            yield from super().process_spider_output(response, result, *args)
+        finally:
+            self._scheduler().request_finished(response.request)
+    
+    async def process_spider_output_async(self, response, result, *args):
+        try:
+            async for o in super().process_spider_output_async(response, result, *args):
+                yield o
+        finally:
+            self._scheduler().request_finished(response.request)
+    
+    def _scheduler(self):
+        return self.crawler.engine.scheduler
@@ -3,35 +3,449 @@
 数据存储Pipeline
 """
 import csv
+import gzip
+import hashlib
 import json
+import logging
 import os
+import queue
+import sqlite3
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
-from itemadapter import ItemAdapter
-from scrapy_zhihu.items import ZhihuContentItem, ZhihuCommentItem, ZhihuCreatorItem
+from scrapy import signals
+from scrapy.exceptions import DropItem
+from scrapy.utils.misc import load_object
+from twisted.internet.defer import Deferred
+from scrapy_zhihu.items import (
+    ZhihuContentItem, ZhihuCommentItem, ZhihuCommentTreeItem, ZhihuCreatorItem, encode_item, item_fields, item_values,
+)
+from zhihu_core.metrics import by_item, timed
 from config import zhihu_config
 
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstd压缩为可选依赖
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet输出为可选依赖
+    pa = None
+    pq = None
+
+
+logger = logging.getLogger(__name__)
+
+# 自定义信号：存储Pipeline把此前接收的数据写入磁盘后发出，去重索引在此时提交对应的摘要
+storage_flushed = object()
+
+
+def _dumps_line(record) -> bytes:
+    """序列化为一行JSON（dict或Item，Item直接按字段编码）"""
+    if not isinstance(record, dict):
+        return encode_item(record) + b"\n"
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class JsonlWriter:
+    """
+    JSON Lines流式写入器：带缓冲写入，按时间间隔flush并fsync，支持gzip/zstd压缩
+    Args:
+        path: 输出文件路径
+        compression: 压缩方式，"" | "gzip" | "zstd"
+        fsync_interval: fsync间隔（秒）
+    """
+    
+    BUFFER_SIZE = 1 << 20
+    
+    def __init__(self, path: Path, compression: str = "", fsync_interval: float = 5.0):
+        self.path = path
+        self.compression = compression
+        self.fsync_interval = fsync_interval
+        self._raw = open(path, 'wb', buffering=self.BUFFER_SIZE)
+        if compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6)
+        elif compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("zstd压缩需要安装zstandard: pip install zstandard")
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self._last_sync = time.monotonic()
+    
+    def write(self, record):
+        """写入一条记录（dict或Item），距上次落盘超过间隔时同步到磁盘"""
+        self._stream.write(_dumps_line(record))
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self):
+        """把压缩流和文件缓冲刷到磁盘，崩溃时已写入的数据可以完整读出"""
+        if self.compression == 'gzip':
+            self._stream.flush()
+        elif self.compression == 'zstd':
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._last_sync = time.monotonic()
+    
+    def close(self):
+        """关闭文件"""
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+
+# 整数列，其余列按TEXT存储
+_INTEGER_FIELDS = {
+    'created_time', 'updated_time', 'voteup_count', 'comment_count', 'publish_time',
+    'sub_comment_count', 'like_count', 'dislike_count', 'follows', 'fans', 'anwser_count',
+    'video_count', 'question_count', 'article_count', 'column_count', 'get_voteup_count',
+    'root_count', 'max_depth', 'truncated', 'last_modify_ts',
+}
+
+# 数据类型 -> Item类
+_ITEM_TYPES = {
+    'contents': ZhihuContentItem,
+    'comments': ZhihuCommentItem,
+    'creators': ZhihuCreatorItem,
+    'comment_trees': ZhihuCommentTreeItem,
+}
+_ITEM_TABLES = {item_cls: item_type for item_type, item_cls in _ITEM_TYPES.items()}
+
+# 评论树的tree列在表格格式中存为JSON字符串
+_TREE_COLUMN = list(item_fields(ZhihuCommentTreeItem)).index('tree')
+
+# SQLite表名 -> 主键列
+_SQLITE_PRIMARY_KEYS = {
+    'contents': ('content_type', 'content_id'),
+    'comments': ('comment_id',),
+    'creators': ('user_id',),
+    'comment_trees': ('content_type', 'content_id'),
+}
+
+
+def _item_columns(item_cls) -> List[str]:
+    """Item字段列表，即表格格式的列（item_values按同样的顺序取值）"""
+    return list(item_fields(item_cls))
+
+
+class SqliteWriter:
+    """
+    SQLite存储：WAL模式，每种数据一张表，按主键upsert，攒批提交
+    Args:
+        db_path: 数据库文件路径
+        batch_size: 每批最多缓存的条数
+        commit_interval: 最长提交间隔（秒）
+        on_flush: 每次提交后调用的回调（无参数）
+    """
+    
+    def __init__(self, db_path: Path, batch_size: int = 500, commit_interval: float = 5.0, on_flush=None):
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.on_flush = on_flush
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        
+        self._upsert_sql: Dict[str, str] = {}
+        self._buffers: Dict[str, List[tuple]] = {}
+        for table, item_cls in _ITEM_TYPES.items():
+            primary_key = _SQLITE_PRIMARY_KEYS[table]
+            columns = _item_columns(item_cls)
+            self._buffers[table] = []
+            self._create_table(table, columns, primary_key)
+            self._upsert_sql[table] = self._build_upsert_sql(table, columns, primary_key)
+        self.conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+    
+    def _create_table(self, table: str, columns: List[str], primary_key: tuple):
+        column_defs = [
+            f"{col} {'INTEGER' if col in _INTEGER_FIELDS else 'TEXT'}" + (" NOT NULL" if col in primary_key else "")
+            for col in columns
+        ]
+        column_defs.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(column_defs)})")
+    
+    @staticmethod
+    def _build_upsert_sql(table: str, columns: List[str], primary_key: tuple) -> str:
+        updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col not in primary_key)
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT({', '.join(primary_key)}) DO UPDATE SET {updates}"
+        )
+    
+    def write(self, table: str, row: tuple):
+        """缓存一行（按_item_columns的列顺序），满批或超时后统一提交"""
+        self._buffers[table].append(row)
+        self._pending += 1
+        if self._pending >= self.batch_size or time.monotonic() - self._last_commit >= self.commit_interval:
+            self.flush()
+    
+    def flush(self):
+        """在一个事务中写入所有缓存的记录"""
+        if self._pending:
+            with self.conn:
+                for table, rows in self._buffers.items():
+                    if rows:
+                        self.conn.executemany(self._upsert_sql[table], rows)
+                        rows.clear()
+            self._pending = 0
+            if self.on_flush is not None:
+                self.on_flush()
+        self._last_commit = time.monotonic()
+    
+    def close(self):
+        """提交剩余数据并关闭连接"""
+        self.flush()
+        self.conn.close()
+
+
+class CsvWriterThread(threading.Thread):
+    """
+    CSV后台写入线程：从有界队列取出行，按数据类型攒批后用writerows写入，
+    避免磁盘IO阻塞Twisted reactor线程
+    Args:
+        csv_files: 数据类型 -> 已打开的CSV文件
+        columns: 数据类型 -> 表头（行按同样的顺序排列）
+        queue_size: 队列容量，写满后由Pipeline施加背压
+        batch_size: 每批最多写入的行数
+        low_water: 背压解除的水位，写入线程把队列消化到该行数以下时通知等待的Pipeline（默认为容量的一半）
+        on_written: 每批写入后在reactor线程中调用的回调，参数为累计写入的行数
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, csv_files: Dict, columns: Dict[str, List[str]], queue_size: int = 10000,
+                 batch_size: int = 500, low_water: int = None, on_written=None):
+        super().__init__(name="zhihu-csv-writer", daemon=True)
+        self.csv_files = csv_files
+        self.columns = columns
+        self.csv_writers = {}
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.low_water = queue_size // 2 if low_water is None else low_water
+        self.on_written = on_written
+        # 在主线程中取得已安装的reactor，写入线程通过它的callFromThread回到reactor线程
+        from twisted.internet import reactor
+        self._reactor = reactor
+        
+        # 队列写满时等待的Deferred，由写入线程通过reactor.callFromThread触发
+        self._waiters: List[Deferred] = []
+        self._waiters_lock = threading.Lock()
+        
+        # 写入统计（仅由写入线程更新）
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+    
+    def put(self, item_type: str, row: tuple):
+        """
+        提交一行；队列已满时返回Deferred，写入线程把队列消化到低水位以下后触发并重新提交，
+        等待期间不占用reactor线程池
+        """
+        try:
+            self.queue.put_nowait((item_type, row))
+            return None
+        except queue.Full:
+            pass
+        
+        waiter = Deferred()
+        with self._waiters_lock:
+            # 持锁再检查一次：写入线程可能已经把队列取到低水位以下，不会再来唤醒
+            drained = self.queue.qsize() <= self.low_water
+            if not drained:
+                self._waiters.append(waiter)
+        if drained:
+            waiter.callback(None)
+        return waiter.addCallback(lambda _: self.put(item_type, row))
+    
+    def _release_waiters(self):
+        """写入线程中调用：队列低于低水位时唤醒等待的Pipeline"""
+        with self._waiters_lock:
+            if not self._waiters or self.queue.qsize() > self.low_water:
+                return
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            self._reactor.callFromThread(waiter.callback, None)
+    
+    def run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._release_waiters()
+            if batch[-1] is self._STOP:
+                batch.pop()
+                stopping = True
+            if batch:
+                self._write_batch(batch)
+    
+    def _write_batch(self, batch):
+        """按数据类型分组写入一批记录"""
+        start = time.perf_counter()
+        grouped: Dict[str, List[tuple]] = {}
+        for item_type, row in batch:
+            grouped.setdefault(item_type, []).append(row)
+        
+        for item_type, rows in grouped.items():
+            if item_type not in self.csv_files:
+                continue
+            writer = self.csv_writers.get(item_type)
+            if writer is None:
+                # 第一次写入，创建writer并写入表头
+                writer = csv.writer(self.csv_files[item_type])
+                writer.writerow(self.columns[item_type])
+                self.csv_writers[item_type] = writer
+            try:
+                writer.writerows(rows)
+            except csv.Error:
+                # 出错时逐行写入，只丢弃出错的行
+                for row in rows:
+                    try:
+                        writer.writerow(row)
+                    except csv.Error as e:
+                        logger.error(f"[CsvWriterThread] 写入{item_type}失败: {e}")
+            self.csv_files[item_type].flush()
+        
+        elapsed = time.perf_counter() - start
+        self.rows_written += len(batch)
+        self.batches_written += 1
+        self.write_seconds += elapsed
+        self.max_write_seconds = max(self.max_write_seconds, elapsed)
+        if self.on_written is not None:
+            self._reactor.callFromThread(self.on_written, self.rows_written)
+    
+    def close(self):
+        """写完队列中剩余的记录后退出线程"""
+        self.queue.put(self._STOP)
+        self.join()
+
+
+def _to_int(value):
+    """整数列取值：数字字符串转int，无法转换的按空值处理"""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ParquetWriter:
+    """
+    Parquet列式存储：按Item定义生成固定schema，按列缓存，攒满一个row group后写入，zstd压缩
+    Args:
+        path: 输出文件路径
+        item_cls: Item类，用于生成schema
+        row_group_size: 每个row group的行数
+    """
+    
+    def __init__(self, path: Path, item_cls, row_group_size: int = 50000):
+        if pa is None:
+            raise RuntimeError("Parquet输出需要安装pyarrow: pip install pyarrow")
+        self.row_group_size = row_group_size
+        self.columns = _item_columns(item_cls)
+        self._int_columns = {col for col in self.columns if col in _INTEGER_FIELDS}
+        self.schema = pa.schema([
+            (col, pa.int64() if col in self._int_columns else pa.string()) for col in self.columns
+        ])
+        self._buffers: List[list] = [[] for _ in self.columns]
+        self._is_int = [col in self._int_columns for col in self.columns]
+        self._rows = 0
+        self._writer = pq.ParquetWriter(str(path), self.schema, compression='zstd')
+    
+    def write(self, row: tuple):
+        """按列缓存一行（按_item_columns的列顺序），满一个row group时写入"""
+        for values, value, is_int in zip(self._buffers, row, self._is_int):
+            if is_int:
+                value = _to_int(value)
+            elif value is not None and not isinstance(value, str):
+                value = str(value)
+            values.append(value)
+        self._rows += 1
+        if self._rows >= self.row_group_size:
+            self.flush()
+    
+    def flush(self):
+        """把缓存的行写成一个row group"""
+        if not self._rows:
+            return
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(self._buffers, self.schema)],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+        for values in self._buffers:
+            values.clear()
+        self._rows = 0
+    
+    def close(self):
+        """写入剩余数据并关闭文件"""
+        self.flush()
+        self._writer.close()
+
 
 class ZhihuPipeline:
     """知乎数据存储Pipeline"""
     
-    def __init__(self):
+    def __init__(self, stats=None):
         self.save_option = zhihu_config.SAVE_DATA_OPTION
         self.data_dir = Path("data/zhihu")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = stats
+        
+        # 数据写入磁盘后通知的回调（无参数）：调用时此前交给存储的数据均已落盘
+        self.flush_listeners = []
         
-        # CSV文件句柄
+        # CSV文件句柄及后台写入线程，已放入写入队列的行数
         self.csv_files = {}
-        self.csv_writers = {}
+        self.csv_thread = None
+        self.csv_rows = 0
         
         # JSON数据缓存
         self.json_data = {
             'contents': [],
             'comments': [],
-            'creators': []
+            'creators': [],
+            'comment_trees': []
         }
+        
+        # JSONL流式写入器，上次全部落盘的时间
+        self.jsonl_writers = {}
+        self._jsonl_synced = 0.0
+        
+        # SQLite写入器
+        self.sqlite_writer = None
+        
+        # Parquet写入器
+        self.parquet_writers = {}
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(crawler.stats)
+        pipeline.flush_listeners.append(lambda: crawler.signals.send_catch_log(signal=storage_flushed))
+        return pipeline
     
     def open_spider(self, spider):
         """Spider启动时调用"""
@@ -39,6 +453,12 @@ class ZhihuPipeline:
             self._init_csv_files()
         elif self.save_option == 'json':
             self._init_json_files()
+        elif self.save_option == 'jsonl':
+            self._init_jsonl_files()
+        elif self.save_option == 'sqlite':
+            self._init_sqlite()
+        elif self.save_option == 'parquet':
+            self._init_parquet_files()
     
     def close_spider(self, spider):
         """Spider关闭时调用"""
@@ -46,49 +466,66 @@ class ZhihuPipeline:
             self._close_csv_files()
         elif self.save_option == 'json':
             self._save_json_files()
+        elif self.save_option == 'jsonl':
+            self._close_jsonl_files()
+        elif self.save_option == 'sqlite':
+            self.sqlite_writer.close()
+        elif self.save_option == 'parquet':
+            self._close_parquet_files()
+        # JSON和Parquet只在关闭时才是完整的文件
+        self._flushed()
+    
+    def _flushed(self):
+        """通知此前接收的数据已经落盘"""
+        for listener in self.flush_listeners:
+            listener()
     
+    @timed('pipeline.save', by_item)
     def process_item(self, item, spider):
-        """处理item"""
-        import time
-        adapter = ItemAdapter(item)
-        item_dict = dict(adapter)
+        """处理item：直接按字段取值或编码，不再复制出一份dict"""
+        item_type = _ITEM_TABLES.get(type(item))
+        if item_type is None:
+            return item
         
         # 添加时间戳（13位毫秒时间戳）
-        item_dict['last_modify_ts'] = int(time.time() * 1000)
+        item['last_modify_ts'] = int(time.time() * 1000)
         
         # 确保source_keyword字段存在（creator/detail模式为空）
-        if isinstance(item, ZhihuContentItem) and 'source_keyword' not in item_dict:
-            item_dict['source_keyword'] = ''
-        
-        if isinstance(item, ZhihuContentItem):
-            self._save_content(item_dict)
-        elif isinstance(item, ZhihuCommentItem):
-            self._save_comment(item_dict)
-        elif isinstance(item, ZhihuCreatorItem):
-            self._save_creator(item_dict)
+        if item_type == 'contents' and 'source_keyword' not in item:
+            item['source_keyword'] = ''
         
+        deferred = self._save(item_type, item)
+        if deferred is not None:
+            # CSV写入队列已满：等队列腾出空间后再放行该item（背压）
+            deferred.addCallback(lambda _: item)
+            return deferred
         return item
     
-    def _save_content(self, item_dict: Dict):
-        """保存内容"""
-        if self.save_option == 'csv':
-            self._write_csv('contents', item_dict)
-        elif self.save_option == 'json':
-            self.json_data['contents'].append(item_dict)
-    
-    def _save_comment(self, item_dict: Dict):
-        """保存评论"""
-        if self.save_option == 'csv':
-            self._write_csv('comments', item_dict)
-        elif self.save_option == 'json':
-            self.json_data['comments'].append(item_dict)
-    
-    def _save_creator(self, item_dict: Dict):
-        """保存创作者"""
+    def _save(self, item_type: str, item):
+        """
+        保存一条数据：JSON/JSONL直接编码（评论树保留嵌套结构），
+        表格格式按列顺序取出一行，交给后台线程的是不可变的tuple
+        """
+        if self.save_option == 'json':
+            self.json_data[item_type].append(item)
+            return None
+        elif self.save_option == 'jsonl':
+            self.jsonl_writers[item_type].write(item)
+            if time.monotonic() - self._jsonl_synced >= zhihu_config.JSONL_FSYNC_INTERVAL:
+                self._sync_jsonl_files()
+            return None
+        
+        row = item_values(item)
+        if item_type == 'comment_trees':
+            tree = json.dumps(row[_TREE_COLUMN] or [], ensure_ascii=False)
+            row = row[:_TREE_COLUMN] + (tree,) + row[_TREE_COLUMN + 1:]
         if self.save_option == 'csv':
-            self._write_csv('creators', item_dict)
-        elif self.save_option == 'json':
-            self.json_data['creators'].append(item_dict)
+            return self._write_csv(item_type, row)
+        elif self.save_option == 'sqlite':
+            self.sqlite_writer.write(item_type, row)
+        elif self.save_option == 'parquet':
+            self.parquet_writers[item_type].write(row)
+        return None
     
     def _init_csv_files(self):
         """初始化CSV文件"""
@@ -96,31 +533,67 @@ class ZhihuPipeline:
         csv_dir = self.data_dir / "csv"
         csv_dir.mkdir(parents=True, exist_ok=True)
         
-        for item_type in ['contents', 'comments', 'creators']:
+        for item_type in _ITEM_TYPES:
             file_path = csv_dir / f"{item_type}_{timestamp}.csv"
             self.csv_files[item_type] = open(file_path, 'w', newline='', encoding='utf-8-sig')
-            self.csv_writers[item_type] = None  # 延迟初始化，需要知道字段名
+        
+        columns = {item_type: _item_columns(item_cls) for item_type, item_cls in _ITEM_TYPES.items()}
+        self.csv_thread = CsvWriterThread(
+            self.csv_files, columns, zhihu_config.CSV_WRITER_QUEUE_SIZE, zhihu_config.CSV_WRITER_BATCH_SIZE,
+            on_written=self._csv_written,
+        )
+        self.csv_thread.start()
     
-    def _write_csv(self, item_type: str, item_dict: Dict):
-        """写入CSV"""
+    def _write_csv(self, item_type: str, row: tuple):
+        """把一行交给CSV写入线程，队列已满时返回Deferred"""
         if item_type not in self.csv_files:
-            return
-        
-        writer = self.csv_writers.get(item_type)
-        if writer is None:
-            # 第一次写入，创建writer并写入表头
-            writer = csv.DictWriter(self.csv_files[item_type], fieldnames=item_dict.keys())
-            writer.writeheader()
-            self.csv_writers[item_type] = writer
+            return None
         
-        writer.writerow(item_dict)
+        deferred = self.csv_thread.put(item_type, row)
+        if deferred is None:
+            self.csv_rows += 1
+        else:
+            deferred.addCallback(self._csv_queued)
+        if self.stats is not None:
+            depth = self.csv_thread.queue.qsize()
+            self.stats.set_value('zhihu/csv_writer/queue_depth', depth)
+            self.stats.max_value('zhihu/csv_writer/queue_depth_max', depth)
+            if deferred is not None:
+                self.stats.inc_value('zhihu/csv_writer/backpressure')
+        return deferred
+    
+    def _csv_queued(self, _):
+        """背压等待结束，该行已放入写入队列"""
+        self.csv_rows += 1
+    
+    def _csv_written(self, rows_written: int):
+        """写入线程写完一批：放入队列的行全部写完时视为落盘"""
+        if rows_written == self.csv_rows:
+            self._flushed()
     
     def _close_csv_files(self):
-        """关闭CSV文件"""
+        """等待写入线程写完后关闭CSV文件"""
+        if self.csv_thread is not None:
+            self.csv_thread.close()
+            self._record_csv_stats()
         for f in self.csv_files.values():
             if f:
                 f.close()
     
+    def _record_csv_stats(self):
+        """记录CSV写入批次和耗时"""
+        if self.stats is None:
+            return
+        thread = self.csv_thread
+        self.stats.set_value('zhihu/csv_writer/rows', thread.rows_written)
+        self.stats.set_value('zhihu/csv_writer/batches', thread.batches_written)
+        if thread.batches_written:
+            self.stats.set_value(
+                'zhihu/csv_writer/write_latency_avg_ms', round(thread.write_seconds / thread.batches_written * 1000, 3)
+            )
+        self.stats.set_value('zhihu/csv_writer/write_latency_max_ms', round(thread.max_write_seconds * 1000, 3))
+        self.stats.set_value('zhihu/csv_writer/queue_depth', 0)
+    
     def _init_json_files(self):
         """初始化JSON文件"""
         pass
@@ -135,5 +608,271 @@ class ZhihuPipeline:
             if data:
                 file_path = json_dir / f"{item_type}_{timestamp}.json"
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    json.dump([dict(item) for item in data], f, ensure_ascii=False, indent=2)
+    
+    def _init_jsonl_files(self):
+        """初始化JSONL文件，每种数据一个文件"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        jsonl_dir = self.data_dir / "jsonl"
+        jsonl_dir.mkdir(parents=True, exist_ok=True)
+        
+        compression = zhihu_config.JSONL_COMPRESSION
+        suffix = {'': '.jsonl', 'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}[compression]
+        for item_type in _ITEM_TYPES:
+            file_path = jsonl_dir / f"{item_type}_{timestamp}{suffix}"
+            self.jsonl_writers[item_type] = JsonlWriter(file_path, compression, zhihu_config.JSONL_FSYNC_INTERVAL)
+        self._jsonl_synced = time.monotonic()
+    
+    def _sync_jsonl_files(self):
+        """所有JSONL文件同时落盘"""
+        for writer in self.jsonl_writers.values():
+            writer.sync()
+        self._jsonl_synced = time.monotonic()
+        self._flushed()
+    
+    def _close_jsonl_files(self):
+        """关闭JSONL文件"""
+        for writer in self.jsonl_writers.values():
+            writer.close()
+    
+    def _init_sqlite(self):
+        """初始化SQLite数据库（固定文件，重复爬取时按主键原地更新）"""
+        db_path = Path(zhihu_config.SQLITE_DB_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.sqlite_writer = SqliteWriter(
+            db_path, zhihu_config.SQLITE_BATCH_SIZE, zhihu_config.SQLITE_COMMIT_INTERVAL, on_flush=self._flushed
+        )
+    
+    def _init_parquet_files(self):
+        """初始化Parquet文件，每种数据一个文件"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        parquet_dir = self.data_dir / "parquet"
+        parquet_dir.mkdir(parents=True, exist_ok=True)
+        
+        for item_type, item_cls in _ITEM_TYPES.items():
+            file_path = parquet_dir / f"{item_type}_{timestamp}.parquet"
+            self.parquet_writers[item_type] = ParquetWriter(file_path, item_cls, zhihu_config.PARQUET_ROW_GROUP_SIZE)
+    
+    def _close_parquet_files(self):
+        """关闭Parquet文件"""
+        for writer in self.parquet_writers.values():
+            writer.close()
+
+
+class DedupIndex:
+    """
+    跨运行的去重索引：SQLite中保存每条数据的主键和内容摘要
+    
+    检查时只在内存中暂存摘要；存储Pipeline接收该数据后转为待提交，
+    存储落盘时按批次大小或间隔提交，写入失败或尚未落盘的数据下次运行会重新写出
+    Args:
+        db_path: 索引文件路径
+        ignore_fields: 计算摘要时忽略的字段
+        batch_size: 每批提交的条数
+        commit_interval: 最长提交间隔（秒）
+    """
+    
+    def __init__(self, db_path: Path, ignore_fields=(), batch_size: int = 500, commit_interval: float = 5.0):
+        self.ignore_fields = set(ignore_fields)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        # Item类 -> 各字段是否计入摘要
+        self._masks = {}
+        # 已检查、等待存储Pipeline接收的摘要
+        self._staged: Dict[str, bytes] = {}
+        # 存储Pipeline已接收、等待落盘后提交的摘要
+        self._accepted: Dict[str, bytes] = {}
+        # 与其他运行共用索引文件时等待对方提交，而不是直接报database is locked
+        self.conn = sqlite3.connect(str(db_path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "key TEXT PRIMARY KEY, digest BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.commit()
+        self._last_commit = time.monotonic()
+    
+    def digest(self, item) -> bytes:
+        """计算内容摘要：按字段顺序取值，跳过ignore_fields"""
+        mask = self._masks.get(type(item))
+        if mask is None:
+            mask = self._masks[type(item)] = [name not in self.ignore_fields for name in item_fields(type(item))]
+        values = [value for value, keep in zip(item_values(item), mask) if keep]
+        if orjson is not None:
+            payload = orjson.dumps(values, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
+    def check(self, key: str, item) -> str:
+        """
+        查询一条数据并暂存其摘要
+        Returns:
+            new（首次出现） | changed（内容有变化） | unchanged（与上次相同）
+        """
+        digest = self.digest(item)
+        previous = self._staged.get(key) or self._accepted.get(key)
+        if previous is None:
+            row = self.conn.execute("SELECT digest FROM seen WHERE key = ?", (key,)).fetchone()
+            previous = row[0] if row else None
+        if previous == digest:
+            return 'unchanged'
+        self._staged[key] = digest
+        return 'new' if previous is None else 'changed'
+    
+    def accept(self, key: str):
+        """存储Pipeline已接收该数据，摘要在下次落盘后提交"""
+        digest = self._staged.pop(key, None)
+        if digest is not None:
+            self._accepted[key] = digest
+    
+    def discard(self, key: str):
+        """数据未能保存，丢弃暂存的摘要"""
+        self._staged.pop(key, None)
+    
+    def flushed(self):
+        """存储已落盘：攒满一批或超过提交间隔时提交已接收的摘要"""
+        if len(self._accepted) >= self.batch_size or time.monotonic() - self._last_commit >= self.commit_interval:
+            self.commit()
+    
+    def commit(self):
+        """在一个短事务中提交已接收的摘要"""
+        if self._accepted:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO seen (key, digest) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET digest = excluded.digest",
+                    self._accepted.items(),
+                )
+            self._accepted.clear()
+        self._last_commit = time.monotonic()
+    
+    def close(self):
+        """存储关闭后提交剩余的摘要，未被接收的不登记"""
+        self.commit()
+        self.conn.close()
+
+
+def _dedup_key(item) -> str:
+    """按数据类型生成去重主键，主键缺失时返回空字符串"""
+    if isinstance(item, ZhihuContentItem):
+        if item.get('content_id'):
+            return f"content:{item.get('content_type', '')}:{item['content_id']}"
+    elif isinstance(item, ZhihuCommentItem):
+        if item.get('comment_id'):
+            return f"comment:{item['comment_id']}"
+    elif isinstance(item, ZhihuCreatorItem):
+        if item.get('user_id') or item.get('url_token'):
+            return f"creator:{item.get('user_id') or item.get('url_token')}"
+    elif isinstance(item, ZhihuCommentTreeItem):
+        if item.get('content_id'):
+            return f"comment_tree:{item.get('content_type', '')}:{item['content_id']}"
+    return ''
+
+
+class ZhihuDedupPipeline:
+    """
+    跨运行去重Pipeline，位于ZhihuPipeline之前：
+    与上次运行相比没有变化的数据直接丢弃，只把新增和变化的数据交给存储
+    """
+    
+    def __init__(self, stats=None):
+        self.stats = stats
+        self.index = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(crawler.stats)
+        crawler.signals.connect(pipeline.item_saved, signal=signals.item_scraped)
+        crawler.signals.connect(pipeline.item_failed, signal=signals.item_error)
+        crawler.signals.connect(pipeline.item_failed, signal=signals.item_dropped)
+        crawler.signals.connect(pipeline.storage_flushed, signal=storage_flushed)
+        return pipeline
+    
+    def open_spider(self, spider):
+        if not zhihu_config.DEDUP_ENABLED:
+            return
+        db_path = Path(zhihu_config.DEDUP_DB_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.index = DedupIndex(
+            db_path, zhihu_config.DEDUP_IGNORE_FIELDS, zhihu_config.SQLITE_BATCH_SIZE, zhihu_config.SQLITE_COMMIT_INTERVAL
+        )
+    
+    def close_spider(self, spider):
+        # 存储Pipeline先关闭（Scrapy按相反顺序调用close_spider），此时已接收的数据都已落盘
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+    
+    def item_saved(self, item, **kwargs):
+        """后续Pipeline（存储）已接收该数据"""
+        key = _dedup_key(item) if self.index is not None else ''
+        if key:
+            self.index.accept(key)
+    
+    def item_failed(self, item, **kwargs):
+        """数据在后续Pipeline中被丢弃或出错：不登记，下次运行重新写出"""
+        key = _dedup_key(item) if self.index is not None else ''
+        if key:
+            self.index.discard(key)
+    
+    def storage_flushed(self, **kwargs):
+        if self.index is not None:
+            self.index.flushed()
+    
+    @timed('pipeline.dedup', by_item)
+    def process_item(self, item, spider):
+        if self.index is None:
+            return item
+        key = _dedup_key(item)
+        if not key:
+            return item
+        
+        status = self.index.check(key, item)
+        if self.stats is not None:
+            self.stats.inc_value(f'zhihu/dedup/{status}')
+            self.stats.inc_value(f'zhihu/dedup/{status}/{key.split(":", 1)[0]}')
+        if status == 'unchanged':
+            raise DropItem(f"数据未变化，跳过: {key}", log_level='DEBUG')
+        return item
+
 
+class ZhihuOutboxPipeline:
+    """
+    多进程模式工作进程的Pipeline：数据按批写入frontier的发件箱，
+    由主进程作为唯一写入者经过去重和存储Pipeline保存，工作进程之间不争用输出文件
+    """
+    
+    def __init__(self, frontier_path: str, batch_size: int = 200, flush_interval: float = 1.0):
+        self.frontier_path = frontier_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.frontier = None
+        self.batch = []
+        self.last_flush = 0.0
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.get('ZHIHU_FRONTIER_PATH') or zhihu_config.FRONTIER_DB_PATH)
+    
+    def open_spider(self, spider):
+        self.frontier = load_object(zhihu_config.FRONTIER_BACKEND)(self.frontier_path)
+        self.last_flush = time.monotonic()
+    
+    def close_spider(self, spider):
+        self.flush()
+        self.frontier.close()
+    
+    @timed('pipeline.outbox', by_item)
+    def process_item(self, item, spider):
+        self.batch.append((type(item).__name__, encode_item(item)))
+        if len(self.batch) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+        return item
+    
+    def flush(self):
+        if self.batch:
+            self.frontier.put_items(self.batch)
+            self.batch = []
+        self.last_flush = time.monotonic()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+回放下载处理器：从录制存档返回响应，不访问网络
+
+在settings中配置（或设置FIXTURE_REPLAY_PATH，由settings.py自动启用）:
+    DOWNLOAD_HANDLERS = {
+        'http': 'scrapy_zhihu.replay.ZhihuReplayDownloadHandler',
+        'https': 'scrapy_zhihu.replay.ZhihuReplayDownloadHandler',
+    }
+"""
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from zhihu_core.fixtures import FixtureArchive
+from config import zhihu_config
+
+
+class ZhihuReplayDownloadHandler:
+    """回放下载处理器，未录制的请求返回404"""
+    
+    lazy = False
+    
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.archive = FixtureArchive(zhihu_config.FIXTURE_REPLAY_PATH, readonly=True)
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+    
+    async def download_request(self, request, spider=None):
+        start = time.monotonic()
+        fixture = self.archive.get(request.method, request.url)
+        # 与HTTP下载处理器一致，记录读取存档的耗时
+        request.meta['download_latency'] = time.monotonic() - start
+        stats = self.crawler.stats
+        if fixture is None:
+            stats.inc_value('zhihu/replay/missing')
+            self.crawler.spider.logger.warning(f"[ZhihuReplayDownloadHandler] 存档中没有该请求: {request.url}")
+            return responsetypes.from_args(url=request.url)(url=request.url, status=404, request=request)
+        
+        status, headers, body = fixture
+        headers = Headers(headers)
+        stats.inc_value('zhihu/replay/hit')
+        respcls = responsetypes.from_args(headers=headers, url=request.url, body=body)
+        return respcls(url=request.url, status=status, headers=headers, body=body, request=request)
+    
+    async def close(self):
+        self.archive.close()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+多进程模式的调度器：可共享的请求和去重指纹放在frontier中，各工作进程按租约取用
+
+由 python -m scrapy_zhihu.distributed 启动的工作进程使用（SCHEDULER设置），单进程运行时不启用。
+- meta中带frontier_shared的请求（创作者主页、内容详情）进入frontier，由任意工作进程下载；
+  其余请求依赖进程内状态（并行翻页窗口、评论树），留在产生它的进程中调度
+- 共享请求连同它在本进程产生的所有请求的回调都执行完后才确认完成（ZhihuFrontierMiddleware计数），
+  之前一直续约；进程崩溃后租约回到队列，由其他进程重新抓取整个创作者/内容
+- 种子进程（ZHIHU_WORKER_INDEX为0）空闲时记录seeded，其他进程在此之前不会因队列暂时为空而退出
+"""
+import heapq
+import pickle
+import time
+from itertools import count
+
+from scrapy import signals
+from scrapy.utils.misc import build_from_crawler, load_object
+from scrapy.utils.request import request_from_dict
+from twisted.internet.task import LoopingCall
+from config import zhihu_config
+
+
+class ZhihuFrontierScheduler:
+    """
+    Args:
+        crawler: Scrapy Crawler
+        frontier: FRONTIER_BACKEND实例
+        dupefilter: 本进程请求的去重过滤器（DUPEFILTER_CLASS），共享请求在frontier中去重
+        seeder: 是否为种子进程
+    """
+
+    def __init__(self, crawler, frontier, dupefilter, seeder: bool):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.frontier = frontier
+        self.df = dupefilter
+        self.seeder = seeder
+        self.fingerprinter = crawler.request_fingerprinter
+        self.spider = None
+        # 本进程内调度的请求：(-priority, 序号, request)
+        self._local = []
+        self._local_seq = count()
+        # 已租用、尚未交给引擎的共享请求 [(id, payload)]，末尾先出
+        self._leased = []
+        # 已交给引擎的共享请求ID -> 自身及其产生的本地请求中回调尚未执行完的数量，归零时确认完成
+        self._units = {}
+        self._last_empty_lease = 0.0
+        self._pending_cache = (0.0, False)
+        self._renew_loop = None
+        crawler.signals.connect(self._spider_idle, signal=signals.spider_idle)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        index = settings.getint('ZHIHU_WORKER_INDEX')
+        frontier = load_object(zhihu_config.FRONTIER_BACKEND)(
+            settings.get('ZHIHU_FRONTIER_PATH') or zhihu_config.FRONTIER_DB_PATH,
+            worker=f"worker-{index}",
+            lease_seconds=zhihu_config.FRONTIER_LEASE_SECONDS,
+            max_attempts=zhihu_config.FRONTIER_MAX_ATTEMPTS,
+        )
+        dupefilter = build_from_crawler(load_object(settings['DUPEFILTER_CLASS']), crawler)
+        return cls(crawler, frontier, dupefilter, seeder=index == 0)
+
+    def open(self, spider):
+        self.spider = spider
+        self.max_units = zhihu_config.FRONTIER_MAX_UNITS.get(spider.name, zhihu_config.FRONTIER_MAX_UNITS["default"])
+        self.df.open()
+        self._renew_loop = LoopingCall(self._renew)
+        self._renew_loop.start(max(1.0, zhihu_config.FRONTIER_LEASE_SECONDS / 3), now=False)
+
+    def close(self, reason):
+        if self._renew_loop is not None and self._renew_loop.running:
+            self._renew_loop.stop()
+        self.frontier.release([request_id for request_id, _ in self._leased])
+        if reason == 'finished':
+            for request_id in self._units:
+                self.frontier.ack(request_id)
+        else:
+            # 中途停止：未完成的共享请求回到队列，续跑时重新抓取
+            self.frontier.release(list(self._units))
+        self.frontier.close()
+        return self.df.close(reason)
+
+    def __len__(self):
+        return len(self._local) + len(self._leased) + self.frontier.queued()
+
+    def has_pending_requests(self) -> bool:
+        if self._local or self._leased:
+            return True
+        # 其他进程下载中的共享请求还可能产生新请求，种子进程发完起始请求之前也不能退出
+        checked_at, pending = self._pending_cache
+        now = time.monotonic()
+        if now - checked_at >= 0.5:
+            pending = self.frontier.unfinished() > 0
+            if not pending and not self.seeder:
+                pending = self.frontier.get_meta('seeded') != '1'
+            self._pending_cache = (now, pending)
+        return pending
+
+    def enqueue_request(self, request) -> bool:
+        # 重试和重定向产生的副本沿用原请求的meta：已领取的共享请求留在本进程，不再放回frontier
+        if not request.meta.get('frontier_shared') or request.meta.get('frontier_id') in self._units:
+            if not request.dont_filter and self.df.request_seen(request):
+                self.df.log(request, self.spider)
+                self.request_finished(request)
+                return False
+            heapq.heappush(self._local, (-request.priority, next(self._local_seq), request))
+            self.stats.inc_value('scheduler/enqueued/memory')
+            return True
+
+        payload = pickle.dumps(request.to_dict(spider=self.spider), protocol=4)
+        # 起始请求总是去重（指纹保存在磁盘上，不占内存），续跑时种子进程重新发出的起始请求不会重复下载
+        if request.dont_filter and not request.meta.get('is_start_request'):
+            fingerprint = None
+        else:
+            fingerprint = self.fingerprinter.fingerprint(request)
+        if not self.frontier.push(payload, request.priority, fingerprint):
+            self.stats.inc_value('dupefilter/filtered')
+            return False
+        self._pending_cache = (0.0, True)
+        self.stats.inc_value('zhihu/frontier/enqueued')
+        return True
+
+    def next_request(self):
+        # 先完成本进程已开始的工作（翻页、评论），再领取新的共享请求
+        if self._local:
+            self.stats.inc_value('scheduler/dequeued/memory')
+            return heapq.heappop(self._local)[2]
+        if self._units and not self._in_progress():
+            self._sweep_units()
+        if not self._leased:
+            # 同时处理的共享请求（创作者、内容）不超过上限，其他进程能分到
+            capacity = self.max_units - len(self._units)
+            # 队列为空时引擎会反复调用，限制查询频率
+            now = time.monotonic()
+            if capacity <= 0 or now - self._last_empty_lease < 0.2:
+                return None
+            self._leased = self.frontier.lease(capacity)
+            if not self._leased:
+                self._last_empty_lease = now
+                return None
+            self._leased.reverse()
+            self.stats.inc_value('zhihu/frontier/leased', len(self._leased))
+
+        request_id, payload = self._leased.pop()
+        request = request_from_dict(pickle.loads(payload), spider=self.spider)
+        request.meta['frontier_id'] = request_id
+        self._units[request_id] = 1
+        return request
+
+    def request_opened(self, request):
+        """共享请求的回调产生了本地请求（由ZhihuFrontierMiddleware调用）"""
+        unit = request.meta.get('frontier_unit')
+        if unit in self._units:
+            self._units[unit] += 1
+
+    def request_finished(self, request):
+        """请求的回调已执行完（或请求被丢弃），所属共享请求的整个子任务完成时确认"""
+        unit = request.meta.get('frontier_unit') or request.meta.get('frontier_id')
+        if unit not in self._units:
+            return
+        self._units[unit] -= 1
+        if self._units[unit] <= 0:
+            del self._units[unit]
+            self.frontier.ack(unit)
+            self.stats.inc_value('zhihu/frontier/acked')
+
+    def _sweep_units(self):
+        # 本进程已没有排队、下载和解析中的请求：下载失败（未经过爬虫中间件）的请求没有计数归零，
+        # 它们所属的共享请求实际已完成
+        for unit in self._units:
+            self.frontier.ack(unit)
+        self.stats.inc_value('zhihu/frontier/swept', len(self._units))
+        self._units.clear()
+
+    def _in_progress(self) -> int:
+        """正在下载和正在执行回调的请求数（请求的回调执行完之前，它产生的请求已进入本地队列）"""
+        engine = self.crawler.engine
+        scraping = engine.scraper.slot.active if engine.scraper.slot is not None else ()
+        return len(engine.downloader.active) + len(scraping)
+
+    def _renew(self):
+        self.frontier.renew(list(self._units) + [request_id for request_id, _ in self._leased])
+
+    def _spider_idle(self, spider):
+        # 种子进程空闲时起始请求已全部进入frontier并下载完成
+        if self.seeder and self.frontier.get_meta('seeded') != '1':
+            self.frontier.set_meta('seeded', '1')
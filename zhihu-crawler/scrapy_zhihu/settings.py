@@ -17,15 +17,19 @@ NEWSPIDER_MODULE = 'scrapy_zhihu.spiders'
 ROBOTSTXT_OBEY = False
 
 # 并发设置
-CONCURRENT_REQUESTS = 1
-CONCURRENT_REQUESTS_PER_DOMAIN = 1
+# ZhihuCookieMiddleware为每个账号分配独立的下载槽位，PER_DOMAIN和DOWNLOAD_DELAY按账号生效，
+# 总并发 = 健康账号数 × CONCURRENT_REQUESTS_PER_DOMAIN（不超过CONCURRENT_REQUESTS）
+CONCURRENT_REQUESTS = 16
+CONCURRENT_REQUESTS_PER_DOMAIN = 4
 
 # 下载延迟
-DOWNLOAD_DELAY = 2
+# 请求速率由ZhihuRateLimitMiddleware按接口族自适应控制；
+# 关闭RATE_LIMIT_ENABLED时请恢复 DOWNLOAD_DELAY = 2 和 AUTOTHROTTLE_ENABLED = True
+DOWNLOAD_DELAY = 0
 RANDOMIZE_DOWNLOAD_DELAY = True
 
 # 自动限流
-AUTOTHROTTLE_ENABLED = True
+AUTOTHROTTLE_ENABLED = False
 AUTOTHROTTLE_START_DELAY = 2
 AUTOTHROTTLE_MAX_DELAY = 10
 AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
@@ -55,12 +59,26 @@ DEFAULT_REQUEST_HEADERS = {
 
 # 中间件
 DOWNLOADER_MIDDLEWARES = {
+    # 先分配账号，再用该账号的d_c0签名
+    'scrapy_zhihu.middlewares.ZhihuCookieMiddleware': 542,
     'scrapy_zhihu.middlewares.ZhihuSignMiddleware': 543,
-    'scrapy_zhihu.middlewares.ZhihuCookieMiddleware': 544,
+    # 在RetryMiddleware(550)之后，能看到重试前的原始响应
+    'scrapy_zhihu.middlewares.ZhihuRateLimitMiddleware': 560,
+    # 配置FIXTURE_RECORD_PATH时录制原始响应（在解压和重定向之前）
+    'scrapy_zhihu.middlewares.ZhihuFixtureRecorderMiddleware': 900,
+}
+
+# 爬虫中间件
+SPIDER_MIDDLEWARES = {
+    # 按接口、所属内容和创作者公平份额设置请求优先级
+    'scrapy_zhihu.middlewares.ZhihuPriorityMiddleware': 950,
+    # 开启METRICS_ENABLED时统计回调耗时，优先级最接近爬虫，计时不含其他爬虫中间件
+    'scrapy_zhihu.middlewares.ZhihuCallbackTimerMiddleware': 990,
 }
 
 # Pipeline
 ITEM_PIPELINES = {
+    'scrapy_zhihu.pipelines.ZhihuDedupPipeline': 200,
     'scrapy_zhihu.pipelines.ZhihuPipeline': 300,
 }
 
@@ -70,6 +88,8 @@ LOG_LEVEL = 'INFO'
 # 扩展
 EXTENSIONS = {
     'scrapy.extensions.telnet.TelnetConsole': None,
+    # 开启METRICS_ENABLED时统计各阶段耗时
+    'scrapy_zhihu.extensions.ZhihuMetricsExtension': 500,
 }
 
 # 重试设置
@@ -86,3 +106,16 @@ COOKIES_ENABLED = True
 # 下载超时
 DOWNLOAD_TIMEOUT = 30
 
+# 断点续爬：配置了JOB_ID时，调度队列、去重指纹和分页检查点保存在 data/zhihu/jobs/<JOB_ID>，
+# 以相同的JOB_ID重新启动即从中断处继续（也可以用 scrapy crawl creator -s JOBDIR=目录）
+from config import zhihu_config
+
+if zhihu_config.JOB_ID:
+    JOBDIR = f"data/zhihu/jobs/{zhihu_config.JOB_ID}"
+
+# 离线回放：配置了FIXTURE_REPLAY_PATH时所有请求从录制存档返回，不访问网络
+if zhihu_config.FIXTURE_REPLAY_PATH:
+    DOWNLOAD_HANDLERS = {
+        'http': 'scrapy_zhihu.replay.ZhihuReplayDownloadHandler',
+        'https': 'scrapy_zhihu.replay.ZhihuReplayDownloadHandler',
+    }
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+评论爬取（creator/detail爬虫共用）
+
+每条内容对应一棵CommentTree：一级评论按游标串行翻页，子评论串在COMMENT_CHILD_CONCURRENCY
+预算内按回复数从多到少展开，可按COMMENT_MAX_DEPTH/COMMENT_MAX_PER_CONTENT限制层级和数量。
+除逐条的ZhihuCommentItem外，整棵树完成后输出一条ZhihuCommentTreeItem。
+"""
+import sys
+import os
+import uuid
+from itertools import count
+from typing import Dict
+from urllib.parse import urlencode
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import scrapy
+from scrapy_zhihu.items import ZhihuCommentTreeItem, ZhihuContentItem
+from zhihu_core.comment_tree import CommentTree
+from zhihu_core.decoder import decode_comment_page
+from zhihu_core.constants import ZHIHU_URL
+from config import zhihu_config
+
+# 内容类型 -> 评论接口路径
+COMMENT_RESOURCES = {
+    'answer': 'answers',
+    'article': 'articles',
+    'zvideo': 'zvideos',
+    'pin': 'pins',
+}
+
+
+class CommentTreeMixin:
+    """
+    评论树爬取，需要爬虫提供 extractor、enable_comments、enable_sub_comments
+    断点续爬的爬虫可以覆盖 _comments_request / _is_page_done / _mark_page_done 接入检查点
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 本次运行在途的评论树：令牌 -> CommentTree。令牌带运行前缀，JOBDIR恢复的上次运行的请求不会误匹配
+        self._comment_trees: Dict[str, CommentTree] = {}
+        self._comment_tree_prefix = uuid.uuid4().hex[:8]
+        self._comment_tree_ids = count(1)
+
+    @staticmethod
+    def _root_comments_url(content_id: str, content_type: str) -> str:
+        """一级评论首页URL"""
+        params = {
+            "order_by": "score",
+            "offset": "",
+            "limit": zhihu_config.COMMENT_PAGE_SIZE
+        }
+        return (f"{ZHIHU_URL}/api/v4/comment_v5/{COMMENT_RESOURCES[content_type]}/{content_id}"
+                f"/root_comment?{urlencode(params)}")
+
+    @staticmethod
+    def _child_comments_url(comment_id: str) -> str:
+        """子评论串首页URL"""
+        params = {
+            "order": "sort",
+            "offset": "",
+            "limit": zhihu_config.COMMENT_CHILD_PAGE_SIZE
+        }
+        return f"{ZHIHU_URL}/api/v4/comment_v5/comment/{comment_id}/child_comment?{urlencode(params)}"
+
+    def _root_comments_request(self, content: ZhihuContentItem):
+        """开始爬取一条内容（extract_*_content的结果）的评论树"""
+        content_id = content['content_id']
+        content_type = content['content_type']
+        max_depth = zhihu_config.COMMENT_MAX_DEPTH if self.enable_sub_comments else 1
+        tree = CommentTree(
+            content_id, content_type, max_depth,
+            zhihu_config.COMMENT_MAX_PER_CONTENT, zhihu_config.COMMENT_CHILD_CONCURRENCY,
+        )
+        token = f"{self._comment_tree_prefix}:{next(self._comment_tree_ids)}"
+        self._comment_trees[token] = tree
+        tree.page_scheduled()
+        return self._comments_request(
+            self._root_comments_url(content_id, content_type), content_id, content_type, comment_tree=token,
+            # 供优先级策略按所属内容的新旧或赞同数排序
+            zhihu_content=(content.get('created_time') or 0, content.get('voteup_count') or 0)
+        )
+
+    def _comments_request(self, url: str, content_id: str, content_type: str, sub: bool = False, **meta):
+        """一级/二级评论分页请求"""
+        meta.update({'content_id': content_id, 'content_type': content_type})
+        return scrapy.Request(
+            url=url,
+            callback=self.parse_sub_comments if sub else self.parse_comments,
+            errback=self._comments_failed,
+            meta=meta
+        )
+
+    def _is_page_done(self, response) -> bool:
+        return False
+
+    def _mark_page_done(self, response):
+        pass
+
+    def _get_comment_tree(self, meta):
+        """请求所属的评论树；上次运行遗留（JOBDIR恢复）的请求没有对应的树，只输出逐条评论"""
+        tree = self._comment_trees.get(meta.get('comment_tree'))
+        if tree is None:
+            self.crawler.stats.inc_value('zhihu/comment_tree/untracked_pages')
+        return tree
+
+    def parse_comments(self, response):
+        """解析一级评论"""
+        tree = self._get_comment_tree(response.meta)
+        # 检查响应状态
+        if response.status == 403:
+            self.logger.error(f"评论API请求被拒绝(403): {response.url}")
+            yield from self._comment_page_finished(response.meta, tree)
+            return
+
+        if response.status != 200:
+            self.logger.warning(f"评论API响应状态码: {response.status}, URL: {response.url}")
+            yield from self._comment_page_finished(response.meta, tree)
+            return
+
+        if self._is_page_done(response):
+            yield from self._comment_page_finished(response.meta, tree)
+            return
+
+        try:
+            data = decode_comment_page(response.body)
+            content_id = response.meta['content_id']
+            content_type = response.meta['content_type']
+
+            for comment_data in data.get('data', []):
+                if comment_data.get('type') != 'comment':
+                    continue
+                comment = self.extractor.extract_comment(comment_data, content_id, content_type)
+                if tree is not None:
+                    if not tree.add(comment):
+                        continue
+                elif self.enable_sub_comments and comment.get('sub_comment_count', 0) > 0:
+                    # 没有评论树时按原方式逐串展开
+                    yield self._comments_request(
+                        self._child_comments_url(comment['comment_id']), content_id, content_type, sub=True,
+                        comment_root=comment['comment_id']
+                    )
+                yield comment
+
+            # 检查是否有下一页
+            paging = data.get('paging', {})
+            next_url = paging.get('next')
+            if not paging.get('is_end', True) and next_url:
+                if tree is None:
+                    yield self._comments_request(next_url, content_id, content_type,
+                                                 comment_tree=response.meta.get('comment_tree'))
+                elif tree.full:
+                    tree.truncated = True
+                else:
+                    tree.page_scheduled()
+                    yield self._comments_request(next_url, content_id, content_type,
+                                                 comment_tree=response.meta.get('comment_tree'))
+            self._mark_page_done(response)
+        except Exception as e:
+            self.logger.error(f"解析评论失败: {e}")
+        yield from self._comment_page_finished(response.meta, tree)
+
+    def parse_sub_comments(self, response):
+        """解析二级评论"""
+        tree = self._get_comment_tree(response.meta)
+        thread_ended = True
+        if response.status != 200:
+            self.logger.warning(f"二级评论API响应状态码: {response.status}, URL: {response.url}")
+            yield from self._comment_page_finished(response.meta, tree, thread_ended)
+            return
+
+        if self._is_page_done(response):
+            yield from self._comment_page_finished(response.meta, tree, thread_ended)
+            return
+
+        try:
+            data = decode_comment_page(response.body)
+            content_id = response.meta['content_id']
+            content_type = response.meta['content_type']
+            root_id = response.meta.get('comment_root', '')
+
+            for comment_data in data.get('data', []):
+                if comment_data.get('type') != 'comment':
+                    continue
+                comment = self.extractor.extract_comment(comment_data, content_id, content_type)
+                if tree is not None and not tree.add(comment, root_id):
+                    continue
+                yield comment
+
+            # 检查是否有下一页
+            paging = data.get('paging', {})
+            next_url = paging.get('next')
+            if not paging.get('is_end', True) and next_url:
+                if tree is not None and tree.full:
+                    tree.truncated = True
+                else:
+                    if tree is not None:
+                        tree.page_scheduled()
+                        thread_ended = False
+                    yield self._comments_request(
+                        next_url, content_id, content_type, sub=True,
+                        comment_tree=response.meta.get('comment_tree'), comment_root=root_id
+                    )
+            self._mark_page_done(response)
+        except Exception as e:
+            self.logger.error(f"解析二级评论失败: {e}")
+        yield from self._comment_page_finished(response.meta, tree, thread_ended)
+
+    def _comments_failed(self, failure):
+        """评论分页请求失败（重试耗尽、超时等），该页按结束处理，不阻塞评论树完成"""
+        request = failure.request
+        self.logger.error(f"评论请求失败: {failure.value!r}, URL: {request.url}")
+        tree = self._get_comment_tree(request.meta)
+        yield from self._comment_page_finished(request.meta, tree, request.callback == self.parse_sub_comments)
+
+    def _comment_page_finished(self, meta, tree, thread_ended: bool = False):
+        """一页处理完：释放子评论串预算并展开新的串，整棵树完成时输出树记录"""
+        if tree is None:
+            return
+        if thread_ended and meta.get('comment_root'):
+            tree.thread_finished()
+        for root_id in tree.take_threads():
+            yield self._comments_request(
+                self._child_comments_url(root_id), tree.content_id, tree.content_type, sub=True,
+                comment_tree=meta.get('comment_tree'), comment_root=root_id
+            )
+        tree.page_finished()
+        if tree.complete:
+            del self._comment_trees[meta.get('comment_tree')]
+            stats = self.crawler.stats
+            stats.inc_value('zhihu/comment_tree/completed')
+            if tree.truncated:
+                stats.inc_value('zhihu/comment_tree/truncated')
+            if zhihu_config.COMMENT_TREE_OUTPUT:
+                yield ZhihuCommentTreeItem(**tree.to_record())
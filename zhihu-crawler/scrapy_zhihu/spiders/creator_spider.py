@@ -11,13 +11,41 @@ from urllib.parse import urlencode
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import scrapy
-from scrapy_zhihu.items import ZhihuContentItem, ZhihuCommentItem, ZhihuCreatorItem
+from scrapy import signals
+from scrapy_zhihu.spiders.comments import CommentTreeMixin
+from zhihu_core.account_pool import get_account_pool
+from zhihu_core.checkpoint import CrawlCheckpoint
 from zhihu_core.extractor import ZhihuExtractor
+from zhihu_core.decoder import decode_answer_page, decode_pin_page
 from zhihu_core.constants import ZHIHU_URL
+from zhihu_core.warmup import WarmupSessionStore, parse_set_cookies
+from zhihu_core.watermark import WatermarkStore
 from config import zhihu_config
 
+# 创作者回答/想法列表每页条数
+PAGE_SIZE = 20
 
-class CreatorSpider(scrapy.Spider):
+# 预热页面：访问后由其Set-Cookie获得后续请求需要的Cookie
+WARMUP_URL = f"{ZHIHU_URL}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
+
+# 403后重试请求时不沿用的meta：下载过程中写入的键，以及多进程模式的共享请求计数（由重试请求重新登记）
+_REWARM_DROPPED_META = (
+    'download_latency', 'download_slot', 'retry_times', 'redirect_times', 'redirect_ttl', 'redirect_urls',
+    'redirect_reasons', 'frontier_shared', 'frontier_id', 'frontier_unit', 'zhihu_account_retries',
+)
+
+# 分页回调对应的errback（续爬和403重试重新构造请求时使用）
+_PAGE_ERRBACKS = {
+    'parse_creator_answers': '_page_errback',
+    'parse_creator_pins': '_page_errback',
+    'parse_comments': '_comments_failed',
+    'parse_sub_comments': '_comments_failed',
+}
+
+ANSWERS_INCLUDE = "data[*].is_normal,admin_closed_comment,reward_info,is_collapsed,annotation_action,annotation_detail,collapse_reason,collapsed_by,suggest_edit,comment_count,can_comment,content,editable_content,attachment,voteup_count,reshipment_settings,comment_permission,created_time,updated_time,review_info,excerpt,paid_info,reaction_instruction,is_labeled,label_info,relationship.is_authorized,voting,is_author,is_thanked,is_nothelp;data[*].vessay_info;data[*].author.badge[?(type=best_answerer)].topics;data[*].author.vip_info;data[*].question.has_publishing_draft,relationship"
+
+
+class CreatorSpider(CommentTreeMixin, scrapy.Spider):
     """创作者模式爬虫"""
     
     name = 'creator'
@@ -28,24 +56,426 @@ class CreatorSpider(scrapy.Spider):
         self.extractor = ZhihuExtractor()
         self.enable_comments = zhihu_config.ENABLE_GET_COMMENTS
         self.enable_sub_comments = zhihu_config.ENABLE_GET_SUB_COMMENTS
+        # 增量爬取：按created_time水位线只抓上次运行之后发布的回答和想法
+        self.watermarks = WatermarkStore(zhihu_config.WATERMARK_DB_PATH) if zhihu_config.CREATOR_INCREMENTAL else None
+        # 并行翻页：每个创作者每个内容流同时在途的页数，1为逐页串行
+        self.page_concurrency = zhihu_config.CREATOR_PAGE_CONCURRENCY
+        self._fanouts = {}
+        # 本次运行中有分页失败的内容流，结束时不推进水位线
+        self._failed_streams = set()
+        # 预热会话缓存：未过期时跳过搜索页预热，账号返回403时作废并重新预热
+        self.warmup_store = None
+        if zhihu_config.WARMUP_CACHE_ENABLED:
+            self.warmup_store = WarmupSessionStore(zhihu_config.WARMUP_CACHE_PATH, zhihu_config.WARMUP_MAX_AGE)
+        self._rewarmed = set()
+        # 启动时正在预热的账号，全部完成后开始爬取创作者
+        self._warming = set()
+        # 断点续爬检查点，设置了JOBDIR时启用
+        self.checkpoint = None
+    
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(CreatorSpider, cls).from_crawler(crawler, *args, **kwargs)
+        jobdir = crawler.settings.get('JOBDIR')
+        if jobdir:
+            spider.checkpoint = CrawlCheckpoint(os.path.join(jobdir, 'zhihu_checkpoint.db'))
+            crawler.signals.connect(spider._request_reached_downloader, signal=signals.request_reached_downloader)
+            # JOBDIR队列中的分页可能在预热完成前就返回，并行翻页的窗口需在启动时恢复
+            spider._restore_fanouts()
+        return spider
+    
+    def closed(self, reason):
+        """Spider关闭时释放水位线存储、预热会话缓存和检查点"""
+        if self.watermarks is not None:
+            self.watermarks.close()
+        if self.warmup_store is not None:
+            self.warmup_store.close()
+        if self.checkpoint is not None:
+            self.logger.info(f"检查点状态: {self.checkpoint.counts()}")
+            self.checkpoint.close()
+    
+    def _track(self, request, stream: str, key: str, cursor: str):
+        """登记分页到检查点，返回原请求"""
+        request.meta['zhihu_checkpoint'] = (stream, key, cursor)
+        if self.checkpoint is not None:
+            meta = {k: v for k, v in request.meta.items() if k != 'zhihu_checkpoint'}
+            self.checkpoint.schedule(stream, key, cursor, request.url, request.callback.__name__, meta)
+        return request
+    
+    def _request_reached_downloader(self, request, spider):
+        """请求离开磁盘队列开始下载，进程中断时这些请求需要重新发出"""
+        page = request.meta.get('zhihu_checkpoint')
+        if page is not None:
+            self.checkpoint.mark_in_flight(*page)
+    
+    def _is_page_done(self, response) -> bool:
+        """分页在之前的运行中已完成（数据已产出），续爬时跳过"""
+        page = response.meta.get('zhihu_checkpoint')
+        if self.checkpoint is None or page is None or not self.checkpoint.is_done(*page):
+            return False
+        self.crawler.stats.inc_value('zhihu/checkpoint/skipped_pages')
+        return True
+    
+    def _mark_page_done(self, response):
+        """该页的数据和后续请求都已产出"""
+        page = response.meta.get('zhihu_checkpoint')
+        if self.checkpoint is None or page is None:
+            return
+        stream, key, _ = page
+        if self.watermarks is not None and stream in ('answers', 'pins'):
+            self.watermarks.save_pending(key, stream)
+        self.checkpoint.mark_done(*page)
+    
+    def _resume_requests(self):
+        """重新发出上次运行中断时正在下载的分页（仍在队列中的由JOBDIR恢复）"""
+        if self.checkpoint is None:
+            return
+        count = 0
+        for stream, key, cursor, url, callback, meta in self.checkpoint.lost():
+            meta['zhihu_checkpoint'] = (stream, key, cursor)
+            yield scrapy.Request(
+                url=url, callback=getattr(self, callback), errback=self._page_errback_for(callback),
+                meta=meta, dont_filter=True
+            )
+            count += 1
+        if count:
+            self.logger.info(f"断点续爬：重新发出 {count} 个中断的分页请求")
+            self.crawler.stats.set_value('zhihu/checkpoint/resumed_pages', count)
+    
+    def _restore_fanouts(self):
+        """
+        恢复上次运行中未结束的并行翻页：后续偏移从已调度的最大offset之后开始，
+        在途分页数为检查点中未完成的分页数（队列中的和中断后重新发出的）
+        """
+        for stream, key, last_offset, ended, max_offset, unfinished in self.checkpoint.fanouts():
+            if not unfinished:
+                # 所有分页都已完成，只差结束内容流
+                self.checkpoint.delete_fanout(stream, key)
+                self._finish_stream(key, stream)
+                continue
+            self._fanouts[(key, stream)] = {
+                'next_offset': max_offset + PAGE_SIZE,
+                'last_offset': last_offset,
+                'pending': unfinished,
+                'ended': ended,
+            }
+            self.logger.info(f"断点续爬：恢复 {key} 的{stream}并行翻页，在途 {unfinished} 页")
+    
+    def _save_fanout(self, user_url_token: str, stream: str, fanout: dict):
+        """并行翻页的范围变化时记录到检查点"""
+        if self.checkpoint is not None:
+            self.checkpoint.save_fanout(stream, user_url_token, fanout['last_offset'], fanout['ended'])
+    
+    def _get_watermark(self, user_url_token: str, stream: str) -> int:
+        """查询内容流的水位线，未开启增量爬取时返回0"""
+        if self.watermarks is None:
+            return 0
+        watermark = self.watermarks.get(user_url_token, stream)
+        if watermark:
+            self.logger.info(f"增量爬取 {user_url_token} 的{stream}，水位线: {watermark}")
+        return watermark
+    
+    def _is_seen(self, user_url_token: str, stream: str, created_time: int, watermark: int) -> bool:
+        """判断数据是否已在之前的运行中爬过，未爬过的记录其created_time"""
+        if watermark and created_time and created_time <= watermark:
+            self.crawler.stats.inc_value(f'zhihu/watermark/{stream}/skipped')
+            return True
+        if self.watermarks is not None:
+            self.watermarks.observe(user_url_token, stream, created_time)
+        return False
+    
+    def _finish_stream(self, user_url_token: str, stream: str):
+        """内容流已爬完（末页或越过水位线），推进水位线；有分页失败时不推进，下次运行仍从旧水位线开始"""
+        if (user_url_token, stream) in self._failed_streams:
+            self._failed_streams.discard((user_url_token, stream))
+            self.logger.warning(f"{user_url_token} 的{stream}有分页失败，本次不推进水位线")
+            return
+        if self.watermarks is not None:
+            self.watermarks.commit(user_url_token, stream)
+    
+    def _answers_request(self, user_url_token: str, offset: int, watermark: int = 0, total: int = 0):
+        """创作者回答列表请求（按创建时间倒序）"""
+        params = {
+            "include": ANSWERS_INCLUDE,
+            "offset": offset,
+            "limit": PAGE_SIZE,
+            "order_by": "created"
+        }
+        url = f"{ZHIHU_URL}/api/v4/members/{user_url_token}/answers?{urlencode(params)}"
+        request = scrapy.Request(
+            url=url,
+            callback=self.parse_creator_answers,
+            errback=self._page_errback,
+            meta={
+                'user_url_token': user_url_token, 'offset': offset, 'watermark': watermark, 'total': total,
+                'stream': 'answers'
+            },
+            dont_filter=True
+        )
+        return self._track(request, 'answers', user_url_token, str(offset))
+    
+    def _pins_request(self, user_url_token: str, offset: int, watermark: int = 0, total: int = 0):
+        """创作者想法列表请求"""
+        params_pins = {
+            "offset": offset,
+            "limit": PAGE_SIZE,
+            "includes": "data[*].upvoted_followees,admin_closed_comment"
+        }
+        url_pins = f"{ZHIHU_URL}/api/v4/v2/pins/{user_url_token}/moments?{urlencode(params_pins)}"
+        request = scrapy.Request(
+            url=url_pins,
+            callback=self.parse_creator_pins,
+            errback=self._page_errback,
+            meta={
+                'user_url_token': user_url_token, 'offset': offset, 'watermark': watermark, 'total': total,
+                'stream': 'pins'
+            },
+            dont_filter=True
+        )
+        return self._track(request, 'pins', user_url_token, str(offset))
+    
+    def _comments_request(self, url: str, content_id: str, content_type: str, sub: bool = False, **meta):
+        """一级/二级评论分页请求，以分页URL（包含游标）作为检查点"""
+        request = super()._comments_request(url, content_id, content_type, sub, **meta)
+        return self._track(request, 'sub_comments' if sub else 'comments', f"{content_type}:{content_id}", url)
+    
+    def _next_pages(self, response, stream: str, paging, reached_watermark: bool, build_request):
+        """
+        生成内容流的后续翻页请求
+        
+        串行模式：当前页解析完再请求下一页。
+        并行模式：首页返回后根据总数（paging.totals或创作者主页的anwser_count）
+        一次调度后续偏移，同一创作者同时在途的页数不超过CREATOR_PAGE_CONCURRENCY，
+        每返回一页补充一页（滑动窗口）；总数偏大时在is_end处停止调度，
+        偏小时最后一页仍未结束则继续向后翻页。
+        """
+        user_url_token = response.meta['user_url_token']
+        offset = response.meta['offset']
+        watermark = response.meta.get('watermark', 0)
+        is_end = reached_watermark or paging.get('is_end', True)
+        key = (user_url_token, stream)
+        fanout = self._fanouts.get(key)
+        
+        if fanout is None:
+            if is_end:
+                self._finish_stream(user_url_token, stream)
+                return
+            total = paging.get('totals') or response.meta.get('total') or 0
+            # 增量爬取通常只需一两页，只在全量爬取时并行翻页
+            if offset == 0 and not watermark and self.page_concurrency > 1 and total > PAGE_SIZE * 2:
+                fanout = self._fanouts[key] = {
+                    'next_offset': PAGE_SIZE,
+                    'last_offset': (total - 1) // PAGE_SIZE * PAGE_SIZE,
+                    'pending': 0,
+                    'ended': False,
+                }
+                self.logger.info(f"并行翻页 {user_url_token} 的{stream}，共 {total} 条")
+                self._save_fanout(user_url_token, stream, fanout)
+                yield from self._fill_window(fanout, user_url_token, stream, build_request)
+                return
+            yield build_request(user_url_token, offset + PAGE_SIZE, watermark, total)
+            return
+        
+        yield from self._release_page(fanout, response.meta, stream, is_end, build_request)
+    
+    def _page_finished(self, meta, stream: str, failed: bool = True):
+        """
+        分页没有正常解析（状态码异常、解析失败、下载失败，或检查点中已完成）时的收尾
+        
+        并行模式：归还窗口名额并补充窗口，之后的偏移照常调度。
+        串行模式：失败的分页按总数判断之后是否还有分页，有则跳过该页继续翻页；
+        检查点中已完成的分页，其下一页已在之前的运行中发出。
+        失败的内容流结束时不推进水位线，下次运行补上缺失的分页。
+        """
+        user_url_token = meta['user_url_token']
+        key = (user_url_token, stream)
+        build_request = self._answers_request if stream == 'answers' else self._pins_request
+        if failed:
+            self._failed_streams.add(key)
+            self.crawler.stats.inc_value(f'zhihu/pages/{stream}/failed')
+        
+        fanout = self._fanouts.get(key)
+        if fanout is not None:
+            yield from self._release_page(fanout, meta, stream, False, build_request, failed)
+            return
+        if not failed:
+            return
+        offset = meta['offset']
+        total = meta.get('total') or 0
+        if offset + PAGE_SIZE < total:
+            yield build_request(user_url_token, offset + PAGE_SIZE, meta.get('watermark', 0), total)
+        else:
+            self._finish_stream(user_url_token, stream)
+    
+    def _page_errback(self, failure):
+        """回答/想法分页请求失败（重试耗尽、超时等）"""
+        request = failure.request
+        self.logger.error(f"分页请求失败: {failure.value!r}, URL: {request.url}")
+        yield from self._page_finished(request.meta, request.meta['stream'])
+    
+    def _page_errback_for(self, callback: str):
+        """按回调名称取对应的errback"""
+        name = _PAGE_ERRBACKS.get(callback)
+        return getattr(self, name) if name else None
+    
+    def _release_page(self, fanout: dict, meta, stream: str, is_end: bool, build_request, failed: bool = False):
+        """并行模式下一页处理完：归还窗口名额、补充窗口，所有在途分页都完成时结束内容流"""
+        user_url_token = meta['user_url_token']
+        fanout['pending'] -= 1
+        if is_end:
+            # 总数偏大：之后的偏移不再调度
+            if not fanout['ended']:
+                fanout['ended'] = True
+                self._save_fanout(user_url_token, stream, fanout)
+        elif not failed and meta['offset'] >= fanout['last_offset']:
+            # 总数偏小：最后一页仍未结束，继续向后翻页
+            fanout['last_offset'] = meta['offset'] + PAGE_SIZE
+            self._save_fanout(user_url_token, stream, fanout)
+            self.crawler.stats.inc_value(f'zhihu/fanout/{stream}/extended')
+        
+        yield from self._fill_window(fanout, user_url_token, stream, build_request)
+        if fanout['pending'] == 0:
+            del self._fanouts[(user_url_token, stream)]
+            if self.checkpoint is not None:
+                self.checkpoint.delete_fanout(stream, user_url_token)
+            self._finish_stream(user_url_token, stream)
+    
+    def _fill_window(self, fanout: dict, user_url_token: str, stream: str, build_request):
+        """补足并行窗口内的翻页请求"""
+        while (fanout['pending'] < self.page_concurrency and not fanout['ended']
+               and fanout['next_offset'] <= fanout['last_offset']):
+            yield build_request(user_url_token, fanout['next_offset'])
+            fanout['next_offset'] += PAGE_SIZE
+            fanout['pending'] += 1
+            self.crawler.stats.inc_value(f'zhihu/fanout/{stream}/pages')
+    
+    async def start(self):
+        """Scrapy 2.13+ 的启动入口（不再调用start_requests）"""
+        for request in self.start_requests():
+            yield request
     
     def start_requests(self):
         """生成初始请求"""
         # 检查Cookie配置
-        if not zhihu_config.COOKIES:
-            self.logger.error("Cookie未配置！请在config/zhihu_config.py中设置COOKIES")
+        if not len(get_account_pool()):
+            self.logger.error("Cookie未配置！请在config/zhihu_config.py中设置COOKIES或ACCOUNTS_FILE")
             return
         
-        # 先访问搜索页面获取必要的Cookie（参考原项目逻辑）
-        yield scrapy.Request(
-            url=f"{ZHIHU_URL}/search?q=python&search_source=Guess&utm_content=search_hot&type=content",
-            callback=self._after_search_page,
-            dont_filter=True
+        # 缓存中有未过期预热会话的账号直接复用，其余账号各自先访问搜索页面获取必要的Cookie（参考原项目逻辑），
+        # 所有账号预热完成后开始爬取创作者
+        self._warming = set(self._restore_warmup())
+        if not self._warming:
+            yield from self._start_creators()
+            return
+        for account in sorted(self._warming):
+            yield self._warmup_request(account)
+    
+    def _warmup_request(self, account: str = '', retry: dict = None):
+        """预热请求；account非空时使用指定账号，retry为预热完成后要重试的请求"""
+        meta = {}
+        if account:
+            meta['zhihu_account'] = account
+            # 账号被隔离时Cookie中间件会换一个账号，按原账号记录预热是否完成
+            meta['zhihu_warmup_account'] = account
+        if retry is not None:
+            meta['zhihu_warmup_retry'] = retry
+        return scrapy.Request(
+            url=WARMUP_URL, callback=self._after_search_page, errback=self._warmup_failed, meta=meta, dont_filter=True
         )
     
+    def _restore_warmup(self) -> list:
+        """从缓存恢复各账号未过期的预热Cookie，返回没有可用缓存、需要预热的账号"""
+        accounts = get_account_pool().accounts
+        if self.warmup_store is None:
+            return [account.name for account in accounts]
+        restored, missing = [], []
+        for account in accounts:
+            cookies = self.warmup_store.load(account.name)
+            if cookies is None:
+                missing.append(account.name)
+                continue
+            account.warmup_cookies = [
+                {'name': c['name'], 'value': c['value'], **{k: c[k] for k in ('domain', 'path') if c.get(k)}}
+                for c in cookies
+            ]
+            restored.append(account.name)
+        if restored:
+            skipped = f"，预热其余 {len(missing)} 个账号" if missing else "，跳过搜索页预热"
+            self.logger.info(f"复用缓存的预热会话（账号: {', '.join(restored)}）{skipped}")
+            self.crawler.stats.set_value('zhihu/warmup/reused', len(restored))
+        return missing
+    
+    def _save_warmup(self, response):
+        """缓存预热响应设置的Cookie及其过期时间"""
+        account = response.meta.get('zhihu_account')
+        if self.warmup_store is None or response.status != 200 or not account:
+            return
+        cookies = parse_set_cookies(h.decode('latin-1') for h in response.headers.getlist('Set-Cookie'))
+        self.warmup_store.save(account, cookies)
+        self.crawler.stats.inc_value('zhihu/warmup/saved')
+    
+    def _rewarm(self, response):
+        """
+        账号返回403：作废其缓存的预热会话，本次运行内为该账号重新预热一次并重试该请求，
+        返回预热请求；之后再返回403的请求按原逻辑放弃，返回None
+        """
+        account = response.meta.get('zhihu_account', '')
+        if not account:
+            return None
+        if self.warmup_store is not None:
+            self.warmup_store.invalidate(account)
+        if account in self._rewarmed or response.meta.get('zhihu_rewarmed'):
+            return None
+        self._rewarmed.add(account)
+        meta = {k: v for k, v in response.meta.items() if k not in _REWARM_DROPPED_META}
+        meta['zhihu_rewarmed'] = True
+        retry = {'url': response.request.url, 'callback': response.request.callback.__name__, 'meta': meta}
+        self.logger.info(f"账号 {account} 返回403，重新预热后重试: {response.request.url}")
+        self.crawler.stats.inc_value('zhihu/warmup/rewarmed')
+        return self._warmup_request(account, retry)
+    
     def _after_search_page(self, response):
-        """访问搜索页面后，开始爬取创作者"""
+        """访问搜索页面后，开始爬取创作者（403后的重新预热则重试被拒绝的请求）"""
+        self._save_warmup(response)
+        retry = response.meta.get('zhihu_warmup_retry')
+        if retry is not None:
+            yield self._retry_request(retry)
+            return
+        
+        yield from self._warmup_finished(response.meta)
+    
+    def _warmup_failed(self, failure):
+        """预热请求失败：照常重试被拒绝的请求或开始爬取，账号不带预热Cookie"""
+        meta = failure.request.meta
+        self.logger.warning(f"预热请求失败: {failure.value!r}")
+        self.crawler.stats.inc_value('zhihu/warmup/failed')
+        retry = meta.get('zhihu_warmup_retry')
+        if retry is not None:
+            yield self._retry_request(retry)
+            return
+        yield from self._warmup_finished(meta)
+    
+    def _retry_request(self, retry: dict):
+        """重新预热后重试被拒绝的请求"""
+        return scrapy.Request(
+            url=retry['url'], callback=getattr(self, retry['callback']),
+            errback=self._page_errback_for(retry['callback']), meta=retry['meta'], dont_filter=True
+        )
+    
+    def _warmup_finished(self, meta):
+        """启动时的一个账号预热结束，所有账号都结束后开始爬取创作者"""
+        account = meta.get('zhihu_warmup_account', '')
+        if account not in self._warming:
+            return
+        self._warming.discard(account)
+        if self._warming:
+            return
         self.logger.info("已访问搜索页面，开始爬取创作者...")
+        yield from self._start_creators()
+    
+    def _start_creators(self):
+        """创作者主页请求（以及续爬时中断的分页请求）"""
+        yield from self._resume_requests()
         
         for user_link in zhihu_config.ZHIHU_CREATOR_URL_LIST:
             # 提取用户名（用于后续API请求）
@@ -63,65 +493,52 @@ class CreatorSpider(scrapy.Spider):
             else:
                 request_url = f"{ZHIHU_URL}/people/{user_url_token}"
             
-            # 请求创作者主页（使用原始URL，保持路径不变）
-            yield scrapy.Request(
+            # 请求创作者主页（使用原始URL，保持路径不变）；多进程模式下由任意工作进程领取，
+            # 之后的翻页和评论留在该进程中
+            request = scrapy.Request(
                 url=request_url,
                 callback=self.parse_creator,
-                meta={'user_url_token': user_url_token, 'original_url': user_link},
+                meta={'user_url_token': user_url_token, 'original_url': user_link, 'frontier_shared': True},
                 dont_filter=False
             )
+            yield self._track(request, 'creator', user_url_token, '')
     
     def parse_creator(self, response):
         """解析创作者信息"""
         # 检查响应状态
         if response.status == 403:
             self.logger.error(f"访问被拒绝(403)，请检查Cookie是否有效。URL: {response.url}")
+            rewarm = self._rewarm(response)
+            if rewarm is not None:
+                yield rewarm
             return
         
         if response.status != 200:
             self.logger.warning(f"响应状态码: {response.status}, URL: {response.url}")
             return
         
+        if self._is_page_done(response):
+            return
         user_url_token = response.meta['user_url_token']
         
         # 提取创作者信息
-        creator_dict = self.extractor.extract_creator_from_html(user_url_token, response.text)
-        if creator_dict:
-            item = ZhihuCreatorItem(**creator_dict)
+        item = self.extractor.extract_creator_from_html(user_url_token, response.body)
+        if item:
             yield item
             
             # 使用从HTML提取的url_token（可能更准确）
-            actual_url_token = creator_dict.get('url_token') or user_url_token
+            actual_url_token = item['url_token'] or user_url_token
             self.logger.info(f"使用url_token: {actual_url_token} (原始: {user_url_token})")
             
-            # 爬取创作者的回答
-            params = {
-                "include": "data[*].is_normal,admin_closed_comment,reward_info,is_collapsed,annotation_action,annotation_detail,collapse_reason,collapsed_by,suggest_edit,comment_count,can_comment,content,editable_content,attachment,voteup_count,reshipment_settings,comment_permission,created_time,updated_time,review_info,excerpt,paid_info,reaction_instruction,is_labeled,label_info,relationship.is_authorized,voting,is_author,is_thanked,is_nothelp;data[*].vessay_info;data[*].author.badge[?(type=best_answerer)].topics;data[*].author.vip_info;data[*].question.has_publishing_draft,relationship",
-                "offset": 0,
-                "limit": 20,
-                "order_by": "created"
-            }
-            url = f"{ZHIHU_URL}/api/v4/members/{actual_url_token}/answers?{urlencode(params)}"
-            yield scrapy.Request(
-                url=url,
-                callback=self.parse_creator_answers,
-                meta={'user_url_token': actual_url_token, 'offset': 0},
-                dont_filter=True
+            # 爬取创作者的回答（回答总数用于并行翻页）
+            yield self._answers_request(
+                actual_url_token, 0, self._get_watermark(actual_url_token, 'answers'),
+                total=item['anwser_count'] or 0
             )
             
             # 爬取创作者的想法（pins）
-            params_pins = {
-                "offset": 0,
-                "limit": 20,
-                "includes": "data[*].upvoted_followees,admin_closed_comment"
-            }
-            url_pins = f"{ZHIHU_URL}/api/v4/v2/pins/{actual_url_token}/moments?{urlencode(params_pins)}"
-            yield scrapy.Request(
-                url=url_pins,
-                callback=self.parse_creator_pins,
-                meta={'user_url_token': actual_url_token, 'offset': 0},
-                dont_filter=True
-            )
+            yield self._pins_request(actual_url_token, 0, self._get_watermark(actual_url_token, 'pins'))
+            self._mark_page_done(response)
         else:
             self.logger.warning(f"未能提取创作者信息: {user_url_token}")
     
@@ -131,6 +548,11 @@ class CreatorSpider(scrapy.Spider):
         if response.status == 403:
             self.logger.error(f"API请求被拒绝(403): {response.url}")
             self.logger.error(f"响应内容: {response.text[:500]}")
+            rewarm = self._rewarm(response)
+            if rewarm is not None:
+                yield rewarm
+            else:
+                yield from self._page_finished(response.meta, 'answers')
             return
         
         if response.status == 404:
@@ -143,138 +565,53 @@ class CreatorSpider(scrapy.Spider):
                     self.logger.warning(f"错误信息: {error_msg}")
             except:
                 pass
+            yield from self._page_finished(response.meta, 'answers')
             return
         
         if response.status != 200:
             self.logger.warning(f"API响应状态码: {response.status}, URL: {response.url}")
+            yield from self._page_finished(response.meta, 'answers')
             return
         
+        if self._is_page_done(response):
+            yield from self._page_finished(response.meta, 'answers', failed=False)
+            return
+        
+        paged = False
         try:
-            data = json.loads(response.text)
+            data = decode_answer_page(response.body)
             answers_data = data.get('data', [])
             user_url_token = response.meta['user_url_token']
-            offset = response.meta['offset']
+            watermark = response.meta.get('watermark', 0)
+            reached_watermark = False
             
             self.logger.info(f"成功获取 {len(answers_data)} 条回答数据")
             
             # 提取回答内容
             for answer_data in answers_data:
-                content_dict = self.extractor.extract_answer_content(answer_data)
-                # 确保source_keyword字段存在（creator模式为空）
-                if 'source_keyword' not in content_dict:
-                    content_dict['source_keyword'] = ''
-                item = ZhihuContentItem(**content_dict)
+                # 回答按创建时间倒序，不晚于水位线的都已爬过
+                if self._is_seen(user_url_token, 'answers', answer_data.get('created_time') or 0, watermark):
+                    reached_watermark = True
+                    continue
+                
+                item = self.extractor.extract_answer_content(answer_data)
                 yield item
                 
                 # 如果启用评论，爬取评论
                 if self.enable_comments:
-                    content_id = content_dict['content_id']
-                    params = {
-                        "order": "score",
-                        "offset": "",
-                        "limit": 10
-                    }
-                    url = f"{ZHIHU_URL}/api/v4/comment_v5/answers/{content_id}/root_comment?{urlencode(params)}"
-                    yield scrapy.Request(
-                        url=url,
-                        callback=self.parse_comments,
-                        meta={'content_id': content_id, 'content_type': 'answer'}
-                    )
+                    yield self._root_comments_request(item)
             
             # 检查是否有下一页
             paging = data.get('paging', {})
-            if not paging.get('is_end', True):
-                offset += 20
-                params = {
-                    "include": "data[*].is_normal,admin_closed_comment,reward_info,is_collapsed,annotation_action,annotation_detail,collapse_reason,collapsed_by,suggest_edit,comment_count,can_comment,content,editable_content,attachment,voteup_count,reshipment_settings,comment_permission,created_time,updated_time,review_info,excerpt,paid_info,reaction_instruction,is_labeled,label_info,relationship.is_authorized,voting,is_author,is_thanked,is_nothelp;data[*].vessay_info;data[*].author.badge[?(type=best_answerer)].topics;data[*].author.vip_info;data[*].question.has_publishing_draft,relationship",
-                    "offset": offset,
-                    "limit": 20,
-                    "order_by": "created"
-                }
-                url = f"{ZHIHU_URL}/api/v4/members/{user_url_token}/answers?{urlencode(params)}"
-                yield scrapy.Request(
-                    url=url,
-                    callback=self.parse_creator_answers,
-                    meta={'user_url_token': user_url_token, 'offset': offset},
-                    dont_filter=True
-                )
+            paged = True
+            yield from self._next_pages(
+                response, 'answers', paging, reached_watermark, self._answers_request
+            )
+            self._mark_page_done(response)
         except Exception as e:
             self.logger.error(f"解析创作者回答失败: {e}")
-    
-    def parse_comments(self, response):
-        """解析评论"""
-        # 检查响应状态
-        if response.status == 403:
-            self.logger.error(f"评论API请求被拒绝(403): {response.url}")
-            return
-        
-        if response.status != 200:
-            self.logger.warning(f"评论API响应状态码: {response.status}, URL: {response.url}")
-            return
-        
-        try:
-            data = json.loads(response.text)
-            comments_data = data.get('data', [])
-            content_id = response.meta['content_id']
-            content_type = response.meta['content_type']
-            
-            # 提取评论
-            for comment_data in comments_data:
-                if comment_data.get('type') == 'comment':
-                    comment_dict = self.extractor.extract_comment(
-                        comment_data, content_id, content_type
-                    )
-                    item = ZhihuCommentItem(**comment_dict)
-                    yield item
-                    
-                    # 如果启用二级评论且有子评论
-                    if self.enable_sub_comments and comment_dict.get('sub_comment_count', 0) > 0:
-                        comment_id = comment_dict['comment_id']
-                        params = {
-                            "order": "sort",
-                            "offset": "",
-                            "limit": 10
-                        }
-                        url = f"{ZHIHU_URL}/api/v4/comment_v5/comment/{comment_id}/child_comment?{urlencode(params)}"
-                        yield scrapy.Request(
-                            url=url,
-                            callback=self.parse_sub_comments,
-                            meta={'content_id': content_id, 'content_type': content_type}
-                        )
-            
-            # 检查是否有下一页
-            paging = data.get('paging', {})
-            if not paging.get('is_end', True):
-                next_url = paging.get('next')
-                if next_url:
-                    yield scrapy.Request(url=next_url, callback=self.parse_comments, meta=response.meta)
-        except Exception as e:
-            self.logger.error(f"解析评论失败: {e}")
-    
-    def parse_sub_comments(self, response):
-        """解析二级评论"""
-        try:
-            data = json.loads(response.text)
-            comments_data = data.get('data', [])
-            content_id = response.meta['content_id']
-            content_type = response.meta['content_type']
-            
-            for comment_data in comments_data:
-                if comment_data.get('type') == 'comment':
-                    comment_dict = self.extractor.extract_comment(
-                        comment_data, content_id, content_type
-                    )
-                    item = ZhihuCommentItem(**comment_dict)
-                    yield item
-            
-            # 检查是否有下一页
-            paging = data.get('paging', {})
-            if not paging.get('is_end', True):
-                next_url = paging.get('next')
-                if next_url:
-                    yield scrapy.Request(url=next_url, callback=self.parse_sub_comments, meta=response.meta)
-        except Exception as e:
-            self.logger.error(f"解析二级评论失败: {e}")
+            if not paged:
+                yield from self._page_finished(response.meta, 'answers')
     
     def parse_creator_pins(self, response):
         """解析创作者的想法列表"""
@@ -282,6 +619,11 @@ class CreatorSpider(scrapy.Spider):
         if response.status == 403:
             self.logger.error(f"想法API请求被拒绝(403): {response.url}")
             self.logger.error(f"响应内容: {response.text[:500]}")
+            rewarm = self._rewarm(response)
+            if rewarm is not None:
+                yield rewarm
+            else:
+                yield from self._page_finished(response.meta, 'pins')
             return
         
         if response.status == 404:
@@ -294,17 +636,25 @@ class CreatorSpider(scrapy.Spider):
                     self.logger.warning(f"错误信息: {error_msg}")
             except:
                 pass
+            yield from self._page_finished(response.meta, 'pins')
             return
         
         if response.status != 200:
             self.logger.warning(f"想法API响应状态码: {response.status}, URL: {response.url}")
+            yield from self._page_finished(response.meta, 'pins')
             return
         
+        if self._is_page_done(response):
+            yield from self._page_finished(response.meta, 'pins', failed=False)
+            return
+        
+        paged = False
         try:
-            data = json.loads(response.text)
+            data = decode_pin_page(response.body)
             pins_data = data.get('data', [])
             user_url_token = response.meta['user_url_token']
-            offset = response.meta['offset']
+            watermark = response.meta.get('watermark', 0)
+            reached_watermark = False
             
             self.logger.info(f"成功获取 {len(pins_data)} 条想法数据")
             
@@ -313,44 +663,27 @@ class CreatorSpider(scrapy.Spider):
                 if pin_data.get("type") != "pin":
                     continue
                 
-                content_dict = self.extractor.extract_pin_content(pin_data)
-                # 确保source_keyword字段存在（creator模式为空）
-                if 'source_keyword' not in content_dict:
-                    content_dict['source_keyword'] = ''
-                item = ZhihuContentItem(**content_dict)
+                # 想法按发布时间倒序，不晚于水位线的都已爬过
+                if self._is_seen(user_url_token, 'pins', pin_data.get('created') or 0, watermark):
+                    reached_watermark = True
+                    continue
+                
+                item = self.extractor.extract_pin_content(pin_data)
                 yield item
                 
                 # 如果启用评论，爬取想法的评论
                 if self.enable_comments:
-                    content_id = content_dict['content_id']
-                    params = {
-                        "order_by": "score",
-                        "offset": "",
-                        "limit": 20
-                    }
-                    url = f"{ZHIHU_URL}/api/v4/comment_v5/pins/{content_id}/root_comment?{urlencode(params)}"
-                    yield scrapy.Request(
-                        url=url,
-                        callback=self.parse_comments,
-                        meta={'content_id': content_id, 'content_type': 'pin'}
-                    )
+                    yield self._root_comments_request(item)
             
             # 检查是否有下一页
             paging = data.get('paging', {})
-            if not paging.get('is_end', True):
-                offset += 20
-                params_pins = {
-                    "offset": offset,
-                    "limit": 20,
-                    "includes": "data[*].upvoted_followees,admin_closed_comment"
-                }
-                url_pins = f"{ZHIHU_URL}/api/v4/v2/pins/{user_url_token}/moments?{urlencode(params_pins)}"
-                yield scrapy.Request(
-                    url=url_pins,
-                    callback=self.parse_creator_pins,
-                    meta={'user_url_token': user_url_token, 'offset': offset},
-                    dont_filter=True
-                )
+            paged = True
+            yield from self._next_pages(
+                response, 'pins', paging, reached_watermark, self._pins_request
+            )
+            self._mark_page_done(response)
         except Exception as e:
             self.logger.error(f"解析创作者想法失败: {e}")
+            if not paged:
+                yield from self._page_finished(response.meta, 'pins')
 
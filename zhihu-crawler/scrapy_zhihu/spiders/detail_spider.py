@@ -4,192 +4,205 @@
 """
 import sys
 import os
-import json
-from urllib.parse import urlparse
+import time
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import scrapy
-from scrapy_zhihu.items import ZhihuContentItem, ZhihuCommentItem
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.task import deferLater
+from scrapy_zhihu.spiders.comments import CommentTreeMixin
 from zhihu_core.extractor import ZhihuExtractor
-from zhihu_core.utils import judge_zhihu_url
+from zhihu_core.decoder import decode_answer_detail, decode_article, decode_video_detail
+from zhihu_core.url_stream import UrlStream
+from zhihu_core.utils import parse_zhihu_content_url
 from zhihu_core.constants import ZHIHU_URL, ZHIHU_ZHUANLAN_URL
 from config import zhihu_config
 
 
-class DetailSpider(scrapy.Spider):
+class DetailSpider(CommentTreeMixin, scrapy.Spider):
     """详情模式爬虫"""
     
     name = 'detail'
     allowed_domains = ['zhihu.com', 'zhuanlan.zhihu.com']
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, url_file=None, *args, **kwargs):
         super(DetailSpider, self).__init__(*args, **kwargs)
         self.extractor = ZhihuExtractor()
         self.enable_comments = zhihu_config.ENABLE_GET_COMMENTS
         self.enable_sub_comments = zhihu_config.ENABLE_GET_SUB_COMMENTS
+        # 批量模式：从文件或标准输入（-a url_file=-）流式读取URL，代替ZHIHU_SPECIFIED_ID_LIST
+        url_file = url_file or zhihu_config.DETAIL_URL_FILE
+        self.url_stream = UrlStream(url_file) if url_file else None
+        self.scheduled = 0
+        self._started_at = 0.0
+        self._last_progress = 0.0
+    
+    async def start(self):
+        """Scrapy 2.13+ 的启动入口（不再调用start_requests）"""
+        if self.url_stream is None:
+            for request in self.start_requests():
+                yield request
+            return
+        
+        # 批量模式：调度队列中的请求达到上限时暂停读取，降到一半再继续，内存占用不随URL总量增长
+        chunk_size = zhihu_config.DETAIL_URL_CHUNK_SIZE
+        self._started_at = self._last_progress = time.monotonic()
+        for request in self.start_requests():
+            yield request
+            if self._pending_requests() >= chunk_size:
+                while self._pending_requests() > chunk_size // 2:
+                    await self._sleep(0.1)
+                self._log_progress()
+        self._log_progress(force=True)
     
     def start_requests(self):
-        """生成初始请求"""
-        for url in zhihu_config.ZHIHU_SPECIFIED_ID_LIST:
+        """生成初始请求：能识别的URL直接请求API，短链接等先用HEAD解析跳转后的地址"""
+        if self.url_stream is not None:
+            urls = self.url_stream
+        else:
             # 移除查询参数
-            url = url.split("?")[0]
-            yield scrapy.Request(url=url, callback=self.parse_content)
+            urls = (url.split("?")[0] for url in zhihu_config.ZHIHU_SPECIFIED_ID_LIST)
+        # 批量模式已按内容去重，跳过Scrapy去重过滤器，避免为每个URL保存请求指纹
+        dont_filter = self.url_stream is not None
+        for url in urls:
+            self.scheduled += 1
+            request = self._content_request(url, dont_filter)
+            if request is not None:
+                yield request
+            else:
+                self.logger.info(f"URL无法直接识别，解析跳转地址: {url}")
+                yield scrapy.Request(url=url, method='HEAD', callback=self.parse_content,
+                                     meta={'frontier_shared': True}, dont_filter=dont_filter)
+    
+    @staticmethod
+    async def _sleep(seconds):
+        # 在函数内导入reactor，避免爬虫模块加载时提前安装默认reactor
+        from twisted.internet import reactor
+        await maybe_deferred_to_future(deferLater(reactor, seconds, lambda: None))
+    
+    def closed(self, reason):
+        if self.url_stream is not None:
+            self._log_progress(force=True)
+    
+    def _pending_requests(self) -> int:
+        """调度队列中等待下载的请求数"""
+        engine = self.crawler.engine
+        # Scrapy 2.13起engine.scheduler为公开属性，之前的版本在engine.slot上
+        scheduler = engine.scheduler if hasattr(engine, 'scheduler') else engine.slot.scheduler
+        return len(scheduler)
+    
+    def _log_progress(self, force=False):
+        """批量模式的读取进度和预计剩余时间"""
+        now = time.monotonic()
+        if not force and now - self._last_progress < zhihu_config.DETAIL_PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        stream = self.url_stream
+        stats = self.crawler.stats
+        stats.set_value('zhihu/detail_urls/read', stream.lines)
+        stats.set_value('zhihu/detail_urls/scheduled', self.scheduled)
+        stats.set_value('zhihu/detail_urls/duplicate', stream.duplicates)
+        stats.set_value('zhihu/detail_urls/invalid', stream.invalid)
+        
+        elapsed = now - self._started_at
+        message = (
+            f"批量详情: 已读取 {stream.lines} 行，调度 {self.scheduled} 条，重复 {stream.duplicates} 条，"
+            f"无效 {stream.invalid} 行，已产出 {stats.get_value('item_scraped_count', 0)} 条数据，"
+            f"用时 {elapsed:.0f}s"
+        )
+        progress = stream.progress
+        if progress:
+            # 读取受调度队列反压，读取速度即爬取速度，按已读字节比例估算
+            eta = elapsed * (1 - progress) / progress
+            message += f"，进度 {progress:.1%}，预计剩余 {eta / 60:.1f} 分钟"
+        self.logger.info(message)
     
     def parse_content(self, response):
-        """解析内容详情"""
-        url = response.url
-        note_type = judge_zhihu_url(url)
+        """解析HEAD请求跟随跳转后的最终地址"""
+        request = self._content_request(response.url)
+        if request is None:
+            self.logger.warning(f"无法识别的内容URL({response.status}): {response.request.url} -> {response.url}")
+            return
+        yield request
+    
+    def _content_request(self, url, dont_filter=False):
+        """按内容URL构造详情API请求，无法识别时返回None（多进程模式下由任意工作进程领取，评论留在该进程中）"""
+        note_type, ids = parse_zhihu_content_url(url)
         
         if note_type == "answer":
             # 解析回答
-            question_id = url.split("/")[-3]
-            answer_id = url.split("/")[-1]
-            yield scrapy.Request(
+            question_id, answer_id = ids
+            return scrapy.Request(
                 url=f"{ZHIHU_URL}/api/v4/questions/{question_id}/answers/{answer_id}",
                 callback=self.parse_answer,
-                meta={'question_id': question_id, 'answer_id': answer_id}
+                meta={'question_id': question_id, 'answer_id': answer_id, 'frontier_shared': True},
+                dont_filter=dont_filter
             )
         elif note_type == "article":
             # 解析文章
-            article_id = url.split("/")[-1]
-            yield scrapy.Request(
+            article_id = ids[0]
+            return scrapy.Request(
                 url=f"{ZHIHU_ZHUANLAN_URL}/api/posts/{article_id}",
                 callback=self.parse_article,
-                meta={'article_id': article_id}
+                meta={'article_id': article_id, 'frontier_shared': True},
+                dont_filter=dont_filter
             )
         elif note_type == "zvideo":
             # 解析视频
-            video_id = url.split("/")[-1]
-            yield scrapy.Request(
+            video_id = ids[0]
+            return scrapy.Request(
                 url=f"{ZHIHU_URL}/api/v4/zvideos/{video_id}",
                 callback=self.parse_video,
-                meta={'video_id': video_id}
+                meta={'video_id': video_id, 'frontier_shared': True},
+                dont_filter=dont_filter
             )
+        return None
     
     def parse_answer(self, response):
         """解析回答"""
         try:
-            data = json.loads(response.text)
+            data = decode_answer_detail(response.body)
             answer_data = data.get('data', {})
             
             # 提取回答内容
-            content_dict = self.extractor.extract_answer_content(answer_data)
-            item = ZhihuContentItem(**content_dict)
+            item = self.extractor.extract_answer_content(answer_data)
             yield item
             
             # 如果启用评论，爬取评论
             if self.enable_comments:
-                content_id = content_dict['content_id']
-                yield scrapy.Request(
-                    url=f"{ZHIHU_URL}/api/v4/comment_v5/answers/{content_id}/root_comment",
-                    callback=self.parse_comments,
-                    meta={'content_id': content_id, 'content_type': 'answer'}
-                )
+                yield self._root_comments_request(item)
         except Exception as e:
             self.logger.error(f"解析回答失败: {e}")
     
     def parse_article(self, response):
         """解析文章"""
         try:
-            data = json.loads(response.text)
+            data = decode_article(response.body)
             
             # 提取文章内容
-            content_dict = self.extractor.extract_article_content(data)
-            item = ZhihuContentItem(**content_dict)
+            item = self.extractor.extract_article_content(data)
             yield item
             
             # 如果启用评论，爬取评论
             if self.enable_comments:
-                content_id = content_dict['content_id']
-                yield scrapy.Request(
-                    url=f"{ZHIHU_URL}/api/v4/comment_v5/articles/{content_id}/root_comment",
-                    callback=self.parse_comments,
-                    meta={'content_id': content_id, 'content_type': 'article'}
-                )
+                yield self._root_comments_request(item)
         except Exception as e:
             self.logger.error(f"解析文章失败: {e}")
     
     def parse_video(self, response):
         """解析视频"""
         try:
-            data = json.loads(response.text)
+            data = decode_video_detail(response.body)
             video_data = data.get('data', {})
             
             # 提取视频内容
-            content_dict = self.extractor.extract_video_content(video_data)
-            item = ZhihuContentItem(**content_dict)
+            item = self.extractor.extract_video_content(video_data)
             yield item
             
             # 如果启用评论，爬取评论
             if self.enable_comments:
-                content_id = content_dict['content_id']
-                yield scrapy.Request(
-                    url=f"{ZHIHU_URL}/api/v4/comment_v5/zvideos/{content_id}/root_comment",
-                    callback=self.parse_comments,
-                    meta={'content_id': content_id, 'content_type': 'zvideo'}
-                )
+                yield self._root_comments_request(item)
         except Exception as e:
             self.logger.error(f"解析视频失败: {e}")
-    
-    def parse_comments(self, response):
-        """解析评论"""
-        try:
-            data = json.loads(response.text)
-            comments_data = data.get('data', [])
-            content_id = response.meta['content_id']
-            content_type = response.meta['content_type']
-            
-            # 提取评论
-            for comment_data in comments_data:
-                if comment_data.get('type') == 'comment':
-                    comment_dict = self.extractor.extract_comment(
-                        comment_data, content_id, content_type
-                    )
-                    item = ZhihuCommentItem(**comment_dict)
-                    yield item
-                    
-                    # 如果启用二级评论且有子评论
-                    if self.enable_sub_comments and comment_dict.get('sub_comment_count', 0) > 0:
-                        comment_id = comment_dict['comment_id']
-                        yield scrapy.Request(
-                            url=f"{ZHIHU_URL}/api/v4/comment_v5/comment/{comment_id}/child_comment",
-                            callback=self.parse_sub_comments,
-                            meta={'content_id': content_id, 'content_type': content_type}
-                        )
-            
-            # 检查是否有下一页
-            paging = data.get('paging', {})
-            if not paging.get('is_end', True):
-                next_url = paging.get('next')
-                if next_url:
-                    yield scrapy.Request(url=next_url, callback=self.parse_comments, meta=response.meta)
-        except Exception as e:
-            self.logger.error(f"解析评论失败: {e}")
-    
-    def parse_sub_comments(self, response):
-        """解析二级评论"""
-        try:
-            data = json.loads(response.text)
-            comments_data = data.get('data', [])
-            content_id = response.meta['content_id']
-            content_type = response.meta['content_type']
-            
-            for comment_data in comments_data:
-                if comment_data.get('type') == 'comment':
-                    comment_dict = self.extractor.extract_comment(
-                        comment_data, content_id, content_type
-                    )
-                    item = ZhihuCommentItem(**comment_dict)
-                    yield item
-            
-            # 检查是否有下一页
-            paging = data.get('paging', {})
-            if not paging.get('is_end', True):
-                next_url = paging.get('next')
-                if next_url:
-                    yield scrapy.Request(url=next_url, callback=self.parse_sub_comments, meta=response.meta)
-        except Exception as e:
-            self.logger.error(f"解析二级评论失败: {e}")
-
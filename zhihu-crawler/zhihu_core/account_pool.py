@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+知乎多账号Cookie池
+
+从账号文件加载多个账号，按轮询或最久未使用分配给请求，
+并按响应记录账号健康状况：连续403的账号自动隔离一段时间。
+"""
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import zhihu_config
+from zhihu_core.utils import convert_str_cookie_to_dict
+
+# 全局账号池
+_ACCOUNT_POOL = None
+_ACCOUNT_POOL_LOCK = threading.Lock()
+
+
+class Account:
+    """
+    单个知乎账号
+    Args:
+        name: 账号名称（用于日志、统计和下载槽位，不包含Cookie内容）
+        cookie_str: Cookie字符串（必须包含d_c0）
+    """
+
+    def __init__(self, name: str, cookie_str: str):
+        self.name = name
+        self.cookie_str = cookie_str
+        self.cookies = convert_str_cookie_to_dict(cookie_str)
+        self.d_c0 = self.cookies.get('d_c0', '')
+        # 从缓存恢复的预热Cookie（[{"name", "value", "domain", "path"}]），分配给第一个请求后清空
+        self.warmup_cookies: List[dict] = []
+        self.last_used = 0.0
+        self.forbidden_streak = 0
+        self.quarantined_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return self.quarantined_until <= now
+
+
+def load_accounts(path: str = "") -> List[Account]:
+    """
+    加载账号
+    账号文件每行一个账号，支持两种格式：
+        纯Cookie字符串
+        JSON对象 {"name": "账号名", "cookies": "Cookie字符串"}
+    空行和#开头的行会被忽略。未配置账号文件时使用COOKIES作为唯一账号。
+    """
+    accounts = []
+    if path:
+        with open(path, mode="r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                name = f"account{len(accounts) + 1}"
+                if line.startswith("{"):
+                    record = json.loads(line)
+                    name = record.get("name") or name
+                    line = record.get("cookies", "")
+                if line:
+                    accounts.append(Account(name, line))
+    elif zhihu_config.COOKIES:
+        accounts.append(Account("default", zhihu_config.COOKIES))
+    return accounts
+
+
+class AccountPool:
+    """
+    账号池
+    Args:
+        accounts: 账号列表
+        strategy: round_robin（轮询） | lru（最久未使用优先）
+        max_forbidden: 连续403达到该次数后隔离账号
+        quarantine_seconds: 隔离时长（秒）
+    """
+
+    def __init__(self, accounts: List[Account], strategy: str = "round_robin",
+                 max_forbidden: int = 3, quarantine_seconds: int = 600):
+        if strategy not in ("round_robin", "lru"):
+            raise ValueError(f"未知的账号分配策略: {strategy}")
+        self.accounts = accounts
+        self.strategy = strategy
+        self.max_forbidden = max_forbidden
+        self.quarantine_seconds = quarantine_seconds
+        self._by_name: Dict[str, Account] = {account.name: account for account in accounts}
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def get(self, name: str) -> Optional[Account]:
+        """按名称查找账号"""
+        return self._by_name.get(name)
+
+    def healthy_count(self) -> int:
+        """当前未被隔离的账号数量"""
+        now = time.time()
+        return sum(1 for account in self.accounts if account.is_healthy(now))
+
+    def acquire(self, exclude: str = "") -> Optional[Account]:
+        """
+        分配一个账号
+        Args:
+            exclude: 不希望分配到的账号名称（例如刚返回403的账号）
+        Returns:
+            健康账号；全部被隔离时返回最早解除隔离的账号，没有账号时返回None
+        """
+        with self._lock:
+            if not self.accounts:
+                return None
+            now = time.time()
+            candidates = [a for a in self.accounts if a.is_healthy(now) and a.name != exclude]
+            if not candidates:
+                account = min(self.accounts, key=lambda a: a.quarantined_until)
+            elif self.strategy == "lru":
+                account = min(candidates, key=lambda a: a.last_used)
+            else:
+                account = None
+                for _ in range(len(self.accounts)):
+                    current = self.accounts[self._cursor]
+                    self._cursor = (self._cursor + 1) % len(self.accounts)
+                    if current in candidates:
+                        account = current
+                        break
+            account.last_used = now
+            return account
+
+    def report(self, account: Account, status: int) -> bool:
+        """
+        记录账号的响应状态
+        Returns:
+            本次是否触发了隔离
+        """
+        with self._lock:
+            if status != 403:
+                if 200 <= status < 300:
+                    account.forbidden_streak = 0
+                return False
+            account.forbidden_streak += 1
+            if account.forbidden_streak >= self.max_forbidden and account.is_healthy(time.time()):
+                account.quarantined_until = time.time() + self.quarantine_seconds
+                account.forbidden_streak = 0
+                return True
+            return False
+
+
+def get_account_pool() -> AccountPool:
+    """获取全局账号池（首次调用时按配置加载）"""
+    global _ACCOUNT_POOL
+    with _ACCOUNT_POOL_LOCK:
+        if _ACCOUNT_POOL is None:
+            _ACCOUNT_POOL = AccountPool(
+                load_accounts(zhihu_config.ACCOUNTS_FILE),
+                zhihu_config.ACCOUNT_STRATEGY,
+                zhihu_config.ACCOUNT_MAX_FORBIDDEN,
+                zhihu_config.ACCOUNT_QUARANTINE_SECONDS,
+            )
+        return _ACCOUNT_POOL
+
+
+def init_account_pool(accounts: List[Account]) -> AccountPool:
+    """用指定账号替换全局账号池（多进程模式下各工作进程只使用分到的账号）"""
+    global _ACCOUNT_POOL
+    with _ACCOUNT_POOL_LOCK:
+        _ACCOUNT_POOL = AccountPool(
+            accounts,
+            zhihu_config.ACCOUNT_STRATEGY,
+            zhihu_config.ACCOUNT_MAX_FORBIDDEN,
+            zhihu_config.ACCOUNT_QUARANTINE_SECONDS,
+        )
+        return _ACCOUNT_POOL
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+断点续爬检查点
+
+记录每个分页单元（创作者主页、回答/想法的offset、评论游标）的状态：
+已调度（在JOBDIR的磁盘队列中） -> 下载中 -> 已完成。
+Scrapy的JOBDIR会持久化调度队列和去重指纹，但进程崩溃时下载中的请求会丢失；
+续爬时只把"下载中"的分页重新发出（仍在队列中的由Scrapy恢复），
+已完成的分页在解析时直接跳过，保证不会重复产出已经写出的数据。
+并行翻页的内容流另外记录翻页范围，续爬时恢复窗口，不会从中断的分页重新开始串行翻页。
+"""
+import json
+import os
+import sqlite3
+from typing import Dict, Iterator, Tuple
+
+# 分页状态
+SCHEDULED = 0
+IN_FLIGHT = 1
+DONE = 2
+
+
+class CrawlCheckpoint:
+    """
+    检查点存储（SQLite，每个分页完成后立即提交）
+    Args:
+        db_path: 数据库文件路径，通常位于JOBDIR下
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "stream TEXT NOT NULL, key TEXT NOT NULL, cursor TEXT NOT NULL, "
+            "url TEXT NOT NULL, callback TEXT NOT NULL, meta TEXT NOT NULL, "
+            "state INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (stream, key, cursor))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fanouts ("
+            "stream TEXT NOT NULL, key TEXT NOT NULL, last_offset INTEGER NOT NULL, "
+            "ended INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (stream, key))"
+        )
+        self._conn.commit()
+
+    def schedule(self, stream: str, key: str, cursor: str, url: str, callback: str, meta: Dict):
+        """登记已调度的分页（已存在时保持原状态）"""
+        self._conn.execute(
+            "INSERT OR IGNORE INTO pages (stream, key, cursor, url, callback, meta) VALUES (?, ?, ?, ?, ?, ?)",
+            (stream, key, cursor, url, callback, json.dumps(meta, ensure_ascii=False)),
+        )
+        self._conn.commit()
+
+    def is_done(self, stream: str, key: str, cursor: str) -> bool:
+        """分页是否已完成"""
+        row = self._conn.execute(
+            "SELECT state FROM pages WHERE stream = ? AND key = ? AND cursor = ?", (stream, key, cursor)
+        ).fetchone()
+        return bool(row and row[0] == DONE)
+
+    def mark_in_flight(self, stream: str, key: str, cursor: str):
+        """标记分页已离开调度队列，开始下载"""
+        self._set_state(stream, key, cursor, IN_FLIGHT)
+
+    def mark_done(self, stream: str, key: str, cursor: str):
+        """标记分页完成（该页的数据和后续请求都已产出）"""
+        self._set_state(stream, key, cursor, DONE)
+
+    def _set_state(self, stream: str, key: str, cursor: str, state: int):
+        self._conn.execute(
+            "UPDATE pages SET state = ? WHERE stream = ? AND key = ? AND cursor = ? AND state < ?",
+            (state, stream, key, cursor, state),
+        )
+        self._conn.commit()
+
+    def lost(self) -> Iterator[Tuple[str, str, str, str, str, Dict]]:
+        """上次运行中断时正在下载的分页，返回 (stream, key, cursor, url, callback名称, meta)"""
+        rows = self._conn.execute(
+            "SELECT stream, key, cursor, url, callback, meta FROM pages WHERE state = ?", (IN_FLIGHT,)
+        ).fetchall()
+        for stream, key, cursor, url, callback, meta in rows:
+            yield stream, key, cursor, url, callback, json.loads(meta)
+
+    def save_fanout(self, stream: str, key: str, last_offset: int, ended: bool):
+        """记录并行翻页的范围（最后一页的offset、是否已到末页）"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO fanouts (stream, key, last_offset, ended) VALUES (?, ?, ?, ?)",
+            (stream, key, last_offset, int(ended)),
+        )
+        self._conn.commit()
+
+    def delete_fanout(self, stream: str, key: str):
+        """并行翻页的内容流已结束"""
+        self._conn.execute("DELETE FROM fanouts WHERE stream = ? AND key = ?", (stream, key))
+        self._conn.commit()
+
+    def fanouts(self) -> Iterator[Tuple[str, str, int, bool, int, int]]:
+        """
+        上次运行中未结束的并行翻页，返回 (stream, key, last_offset, ended, 已调度的最大offset, 未完成的分页数)
+        已调度的分页都在检查点中登记，之后的偏移和在途分页数按登记的分页计算
+        """
+        rows = self._conn.execute(
+            "SELECT f.stream, f.key, f.last_offset, f.ended, "
+            "MAX(CAST(p.cursor AS INTEGER)), COALESCE(SUM(p.state != ?), 0) "
+            "FROM fanouts f LEFT JOIN pages p ON p.stream = f.stream AND p.key = f.key "
+            "GROUP BY f.stream, f.key",
+            (DONE,),
+        ).fetchall()
+        for stream, key, last_offset, ended, max_offset, unfinished in rows:
+            yield stream, key, last_offset, bool(ended), max_offset or 0, unfinished
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的分页数量"""
+        names = {SCHEDULED: "scheduled", IN_FLIGHT: "in_flight", DONE: "done"}
+        rows = self._conn.execute("SELECT state, COUNT(*) FROM pages GROUP BY state").fetchall()
+        return {names[state]: count for state, count in rows}
+
+    def close(self):
+        """关闭数据库"""
+        self._conn.close()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+评论树
+
+一条内容的一级评论按游标串行翻页；二级评论（子评论串）在并发预算内展开，
+按child_comment_count从大到小依次发出。全部分页完成后输出带父子关系的整棵树。
+树只有两层：一级评论和挂在其下的子评论，子评论的parent_comment_id指向实际回复的评论。
+本模块只维护状态，不构造请求。
+"""
+import heapq
+from typing import Dict, List, Optional
+
+
+class CommentTree:
+    """
+    单条内容的评论树
+    Args:
+        content_id / content_type: 所属内容
+        max_depth: 抓取层级，1只抓一级评论，2同时展开二级评论
+        max_count: 每条内容最多抓取的评论数，0为不限
+        child_concurrency: 同时在途的子评论串数
+    """
+
+    def __init__(self, content_id: str, content_type: str, max_depth: int = 2, max_count: int = 0,
+                 child_concurrency: int = 4):
+        self.content_id = content_id
+        self.content_type = content_type
+        self.max_depth = max_depth
+        self.max_count = max_count
+        self.child_concurrency = max(1, child_concurrency)
+        self.nodes: Dict[str, Dict] = {}
+        self.roots: List[str] = []
+        self.truncated = False
+        # 在途的分页请求数（一级评论分页 + 各子评论串当前页），归零时整棵树完成
+        self.pending = 0
+        self.active_threads = 0
+        self._queue: List[tuple] = []
+        self._seq = 0
+
+    @property
+    def full(self) -> bool:
+        """已达到评论数上限"""
+        return bool(self.max_count) and len(self.nodes) >= self.max_count
+
+    @property
+    def complete(self) -> bool:
+        return self.pending == 0 and not self._queue
+
+    def add(self, comment: Dict, thread_root_id: Optional[str] = None) -> bool:
+        """
+        加入一条评论（extract_comment的结果）
+        thread_root_id为空表示一级评论；子评论回复的评论不在树中时挂到所属一级评论下
+        Returns:
+            是否加入（重复或超出上限时返回False）
+        """
+        comment_id = comment['comment_id']
+        if comment_id in self.nodes:
+            return False
+        if self.full:
+            self.truncated = True
+            return False
+
+        if thread_root_id is None:
+            parent_id = ''
+            depth = 1
+            self.roots.append(comment_id)
+        else:
+            # 与知乎的展示一致，子评论都挂在所属一级评论下，parent_comment_id保留实际回复的评论
+            parent_id = comment.get('parent_comment_id') or ''
+            if parent_id not in self.nodes:
+                parent_id = thread_root_id
+            depth = 2
+            root = self.nodes.get(thread_root_id)
+            if root is not None:
+                root['children'].append(comment_id)
+
+        self.nodes[comment_id] = {
+            'comment_id': comment_id,
+            'parent_comment_id': parent_id,
+            'depth': depth,
+            'user_id': comment.get('user_id', ''),
+            'user_nickname': comment.get('user_nickname', ''),
+            'content': comment.get('content', ''),
+            'publish_time': comment.get('publish_time', 0),
+            'like_count': comment.get('like_count', 0),
+            'sub_comment_count': comment.get('sub_comment_count', 0),
+            'children': [],
+        }
+        if thread_root_id is None and self.max_depth >= 2 and comment.get('sub_comment_count', 0) > 0:
+            self._seq += 1
+            heapq.heappush(self._queue, (-comment['sub_comment_count'], self._seq, comment_id))
+        return True
+
+    def take_threads(self) -> List[str]:
+        """取出可以开始展开的子评论串（回复数多的优先），数量不超过剩余并发预算"""
+        if self.full:
+            self.truncated = self.truncated or bool(self._queue)
+            self._queue.clear()
+            return []
+        threads = []
+        while self._queue and self.active_threads < self.child_concurrency:
+            threads.append(heapq.heappop(self._queue)[2])
+            self.active_threads += 1
+            self.pending += 1
+        return threads
+
+    def page_scheduled(self):
+        """一级评论或子评论串的下一页已发出"""
+        self.pending += 1
+
+    def page_finished(self):
+        """一页处理完（成功、失败或跳过）"""
+        self.pending -= 1
+
+    def thread_finished(self):
+        """一个子评论串翻页结束，释放并发预算"""
+        self.active_threads -= 1
+
+    def to_record(self) -> Dict:
+        """整棵树的结构化记录"""
+        def build(comment_id: str) -> Dict:
+            node = dict(self.nodes[comment_id])
+            node['children'] = [dict(self.nodes[child_id], children=[]) for child_id in node['children']]
+            return node
+
+        return {
+            'content_id': self.content_id,
+            'content_type': self.content_type,
+            'comment_count': len(self.nodes),
+            'root_count': len(self.roots),
+            'max_depth': 2 if len(self.nodes) > len(self.roots) else int(bool(self.roots)),
+            'truncated': int(self.truncated),
+            'tree': [build(root_id) for root_id in self.roots],
+        }
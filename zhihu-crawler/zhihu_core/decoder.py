@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+知乎API响应解码
+
+直接从response.body字节解码，只声明ZhihuExtractor用到的字段，
+editable_content、attachment、reaction_instruction等未声明字段在解码时直接跳过。
+未安装msgspec或响应结构与声明不符时，回退为普通dict解码。
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from zhihu_core.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖
+    orjson = None
+
+try:
+    import msgspec
+    from msgspec import UNSET, UnsetType
+except ImportError:  # msgspec为可选加速依赖
+    msgspec = None
+
+
+def _loads(body: bytes) -> Dict:
+    """普通dict解码"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+if msgspec is not None:
+    # 字段缺失时保持UNSET，由get()返回调用方给定的默认值，与dict.get语义一致
+    _Int = Union[int, None, UnsetType]
+    _Str = Union[str, None, UnsetType]
+    _Id = Union[int, str, None, UnsetType]
+
+    class ApiStruct(msgspec.Struct):
+        """带dict风格get()的Struct，供ZhihuExtractor按原有方式取值"""
+
+        def get(self, name: str, default: Any = None) -> Any:
+            value = getattr(self, name, UNSET)
+            return default if value is UNSET else value
+
+    class Author(ApiStruct):
+        id: _Id = UNSET
+        url_token: _Str = UNSET
+        name: _Str = UNSET
+        avatar_url: _Str = UNSET
+        member: Union[Optional["Author"], UnsetType] = UNSET
+
+    class Question(ApiStruct):
+        id: _Id = UNSET
+
+    class Answer(ApiStruct):
+        id: _Id = UNSET
+        question: Union[Optional[Question], UnsetType] = UNSET
+        author: Union[Optional[Author], UnsetType] = UNSET
+        content: _Str = UNSET
+        title: _Str = UNSET
+        description: _Str = UNSET
+        excerpt: _Str = UNSET
+        created_time: _Int = UNSET
+        updated_time: _Int = UNSET
+        voteup_count: _Int = UNSET
+        comment_count: _Int = UNSET
+
+    class Article(ApiStruct):
+        id: _Id = UNSET
+        author: Union[Optional[Author], UnsetType] = UNSET
+        content: _Str = UNSET
+        title: _Str = UNSET
+        excerpt: _Str = UNSET
+        created_time: _Int = UNSET
+        created: _Int = UNSET
+        updated_time: _Int = UNSET
+        updated: _Int = UNSET
+        voteup_count: _Int = UNSET
+        comment_count: _Int = UNSET
+
+    class Video(ApiStruct):
+        id: _Id = UNSET
+        author: Union[Optional[Author], UnsetType] = UNSET
+        title: _Str = UNSET
+        description: _Str = UNSET
+        video: Any = UNSET
+        video_url: _Str = UNSET
+        published_at: _Int = UNSET
+        updated_at: _Int = UNSET
+        created_at: _Int = UNSET
+        voteup_count: _Int = UNSET
+        comment_count: _Int = UNSET
+
+    class PinContent(ApiStruct):
+        type: _Str = UNSET
+        content: Any = UNSET
+        original_url: _Str = UNSET
+        url: _Str = UNSET
+
+    class Pin(ApiStruct):
+        id: _Id = UNSET
+        type: _Str = UNSET
+        author: Union[Optional[Author], UnsetType] = UNSET
+        content: Union[List[PinContent], None, UnsetType] = UNSET
+        url: _Str = UNSET
+        created: _Int = UNSET
+        updated: _Int = UNSET
+        like_count: _Int = UNSET
+        comment_count: _Int = UNSET
+
+    class CommentTag(ApiStruct):
+        type: _Str = UNSET
+        text: _Str = UNSET
+
+    class Comment(ApiStruct):
+        id: _Id = UNSET
+        type: _Str = UNSET
+        reply_comment_id: _Id = UNSET
+        content: _Str = UNSET
+        created_time: _Int = UNSET
+        comment_tag: Union[List[CommentTag], None, UnsetType] = UNSET
+        child_comment_count: _Int = UNSET
+        like_count: _Int = UNSET
+        dislike_count: _Int = UNSET
+        author: Union[Optional[Author], UnsetType] = UNSET
+
+    class Paging(ApiStruct):
+        is_end: Union[bool, None, UnsetType] = UNSET
+        next: _Str = UNSET
+        totals: _Int = UNSET
+
+    class AnswerPage(ApiStruct):
+        data: Union[List[Answer], None, UnsetType] = UNSET
+        paging: Union[Optional[Paging], UnsetType] = UNSET
+
+    class PinPage(ApiStruct):
+        data: Union[List[Pin], None, UnsetType] = UNSET
+        paging: Union[Optional[Paging], UnsetType] = UNSET
+
+    class CommentPage(ApiStruct):
+        data: Union[List[Comment], None, UnsetType] = UNSET
+        paging: Union[Optional[Paging], UnsetType] = UNSET
+
+    class AnswerDetail(ApiStruct):
+        data: Union[Optional[Answer], UnsetType] = UNSET
+
+    class VideoDetail(ApiStruct):
+        data: Union[Optional[Video], UnsetType] = UNSET
+
+    _DECODERS = {
+        "answers": msgspec.json.Decoder(AnswerPage),
+        "pins": msgspec.json.Decoder(PinPage),
+        "comments": msgspec.json.Decoder(CommentPage),
+        "answer": msgspec.json.Decoder(AnswerDetail),
+        "article": msgspec.json.Decoder(Article),
+        "zvideo": msgspec.json.Decoder(VideoDetail),
+    }
+
+
+@timed("decode")
+def _decode(kind: str, body: bytes):
+    """按响应类型解码，结构不符时回退为dict"""
+    if msgspec is not None:
+        try:
+            return _DECODERS[kind].decode(body)
+        except msgspec.ValidationError:
+            pass
+    return _loads(body)
+
+
+def decode_answer_page(body: bytes):
+    """创作者回答列表"""
+    return _decode("answers", body)
+
+
+def decode_pin_page(body: bytes):
+    """创作者想法列表"""
+    return _decode("pins", body)
+
+
+def decode_comment_page(body: bytes):
+    """一级/二级评论列表"""
+    return _decode("comments", body)
+
+
+def decode_answer_detail(body: bytes):
+    """回答详情"""
+    return _decode("answer", body)
+
+
+def decode_article(body: bytes):
+    """文章详情"""
+    return _decode("article", body)
+
+
+def decode_video_detail(body: bytes):
+    """视频详情"""
+    return _decode("zvideo", body)
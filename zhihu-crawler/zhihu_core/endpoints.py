@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+知乎请求的接口分类
+
+耗时统计、请求优先级和自适应限速共用同一张匹配规则表：
+耗时统计和优先级按接口（一级/二级评论、创作者主页分开），限速按接口族合并。
+"""
+import re
+from urllib.parse import urlparse
+
+# 接口匹配规则（按顺序匹配路径）
+ENDPOINT_RULES = [
+    ("root_comment", re.compile(r"/root_comment")),
+    ("child_comment", re.compile(r"/child_comment")),
+    ("answers", re.compile(r"^/api/v4/members/[^/]+/answers")),
+    ("pins", re.compile(r"/pins")),
+    # 回答详情 /api/v4/questions/{q}/answers/{a}、文章详情 /api/posts/{id}（专栏域名）、视频详情 /api/v4/zvideos/{id}
+    ("detail", re.compile(r"^/api/(v4/(questions/\d+/answers|answers|articles|zvideos)|posts)/")),
+    ("api", re.compile(r"^/api/")),
+    ("profile", re.compile(r"^/people/")),
+]
+
+# 限速的接口族：一级/二级评论共用评论接口的限额，创作者主页与其他网页同为page
+_FAMILIES = {
+    "root_comment": "comments",
+    "child_comment": "comments",
+    "profile": "page",
+}
+
+
+def path_endpoint(path: str) -> str:
+    """按请求路径判断接口，非API请求归为page"""
+    for endpoint, pattern in ENDPOINT_RULES:
+        if pattern.search(path):
+            return endpoint
+    return "page"
+
+
+def request_endpoint(url: str) -> str:
+    """按URL判断接口"""
+    return path_endpoint(urlparse(url).path)
+
+
+def endpoint_family(path: str) -> str:
+    """按请求路径判断限速的接口族"""
+    endpoint = path_endpoint(path)
+    return _FAMILIES.get(endpoint, endpoint)
@@ -1,16 +1,32 @@
 # -*- coding: utf-8 -*-
 """
 知乎数据提取器
+
+extract_*方法直接返回数据Item（ZhihuContentItem等），爬虫原样产出，不经过中间dict
 """
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from urllib.parse import parse_qs, urlparse
 
 from parsel import Selector
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖
+    orjson = None
 from scrapy_zhihu.items import ZhihuContentItem, ZhihuCommentItem, ZhihuCreatorItem
 from zhihu_core.constants import ZHIHU_URL, ZHIHU_ZHUANLAN_URL
+from zhihu_core.metrics import timed
 from zhihu_core.utils import extract_text_from_html
 
+_INITIAL_DATA_MARKER = b'id="js-initialData"'
+_SCRIPT_END = b'</script>'
+# 知乎主页的initialData中entities的第一个键就是users，命中时只解析这一棵子树
+_USERS_MARKER = b'"entities":{"users":'
+# 首次只解码users之后的这么多字节，不够再逐步扩大
+_USERS_WINDOW = 64 * 1024
+_JSON_DECODER = json.JSONDecoder()
+
 
 class ZhihuExtractor:
     """知乎数据提取器"""
@@ -18,112 +34,173 @@ class ZhihuExtractor:
     def __init__(self):
         pass
     
-    def extract_creator_from_html(self, user_url_token: str, html_content: str) -> Optional[Dict]:
-        """从HTML中提取创作者信息"""
+    @timed("extract")
+    def extract_creator_from_html(self, user_url_token: str,
+                                  html_content: Union[str, bytes]) -> Optional[ZhihuCreatorItem]:
+        """从HTML中提取创作者信息（可直接传入response.body）"""
         if not html_content:
             return None
         
-        selector = Selector(text=html_content)
-        js_init_data = selector.xpath("//script[@id='js-initialData']/text()").get(default="").strip()
-        if not js_init_data:
-            return None
-        
         try:
-            js_init_data_dict = json.loads(js_init_data)
-            users_info = js_init_data_dict.get("initialState", {}).get("entities", {}).get("users", {})
+            try:
+                users_info = self._extract_users_fast(html_content)
+            except ValueError:
+                users_info = None
+            if users_info is None:
+                users_info = self._extract_users_with_selector(html_content)
             if not users_info:
                 return None
-            
-            # 首先尝试使用URL中的token直接查找
-            creator_info = users_info.get(user_url_token)
-            
-            # 如果找不到，尝试遍历所有用户，通过urlToken匹配
-            if not creator_info:
-                for key, user_info in users_info.items():
-                    # 检查urlToken是否匹配
-                    if user_info.get("urlToken") == user_url_token:
-                        creator_info = user_info
-                        break
-                    # 检查key是否匹配（可能是不同的格式）
-                    if key == user_url_token or key.endswith(f"/{user_url_token}"):
-                        creator_info = user_info
-                        break
-            
-            # 如果还是找不到，且只有一个用户，使用该用户
-            if not creator_info and len(users_info) == 1:
-                creator_info = list(users_info.values())[0]
-            
-            if not creator_info:
-                return None
-            
-            # 使用实际的urlToken（从HTML中提取的）或使用传入的token
-            actual_url_token = creator_info.get("urlToken") or user_url_token
-            
-            return {
-                "user_id": creator_info.get("id"),
-                "user_link": f"{ZHIHU_URL}/people/{actual_url_token}",
-                "user_nickname": creator_info.get("name"),
-                "user_avatar": creator_info.get("avatarUrl"),
-                "url_token": actual_url_token,
-                "gender": self._format_gender_text(creator_info.get("gender")),
-                "ip_location": creator_info.get("ipInfo"),
-                "follows": creator_info.get("followingCount", 0),
-                "fans": creator_info.get("followerCount", 0),
-                "anwser_count": creator_info.get("answerCount", 0),
-                "video_count": creator_info.get("zvideoCount", 0),
-                "question_count": creator_info.get("questionCount", 0),
-                "article_count": creator_info.get("articlesCount", 0),
-                "column_count": creator_info.get("columnsCount", 0),
-                "get_voteup_count": creator_info.get("voteupCount", 0),
-            }
+            return self._build_creator(user_url_token, users_info)
         except Exception as e:
             print(f"[ZhihuExtractor] 提取创作者信息失败: {e}")
             return None
     
-    def extract_answer_content(self, answer: Dict) -> Dict:
+    @staticmethod
+    def _extract_users_fast(html_content: Union[str, bytes]) -> Optional[Dict]:
+        """
+        快速路径：按字节定位js-initialData脚本，只解析entities.users子树；
+        找不到脚本标签时返回None，由Selector路径兜底
+        """
+        body = html_content.encode("utf-8") if isinstance(html_content, str) else html_content
+        marker_pos = body.find(_INITIAL_DATA_MARKER)
+        if marker_pos < 0:
+            return None
+        start = body.find(b">", marker_pos) + 1
+        end = body.find(_SCRIPT_END, start)
+        if start <= 0 or end < 0:
+            return None
+        
+        # 直接在body上按范围查找，避免复制整段initialData
+        users_pos = body.find(_USERS_MARKER, start, end)
+        if users_pos >= 0 and body.find(_USERS_MARKER, users_pos + 1, end) < 0:
+            users_info = ZhihuExtractor._decode_object_at(body, users_pos + len(_USERS_MARKER), end)
+            if isinstance(users_info, dict):
+                return users_info
+        
+        blob = body[start:end].strip()
+        if not blob:
+            return None
+        js_init_data_dict = orjson.loads(blob) if orjson is not None else json.loads(blob)
+        return js_init_data_dict.get("initialState", {}).get("entities", {}).get("users", {})
+    
+    @staticmethod
+    def _decode_object_at(body: bytes, start: int, end: int):
+        """从start处解析一个JSON值，只解码必要长度的字节（截断的对象会解析失败，此时扩大窗口重试）"""
+        window = _USERS_WINDOW
+        while True:
+            chunk = body[start:min(start + window, end)].decode("utf-8", errors="ignore")
+            try:
+                value, _ = _JSON_DECODER.raw_decode(chunk)
+                return value
+            except ValueError:
+                if start + window >= end:
+                    raise
+                window *= 4
+    
+    @staticmethod
+    def _extract_users_with_selector(html_content: Union[str, bytes]) -> Dict:
+        """兜底路径：构建完整DOM后用XPath取js-initialData"""
+        if isinstance(html_content, bytes):
+            html_content = html_content.decode("utf-8", errors="replace")
+        selector = Selector(text=html_content)
+        js_init_data = selector.xpath("//script[@id='js-initialData']/text()").get(default="").strip()
+        if not js_init_data:
+            return {}
+        js_init_data_dict = json.loads(js_init_data)
+        return js_init_data_dict.get("initialState", {}).get("entities", {}).get("users", {})
+    
+    def _build_creator(self, user_url_token: str, users_info: Dict) -> Optional[ZhihuCreatorItem]:
+        """从users实体中找到目标创作者并组装字段"""
+        # 首先尝试使用URL中的token直接查找
+        creator_info = users_info.get(user_url_token)
+        
+        # 如果找不到，尝试遍历所有用户，通过urlToken匹配
+        if not creator_info:
+            for key, user_info in users_info.items():
+                # 检查urlToken是否匹配
+                if user_info.get("urlToken") == user_url_token:
+                    creator_info = user_info
+                    break
+                # 检查key是否匹配（可能是不同的格式）
+                if key == user_url_token or key.endswith(f"/{user_url_token}"):
+                    creator_info = user_info
+                    break
+        
+        # 如果还是找不到，且只有一个用户，使用该用户
+        if not creator_info and len(users_info) == 1:
+            creator_info = list(users_info.values())[0]
+        
+        if not creator_info:
+            return None
+        
+        # 使用实际的urlToken（从HTML中提取的）或使用传入的token
+        actual_url_token = creator_info.get("urlToken") or user_url_token
+        
+        return ZhihuCreatorItem(
+            user_id=creator_info.get("id"),
+            user_link=f"{ZHIHU_URL}/people/{actual_url_token}",
+            user_nickname=creator_info.get("name"),
+            user_avatar=creator_info.get("avatarUrl"),
+            url_token=actual_url_token,
+            gender=self._format_gender_text(creator_info.get("gender")),
+            ip_location=creator_info.get("ipInfo"),
+            follows=creator_info.get("followingCount", 0),
+            fans=creator_info.get("followerCount", 0),
+            anwser_count=creator_info.get("answerCount", 0),
+            video_count=creator_info.get("zvideoCount", 0),
+            question_count=creator_info.get("questionCount", 0),
+            article_count=creator_info.get("articlesCount", 0),
+            column_count=creator_info.get("columnsCount", 0),
+            get_voteup_count=creator_info.get("voteupCount", 0),
+        )
+    
+    @timed("extract")
+    def extract_answer_content(self, answer: Dict) -> ZhihuContentItem:
         """提取回答内容"""
         question = answer.get("question", {})
         author = self._extract_author(answer.get("author"))
         
-        return {
-            "content_id": str(answer.get("id", "")),
-            "content_type": "answer",
-            "content_text": extract_text_from_html(answer.get("content", "")),
-            "question_id": str(question.get("id", "")),
-            "content_url": f"{ZHIHU_URL}/question/{question.get('id')}/answer/{answer.get('id')}",
-            "title": extract_text_from_html(answer.get("title", "")),
-            "desc": extract_text_from_html(answer.get("description", "") or answer.get("excerpt", "")),
-            "created_time": answer.get("created_time", 0),
-            "updated_time": answer.get("updated_time", 0),
-            "voteup_count": answer.get("voteup_count", 0),
-            "comment_count": answer.get("comment_count", 0),
+        return ZhihuContentItem(
+            content_id=str(answer.get("id", "")),
+            content_type="answer",
+            content_text=extract_text_from_html(answer.get("content", "")),
+            question_id=str(question.get("id", "")),
+            content_url=f"{ZHIHU_URL}/question/{question.get('id')}/answer/{answer.get('id')}",
+            title=extract_text_from_html(answer.get("title", "")),
+            desc=extract_text_from_html(answer.get("description", "") or answer.get("excerpt", "")),
+            created_time=answer.get("created_time", 0),
+            updated_time=answer.get("updated_time", 0),
+            voteup_count=answer.get("voteup_count", 0),
+            comment_count=answer.get("comment_count", 0),
             **author
-        }
+        )
     
-    def extract_article_content(self, article: Dict) -> Dict:
+    @timed("extract")
+    def extract_article_content(self, article: Dict) -> ZhihuContentItem:
         """提取文章内容"""
         author = self._extract_author(article.get("author"))
         
-        return {
-            "content_id": str(article.get("id", "")),
-            "content_type": "article",
-            "content_text": extract_text_from_html(article.get("content", "")),
-            "question_id": "",
-            "content_url": f"{ZHIHU_ZHUANLAN_URL}/p/{article.get('id')}",
-            "title": extract_text_from_html(article.get("title", "")),
-            "desc": extract_text_from_html(article.get("excerpt", "")),
-            "created_time": article.get("created_time", 0) or article.get("created", 0),
-            "updated_time": article.get("updated_time", 0) or article.get("updated", 0),
-            "voteup_count": article.get("voteup_count", 0),
-            "comment_count": article.get("comment_count", 0),
+        return ZhihuContentItem(
+            content_id=str(article.get("id", "")),
+            content_type="article",
+            content_text=extract_text_from_html(article.get("content", "")),
+            question_id="",
+            content_url=f"{ZHIHU_ZHUANLAN_URL}/p/{article.get('id')}",
+            title=extract_text_from_html(article.get("title", "")),
+            desc=extract_text_from_html(article.get("excerpt", "")),
+            created_time=article.get("created_time", 0) or article.get("created", 0),
+            updated_time=article.get("updated_time", 0) or article.get("updated", 0),
+            voteup_count=article.get("voteup_count", 0),
+            comment_count=article.get("comment_count", 0),
             **author
-        }
+        )
     
-    def extract_video_content(self, zvideo: Dict) -> Dict:
+    @timed("extract")
+    def extract_video_content(self, zvideo: Dict) -> ZhihuContentItem:
         """提取视频内容"""
         author = self._extract_author(zvideo.get("author"))
         
-        if "video" in zvideo and isinstance(zvideo.get("video"), dict):
+        if isinstance(zvideo.get("video"), dict):
             content_url = f"{ZHIHU_URL}/zvideo/{zvideo.get('id')}"
             created_time = zvideo.get("published_at", 0)
             updated_time = zvideo.get("updated_at", 0)
@@ -132,39 +209,40 @@ class ZhihuExtractor:
             created_time = zvideo.get("created_at", 0)
             updated_time = 0
         
-        return {
-            "content_id": str(zvideo.get("id", "")),
-            "content_type": "zvideo",
-            "content_text": "",  # 视频类型没有文本内容
-            "question_id": "",
-            "content_url": content_url,
-            "title": extract_text_from_html(zvideo.get("title", "")),
-            "desc": extract_text_from_html(zvideo.get("description", "")),
-            "created_time": created_time,
-            "updated_time": updated_time,
-            "voteup_count": zvideo.get("voteup_count", 0),
-            "comment_count": zvideo.get("comment_count", 0),
+        return ZhihuContentItem(
+            content_id=str(zvideo.get("id", "")),
+            content_type="zvideo",
+            content_text="",  # 视频类型没有文本内容
+            question_id="",
+            content_url=content_url,
+            title=extract_text_from_html(zvideo.get("title", "")),
+            desc=extract_text_from_html(zvideo.get("description", "")),
+            created_time=created_time,
+            updated_time=updated_time,
+            voteup_count=zvideo.get("voteup_count", 0),
+            comment_count=zvideo.get("comment_count", 0),
             **author
-        }
+        )
     
-    def extract_comment(self, comment: Dict, content_id: str, content_type: str) -> Dict:
+    @timed("extract")
+    def extract_comment(self, comment: Dict, content_id: str, content_type: str) -> ZhihuCommentItem:
         """提取评论信息"""
         author = self._extract_author(comment.get("author"))
         ip_location = self._extract_comment_ip_location(comment.get("comment_tag", []))
         
-        return {
-            "comment_id": str(comment.get("id", "")),
-            "parent_comment_id": str(comment.get("reply_comment_id", "")),
-            "content": extract_text_from_html(comment.get("content", "")),
-            "publish_time": comment.get("created_time", 0),
-            "ip_location": ip_location,
-            "sub_comment_count": comment.get("child_comment_count", 0),
-            "like_count": comment.get("like_count", 0),
-            "dislike_count": comment.get("dislike_count", 0),
-            "content_id": content_id,
-            "content_type": content_type,
+        return ZhihuCommentItem(
+            comment_id=str(comment.get("id", "")),
+            parent_comment_id=str(comment.get("reply_comment_id", "")),
+            content=extract_text_from_html(comment.get("content", "")),
+            publish_time=comment.get("created_time", 0),
+            ip_location=ip_location,
+            sub_comment_count=comment.get("child_comment_count", 0),
+            like_count=comment.get("like_count", 0),
+            dislike_count=comment.get("dislike_count", 0),
+            content_id=content_id,
+            content_type=content_type,
             **author
-        }
+        )
     
     def _extract_author(self, author: Dict) -> Dict:
         """提取作者信息"""
@@ -213,7 +291,8 @@ class ZhihuExtractor:
         else:
             return "未知"
     
-    def extract_pin_content(self, pin_data: Dict) -> Dict:
+    @timed("extract")
+    def extract_pin_content(self, pin_data: Dict) -> ZhihuContentItem:
         """提取想法内容"""
         pin_id = str(pin_data.get("id", ""))
         author = self._extract_author(pin_data.get("author"))
@@ -239,20 +318,20 @@ class ZhihuExtractor:
         if image_urls:
             content_text += "\n[图片] " + ", ".join(image_urls)
         
-        return {
-            "content_id": pin_id,
-            "content_type": "pin",
-            "content_text": content_text.strip(),
-            "question_id": "",  # 想法没有question_id
-            "content_url": pin_data.get("url", f"{ZHIHU_URL}/pin/{pin_id}"),
-            "title": "",  # 想法没有标题
-            "desc": content_text[:200] if content_text else "",  # 描述取前200字符
-            "created_time": pin_data.get("created", 0),
-            "updated_time": pin_data.get("updated", 0),
-            "voteup_count": pin_data.get("like_count", 0),
-            "comment_count": pin_data.get("comment_count", 0),
+        return ZhihuContentItem(
+            content_id=pin_id,
+            content_type="pin",
+            content_text=content_text.strip(),
+            question_id="",  # 想法没有question_id
+            content_url=pin_data.get("url", f"{ZHIHU_URL}/pin/{pin_id}"),
+            title="",  # 想法没有标题
+            desc=content_text[:200] if content_text else "",  # 描述取前200字符
+            created_time=pin_data.get("created", 0),
+            updated_time=pin_data.get("updated", 0),
+            voteup_count=pin_data.get("like_count", 0),
+            comment_count=pin_data.get("comment_count", 0),
             **author
-        }
+        )
     
     @staticmethod
     def extract_offset(paging_info: Dict) -> str:
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP录制回放存档
+
+把 请求 -> 响应（状态码、响应头、响应体）保存在单个SQLite文件中，响应体zlib压缩。
+按 请求方法 + 规范化URL（查询参数排序）索引，签名等请求头不参与匹配，
+回放时同一URL即可命中录制时的响应。
+"""
+import json
+import os
+import sqlite3
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from w3lib.url import canonicalize_url
+
+# 不写入存档的响应头：Set-Cookie可能包含登录凭证，回放时也不需要
+_SKIPPED_HEADERS = {"set-cookie"}
+
+
+def fixture_key(method: str, url: str) -> str:
+    """存档索引键"""
+    return f"{method.upper()} {canonicalize_url(url)}"
+
+
+class FixtureArchive:
+    """
+    录制回放存档
+    Args:
+        path: 存档文件路径
+        readonly: 只读打开（回放）
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        if readonly:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"回放存档不存在: {path}")
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, "
+            "headers TEXT NOT NULL, body BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def put(self, method: str, url: str, status: int, headers: Dict[str, List[str]], body: bytes):
+        """保存响应（同一请求重复录制时保留最新一次）"""
+        headers = {k: v for k, v in headers.items() if k.lower() not in _SKIPPED_HEADERS}
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, url, status, headers, body) VALUES (?, ?, ?, ?, ?)",
+            (fixture_key(method, url), url, status, json.dumps(headers), zlib.compress(body, 6)),
+        )
+        self._conn.commit()
+
+    def get(self, method: str, url: str) -> Optional[Tuple[int, Dict[str, List[str]], bytes]]:
+        """查找响应，返回 (状态码, 响应头, 响应体)，未录制时返回None"""
+        row = self._conn.execute(
+            "SELECT status, headers, body FROM responses WHERE key = ?", (fixture_key(method, url),)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), zlib.decompress(row[2])
+
+    def set_meta(self, name: str, value):
+        """保存存档元数据（例如录制时的爬取目标，供基准测试回放）"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value, ensure_ascii=False))
+        )
+        self._conn.commit()
+
+    def get_meta(self, name: str, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        """关闭存档"""
+        self._conn.close()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+多进程共享的调度队列（frontier）
+
+同一个SQLite文件（WAL）中保存：
+    requests  待下载的请求，按优先级出队；出队是租约式的，工作进程崩溃后租约到期，请求回到队列
+    seen      去重指纹，所有工作进程共用
+    items     工作进程产出的数据（发件箱），由主进程作为唯一写入者取出保存
+    meta      运行状态（是否已完成种子请求等）
+
+请求和数据都以bytes保存，本模块不依赖Scrapy。换用其他后端（如Redis）时实现同样的方法，
+并在FRONTIER_BACKEND中指定类路径即可，调度器和爬虫不需要改动。
+"""
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+# 请求状态（下载完成的请求直接删除）
+QUEUED = 0
+LEASED = 1
+DEAD = 2
+
+
+class SqliteFrontier:
+    """
+    SQLite调度队列
+    Args:
+        path: 数据库文件路径
+        worker: 工作进程标识，租约记在该标识名下
+        lease_seconds: 租约时长，到期未续约的请求重新入队
+        max_attempts: 同一请求最多被租用的次数，超过后标记为DEAD不再下载
+    """
+
+    def __init__(self, path: str, worker: str = "", lease_seconds: float = 600, max_attempts: int = 3):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # 自动提交模式，需要原子性的操作显式使用 BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS requests ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, priority INTEGER NOT NULL, "
+            "state INTEGER NOT NULL DEFAULT 0, owner TEXT NOT NULL DEFAULT '', "
+            "lease_until REAL NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, payload BLOB NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS requests_queue ON requests (state, priority DESC, id);"
+            "CREATE TABLE IF NOT EXISTS seen (fingerprint BLOB PRIMARY KEY) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+
+    def push(self, payload: bytes, priority: int = 0, fingerprint: Optional[bytes] = None) -> bool:
+        """
+        请求入队；给出fingerprint时先查重
+        Returns:
+            是否入队（重复请求返回False）
+        """
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if fingerprint is not None:
+                if conn.execute("INSERT OR IGNORE INTO seen (fingerprint) VALUES (?)", (fingerprint,)).rowcount == 0:
+                    conn.execute("COMMIT")
+                    return False
+            conn.execute("INSERT INTO requests (priority, payload) VALUES (?, ?)", (priority, payload))
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def lease(self, count: int) -> List[Tuple[int, bytes]]:
+        """按优先级租用最多count个请求，同时回收到期的租约"""
+        conn = self._conn
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE requests SET state = ? WHERE state = ? AND lease_until < ?", (QUEUED, LEASED, now))
+            conn.execute(
+                "UPDATE requests SET state = ? WHERE state = ? AND attempts >= ?", (DEAD, QUEUED, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT id, payload FROM requests WHERE state = ? ORDER BY priority DESC, id LIMIT ?", (QUEUED, count)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE requests SET state = ?, owner = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                [(LEASED, self.worker, now + self.lease_seconds, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def renew(self, ids: List[int]):
+        """为仍在下载的请求续约"""
+        if ids:
+            self._conn.executemany(
+                "UPDATE requests SET lease_until = ? WHERE id = ? AND owner = ? AND state = ?",
+                [(time.time() + self.lease_seconds, request_id, self.worker, LEASED) for request_id in ids],
+            )
+
+    def ack(self, request_id: int):
+        """请求已下载完成"""
+        self._conn.execute("DELETE FROM requests WHERE id = ? AND owner = ?", (request_id, self.worker))
+
+    def release(self, ids: List[int]):
+        """归还租用但未开始下载的请求（不计入租用次数）"""
+        if ids:
+            self._conn.executemany(
+                "UPDATE requests SET state = ?, attempts = attempts - 1 WHERE id = ? AND owner = ? AND state = ?",
+                [(QUEUED, request_id, self.worker, LEASED) for request_id in ids],
+            )
+
+    def release_worker(self, worker: str) -> int:
+        """已退出的工作进程的租约立即回到队列（计入租用次数，反复导致崩溃的请求最终会被放弃）"""
+        return self._conn.execute(
+            "UPDATE requests SET state = ? WHERE owner = ? AND state = ?", (QUEUED, worker, LEASED)
+        ).rowcount
+
+    def release_all(self) -> int:
+        """所有租约回到队列（没有工作进程在运行时，例如续跑前）"""
+        return self._conn.execute(
+            "UPDATE requests SET state = ?, attempts = MAX(attempts - 1, 0) WHERE state = ?", (QUEUED, LEASED)
+        ).rowcount
+
+    def counts(self) -> Tuple[int, int, int]:
+        """(排队中, 租用中, 已放弃) 的请求数"""
+        result = dict(self._conn.execute("SELECT state, COUNT(*) FROM requests GROUP BY state").fetchall())
+        return result.get(QUEUED, 0), result.get(LEASED, 0), result.get(DEAD, 0)
+
+    def queued(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM requests WHERE state = ?", (QUEUED,)).fetchone()[0]
+
+    def unfinished(self) -> int:
+        """排队中和租用中的请求数，为0时所有工作进程都已无事可做"""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM requests WHERE state IN (?, ?)", (QUEUED, LEASED)
+        ).fetchone()[0]
+
+    def put_items(self, rows: List[Tuple[str, bytes]]):
+        """写入一批数据 (类型, 序列化后的数据)"""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO items (kind, payload) VALUES (?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def take_items(self, count: int) -> List[Tuple[int, str, bytes]]:
+        """按写入顺序取出最多count条数据（不删除，保存后调用delete_items）"""
+        return self._conn.execute("SELECT id, kind, payload FROM items ORDER BY id LIMIT ?", (count,)).fetchall()
+
+    def delete_items(self, last_id: int):
+        self._conn.execute("DELETE FROM items WHERE id <= ?", (last_id,))
+
+    def get_meta(self, key: str, default: str = "") -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+爬取各阶段耗时统计
+
+按 (阶段, 接口) 汇总耗时直方图，阶段包括下载、签名、各中间件process_request、
+回调、API解码、字段提取和Pipeline；接口为回答列表、想法列表、一级/二级评论、详情等。
+未开启METRICS_ENABLED时计时装饰器直接调用原函数，几乎没有额外开销。
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from zhihu_core.endpoints import request_endpoint
+
+# 直方图桶上界（秒），覆盖纯Python解析的几十微秒到慢请求的数十秒
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    """固定桶耗时直方图"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """按桶内线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+
+class StageMetrics:
+    """
+    各阶段耗时汇总
+    签名在线程池中执行，observe加锁；回调在reactor线程中顺序执行，
+    current_endpoint记录正在执行的回调对应的接口，供解码、提取等阶段归类
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.current_endpoint = "page"
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._items: Dict[str, int] = {}
+
+    def observe(self, stage: str, endpoint: str, seconds: float):
+        """记录一次耗时"""
+        key = (stage, endpoint)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def count_items(self, endpoint: str, count: int = 1):
+        """记录回调产出的数据条数"""
+        with self._lock:
+            self._items[endpoint] = self._items.get(endpoint, 0) + count
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._items.clear()
+
+    def to_stats(self) -> Dict[str, float]:
+        """转换为Scrapy stats键值（毫秒）"""
+        stats: Dict[str, float] = {}
+        with self._lock:
+            for (stage, endpoint), histogram in sorted(self._histograms.items()):
+                prefix = f"zhihu/timing/{stage}/{endpoint}"
+                stats[f"{prefix}/count"] = histogram.count
+                stats[f"{prefix}/total_s"] = round(histogram.total, 3)
+                stats[f"{prefix}/mean_ms"] = round(histogram.total / histogram.count * 1000, 3)
+                for q in (0.5, 0.95, 0.99):
+                    stats[f"{prefix}/p{int(q * 100)}_ms"] = round(histogram.quantile(q) * 1000, 3)
+                stats[f"{prefix}/max_ms"] = round(histogram.max * 1000, 3)
+            for endpoint, count in sorted(self._items.items()):
+                stats[f"zhihu/timing/callback/{endpoint}/items"] = count
+        return stats
+
+    def to_prometheus(self) -> str:
+        """Prometheus文本格式"""
+        lines: List[str] = [
+            "# HELP zhihu_stage_seconds Time spent per crawl stage and endpoint.",
+            "# TYPE zhihu_stage_seconds histogram",
+        ]
+        with self._lock:
+            for (stage, endpoint), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",endpoint="{endpoint}"'
+                cumulative = 0
+                for upper, bucket_count in zip(BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'zhihu_stage_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+                lines.append(f'zhihu_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"zhihu_stage_seconds_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"zhihu_stage_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# HELP zhihu_callback_items_total Items yielded by spider callbacks.")
+            lines.append("# TYPE zhihu_callback_items_total counter")
+            for endpoint, count in sorted(self._items.items()):
+                lines.append(f'zhihu_callback_items_total{{endpoint="{endpoint}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+_METRICS = StageMetrics()
+
+# Pipeline阶段按数据类型归类
+_ITEM_KINDS = {
+    "ZhihuContentItem": "content",
+    "ZhihuCommentItem": "comment",
+    "ZhihuCreatorItem": "creator",
+    "ZhihuCommentTreeItem": "comment_tree",
+}
+
+
+def get_metrics() -> StageMetrics:
+    """获取全局耗时统计"""
+    return _METRICS
+
+
+def by_request(self, request, *args, **kwargs) -> str:
+    """从中间件方法的request参数取接口（结果连同URL缓存在meta中，meta被复制到下一页请求时不会误用）"""
+    cached = request.meta.get("zhihu_endpoint")
+    if cached is None or cached[0] != request.url:
+        cached = request.meta["zhihu_endpoint"] = (request.url, request_endpoint(request.url))
+    return cached[1]
+
+
+def by_item(self, item, *args, **kwargs) -> str:
+    """从Pipeline的item参数取数据类型（content/comment/creator）"""
+    return _ITEM_KINDS.get(type(item).__name__, "other")
+
+
+def timed(stage: str, endpoint_of: Optional[Callable[..., str]] = None):
+    """
+    计时装饰器
+    Args:
+        stage: 阶段名称
+        endpoint_of: 从被装饰函数的参数取接口名，缺省使用当前回调的接口
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _METRICS
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            endpoint = endpoint_of(*args, **kwargs) if endpoint_of else metrics.current_endpoint
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(stage, endpoint, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+请求优先级策略
+
+按接口分档（主页 > 内容列表 > 一级评论 > 二级评论），档内按所属内容的新旧或赞同数排序。
+同一创作者在调度队列中的请求超过公平份额后，新请求逐级降低优先级（仍在本档内），
+让其他创作者的同档请求先下载，高产创作者不会饿死其他创作者。
+"""
+import math
+import time
+from typing import Dict, Optional
+
+# 档内排序级数，各档的基准优先级至少相隔 RANK_LEVELS * RANK_LEVELS
+RANK_LEVELS = 10
+
+
+class PriorityPolicy:
+    """
+    Args:
+        priorities: 接口 -> 基准优先级（数值越大越先下载），未列出的接口为0
+        order: 评论按所属内容排序，newest（发布越新越先） | voteup（赞同越多越先）
+        fair_share: 每个创作者在调度队列中的请求数份额，0为不限
+    """
+
+    def __init__(self, priorities: Dict[str, int], order: str = "newest", fair_share: int = 0):
+        if order not in ("newest", "voteup"):
+            raise ValueError(f"不支持的评论排序: {order}")
+        self.priorities = priorities
+        self.order = order
+        self.fair_share = fair_share
+        # 创作者 -> 已进入调度队列、尚未开始下载的请求数
+        self.queued: Dict[str, int] = {}
+
+    def content_rank(self, created_time: int, voteup_count: int, now: Optional[float] = None) -> int:
+        """所属内容的档内排序（0~RANK_LEVELS-1，越大越先），按对数分级"""
+        if self.order == "voteup":
+            return min(RANK_LEVELS - 1, int(math.log2(max(voteup_count, 0) + 1)) // 2)
+        if not created_time:
+            return 0
+        age_days = max(0.0, ((now or time.time()) - created_time) / 86400)
+        return max(0, RANK_LEVELS - 1 - int(math.log2(age_days + 1)))
+
+    def penalty(self, owner: str) -> int:
+        """创作者超出公平份额的级数"""
+        if not owner or not self.fair_share:
+            return 0
+        return min(RANK_LEVELS - 1, self.queued.get(owner, 0) // self.fair_share)
+
+    def priority(self, endpoint: str, rank: int = 0, owner: str = "") -> int:
+        return self.priorities.get(endpoint, 0) + rank - self.penalty(owner) * RANK_LEVELS
+
+    def request_queued(self, owner: str):
+        if owner:
+            self.queued[owner] = self.queued.get(owner, 0) + 1
+
+    def request_dequeued(self, owner: str):
+        if owner in self.queued:
+            self.queued[owner] -= 1
+            if self.queued[owner] <= 0:
+                del self.queued[owner]
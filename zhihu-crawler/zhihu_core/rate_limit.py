@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+知乎接口自适应限速
+
+按接口族（回答列表、想法、评论、详情、页面等，见zhihu_core.endpoints）和账号各维护一个令牌桶，
+根据响应按AIMD调整速率：正常响应缓慢加速，403/429或响应过慢时成倍减速。
+"""
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    令牌桶（预约式）：每次取令牌返回需要等待的秒数，令牌可以透支，
+    多个请求依次排队，实际发出间隔为1/rate
+    Args:
+        rate: 每秒发放的令牌数
+        burst: 桶容量，允许的突发请求数
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    def set_rate(self, rate: float):
+        """调整速率（已透支的令牌按新速率偿还）"""
+        self._refill(time.monotonic())
+        self.rate = rate
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（例如遵循Retry-After）"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class AimdRateController:
+    """
+    AIMD速率控制
+    Args:
+        initial_rates: 各接口族的初始速率（次/秒），未列出的使用default
+        min_rate / max_rate: 速率上下限
+        increase: 持续正常响应时每秒增加的速率
+        decrease: 被限流时速率乘以的系数
+        latency_target: 响应耗时超过该值（秒）时视为过载，轻微减速
+        burst: 令牌桶容量
+    """
+
+    def __init__(self, initial_rates: Dict[str, float], min_rate: float = 0.05, max_rate: float = 5.0,
+                 increase: float = 0.05, decrease: float = 0.5, latency_target: float = 3.0, burst: float = 1.0):
+        self.initial_rates = initial_rates
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.burst = burst
+        self.buckets: Dict[tuple, TokenBucket] = {}
+        self._last_decrease: Dict[tuple, float] = {}
+
+    def bucket(self, family: str, account: str = "") -> TokenBucket:
+        """获取接口族+账号对应的令牌桶"""
+        key = (family, account)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate = self.initial_rates.get(family, self.initial_rates.get("default", 0.5))
+            bucket = self.buckets[key] = TokenBucket(rate, self.burst)
+        return bucket
+
+    def on_response(self, family: str, account: str, status: int, latency: float,
+                    retry_after: Optional[float] = None) -> str:
+        """
+        根据响应调整速率
+        Returns:
+            increase | decrease | hold
+        """
+        bucket = self.bucket(family, account)
+        if status in (403, 429):
+            if retry_after:
+                bucket.pause(retry_after)
+            return "decrease" if self._decrease(family, account, bucket, self.decrease) else "hold"
+        if status >= 500 or (latency and latency > self.latency_target):
+            # 服务端变慢：温和减速
+            factor = (1 + self.decrease) / 2
+            return "decrease" if self._decrease(family, account, bucket, factor) else "hold"
+        if 200 <= status < 300:
+            # 加法增长：每个响应增加increase/rate，相当于每秒增加increase
+            bucket.set_rate(min(self.max_rate, bucket.rate + self.increase / bucket.rate))
+            return "increase"
+        return "hold"
+
+    def _decrease(self, family: str, account: str, bucket: TokenBucket, factor: float) -> bool:
+        """乘法减速；同一冷却期内（减速前已发出的请求陆续返回）只减一次"""
+        key = (family, account)
+        now = time.monotonic()
+        if now - self._last_decrease.get(key, 0.0) < max(1.0, 1.0 / bucket.rate):
+            return False
+        self._last_decrease[key] = now
+        bucket.set_rate(max(self.min_rate, bucket.rate * factor))
+        return True
+
+    def family_rates(self) -> Dict[str, float]:
+        """各接口族的当前总速率（所有账号之和）"""
+        rates: Dict[str, float] = {}
+        for (family, _), bucket in self.buckets.items():
+            rates[family] = rates.get(family, 0.0) + bucket.rate
+        return rates
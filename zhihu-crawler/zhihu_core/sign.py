@@ -1,13 +1,372 @@
 # -*- coding: utf-8 -*-
 """
 知乎API签名
+
+默认通过常驻的Node进程池完成：每个worker启动时预加载libs/zhihu.js，
+之后通过stdin/stdout管道逐行交换JSON，避免每次签名都重新拉起node进程。
+配置 SIGN_ENGINE = "python" 时改用 zhihu_core.native_sign 的纯Python实现。
 """
+import json
 import os
-import execjs
-from typing import Dict
+import queue
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import zhihu_config
+from zhihu_core.native_sign import NativeSigner
+
+JS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "libs", "zhihu.js")
+
+# 单个worker一次最多写入的未应答请求数，避免管道缓冲区写满导致双向阻塞
+_PIPELINE_DEPTH = 32
+
+# 追加在zhihu.js之后的驱动代码：逐行读取 {"id", "url", "cookies"}，逐行输出签名结果
+_WORKER_DRIVER_JS = r"""
+;(function () {
+    const readline = require('readline');
+    const rl = readline.createInterface({input: process.stdin, terminal: false});
+    rl.on('line', function (line) {
+        let res;
+        try {
+            const req = JSON.parse(line);
+            try {
+                res = {id: req.id, result: get_sign(req.url, req.cookies)};
+            } catch (e) {
+                res = {id: req.id, error: String(e)};
+            }
+        } catch (e) {
+            res = {id: null, error: String(e)};
+        }
+        process.stdout.write(JSON.stringify(res) + '\n');
+    });
+})();
+"""
+
+# 全局签名进程池
+_SIGN_POOL = None
+_SIGN_POOL_LOCK = threading.Lock()
+
+
+def _find_node() -> str:
+    """查找Node运行时"""
+    node_bin = shutil.which("node") or shutil.which("nodejs")
+    if not node_bin:
+        raise RuntimeError("未找到Node运行时，知乎签名依赖node执行libs/zhihu.js")
+    return node_bin
+
+
+class _SignWorker:
+    """常驻的Node签名进程"""
+
+    def __init__(self, node_bin: str, js_source: str):
+        self.node_bin = node_bin
+        self.js_source = js_source
+        self.proc = None
+        self._seq = 0
+        self._start()
+
+    def _start(self):
+        """启动node进程"""
+        self.proc = subprocess.Popen(
+            [self.node_bin, "-e", self.js_source],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            bufsize=1,
+        )
+
+    def _ensure_alive(self):
+        """进程意外退出时重新拉起"""
+        if self.proc is None or self.proc.poll() is not None:
+            self._start()
+
+    def call_many(self, urls: Sequence[str], cookies: str) -> List[Dict]:
+        """按顺序签名多个URL，分批流水线写入以减少往返等待"""
+        self._ensure_alive()
+        results = []
+        try:
+            for start in range(0, len(urls), _PIPELINE_DEPTH):
+                chunk = urls[start:start + _PIPELINE_DEPTH]
+                ids = []
+                for url in chunk:
+                    self._seq += 1
+                    ids.append(self._seq)
+                    self.proc.stdin.write(json.dumps({"id": self._seq, "url": url, "cookies": cookies}) + "\n")
+                self.proc.stdin.flush()
 
-# 全局变量存储编译后的JS
-_ZHIHU_SIGN_JS = None
+                for req_id in ids:
+                    line = self.proc.stdout.readline()
+                    if not line:
+                        raise RuntimeError("签名进程意外退出")
+                    res = json.loads(line)
+                    if res.get("id") != req_id:
+                        raise RuntimeError(f"签名进程响应错位: 期望{req_id}, 实际{res.get('id')}")
+                    if "error" in res:
+                        raise RuntimeError(f"签名失败: {res['error']}")
+                    results.append(res["result"])
+        except (OSError, ValueError, RuntimeError):
+            # 进程状态已不可信，下次使用前重启
+            self.close()
+            raise
+        return results
+
+    def close(self):
+        """关闭node进程"""
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        if self.proc.stdout:
+            self.proc.stdout.close()
+        self.proc = None
+
+
+class ZhihuSignPool:
+    """
+    知乎签名进程池
+    Args:
+        size: worker数量，默认按CPU核数设置
+        js_path: 签名JS文件路径
+    """
+
+    def __init__(self, size: Optional[int] = None, js_path: str = JS_PATH):
+        self.size = size or os.cpu_count() or 1
+        with open(js_path, mode="r", encoding="utf-8-sig") as f:
+            js_source = f.read() + _WORKER_DRIVER_JS
+
+        node_bin = _find_node()
+        self._workers = [_SignWorker(node_bin, js_source) for _ in range(self.size)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._executor = None
+        self._closed = False
+
+    def sign(self, url: str, cookies: str) -> Dict:
+        """签名单个URL（线程安全，worker全忙时阻塞等待）"""
+        return self._call([url], cookies)[0]
+
+    def sign_many(self, paths: Sequence[str], cookies: str) -> List[Dict]:
+        """
+        批量签名，按worker数量切分后并行执行
+        Args:
+            paths: 相对路径列表（包含查询参数）
+            cookies: 请求Cookie字符串（必须包含d_c0）
+        Returns:
+            与paths顺序一致的签名结果列表
+        """
+        paths = list(paths)
+        if not paths:
+            return []
+        if len(paths) <= _PIPELINE_DEPTH or self.size == 1:
+            return self._call(paths, cookies)
+
+        chunk_size = -(-len(paths) // self.size)
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="zhihu-sign")
+        results = []
+        for chunk_result in self._executor.map(lambda chunk: self._call(chunk, cookies), chunks):
+            results.extend(chunk_result)
+        return results
+
+    def _call(self, urls: Sequence[str], cookies: str) -> List[Dict]:
+        """借出一个空闲worker执行签名"""
+        if self._closed:
+            raise RuntimeError("签名进程池已关闭")
+        worker = self._idle.get()
+        try:
+            return worker.call_many(urls, cookies)
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        """关闭所有worker"""
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for worker in self._workers:
+            worker.close()
+
+
+class SignCache:
+    """
+    签名LRU缓存，签名只取决于相对路径和d_c0，相同请求（重试、重复分页）可直接复用
+    Args:
+        max_size: 内存中最多缓存的签名数量
+        spill_path: 可选的SQLite文件路径，被淘汰及关闭时的签名写入磁盘，跨运行复用
+        spill_batch: 被淘汰的签名攒够该数量后一次写入磁盘
+        spill_interval: 距上次写入超过该秒数时，不足一批也写入磁盘
+    """
+
+    def __init__(self, max_size: int = 10000, spill_path: str = "", spill_batch: int = 500,
+                 spill_interval: float = 5.0):
+        self.max_size = max_size
+        self.spill_batch = spill_batch
+        self.spill_interval = spill_interval
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 已淘汰、等待写入磁盘的签名；_flushing为正在写入的一批，写完之前查询仍可命中
+        self._pending: Dict[Tuple[str, str], Dict] = {}
+        self._flushing: Dict[Tuple[str, str], Dict] = {}
+        self._last_flush = time.monotonic()
+        # 磁盘读写使用单独的锁，写入时不阻塞内存中的查询
+        self._db_lock = threading.Lock()
+        self._db = None
+        if spill_path:
+            os.makedirs(os.path.dirname(os.path.abspath(spill_path)), exist_ok=True)
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sign_cache ("
+                "path TEXT NOT NULL, d_c0 TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (path, d_c0))"
+            )
+            self._db.commit()
+
+    def get(self, path: str, d_c0: str) -> Optional[Dict]:
+        """查询缓存，内存未命中时再查磁盘"""
+        key = (path, d_c0)
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            value = self._pending.get(key) or self._flushing.get(key)
+            if value is not None:
+                self._put_locked(key, value)
+                self.hits += 1
+                return value
+            if self._db is None:
+                self.misses += 1
+                return None
+        with self._db_lock:
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM sign_cache WHERE path = ? AND d_c0 = ?", key
+                ).fetchone()
+        with self._lock:
+            if not row:
+                self.misses += 1
+                return None
+            value = json.loads(row[0])
+            self._put_locked(key, value)
+            self.hits += 1
+            batch = self._take_batch_locked()
+        self._spill(batch)
+        return value
+
+    def put(self, path: str, d_c0: str, value: Dict):
+        """写入缓存"""
+        with self._lock:
+            self._put_locked((path, d_c0), value)
+            batch = self._take_batch_locked()
+        self._spill(batch)
+
+    def _put_locked(self, key: Tuple[str, str], value: Dict):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._pending.pop(key, None)
+        while len(self._data) > self.max_size:
+            old_key, old_value = self._data.popitem(last=False)
+            if self._db is not None:
+                self._pending[old_key] = old_value
+
+    def _take_batch_locked(self) -> Dict[Tuple[str, str], Dict]:
+        """待写入的签名攒够一批或超过写入间隔时取出（之后在锁外写入磁盘）"""
+        if not self._pending or self._flushing:
+            return {}
+        now = time.monotonic()
+        if len(self._pending) < self.spill_batch and now - self._last_flush < self.spill_interval:
+            return {}
+        self._flushing, self._pending = self._pending, {}
+        self._last_flush = now
+        return self._flushing
+
+    def _spill(self, entries: Dict[Tuple[str, str], Dict]):
+        """把一批签名写入磁盘（一次提交）"""
+        if not entries:
+            return
+        try:
+            with self._db_lock:
+                self._write_locked(entries)
+        finally:
+            with self._lock:
+                if self._flushing is entries:
+                    self._flushing = {}
+
+    def _write_locked(self, entries: Dict[Tuple[str, str], Dict]):
+        if self._db is None or not entries:
+            return
+        self._db.executemany(
+            "INSERT OR REPLACE INTO sign_cache (path, d_c0, value) VALUES (?, ?, ?)",
+            [(key[0], key[1], json.dumps(value)) for key, value in entries.items()],
+        )
+        self._db.commit()
+
+    def __len__(self):
+        return len(self._data)
+
+    def close(self):
+        """关闭缓存，内存中和等待写入的签名全部落盘"""
+        with self._lock:
+            entries = {**self._flushing, **self._pending, **self._data}
+            self._pending = {}
+        with self._db_lock:
+            if self._db is not None:
+                self._write_locked(entries)
+                self._db.close()
+                self._db = None
+
+
+def get_sign_pool(size: Optional[int] = None) -> ZhihuSignPool:
+    """获取全局签名进程池（首次调用时创建）"""
+    global _SIGN_POOL
+    with _SIGN_POOL_LOCK:
+        if _SIGN_POOL is None or _SIGN_POOL._closed:
+            _SIGN_POOL = ZhihuSignPool(size)
+        return _SIGN_POOL
+
+
+def get_signer(engine: str = "node", size: Optional[int] = None):
+    """
+    按签名引擎获取签名器，返回对象均提供 sign / sign_many / close
+    Args:
+        engine: node（常驻Node进程池执行libs/zhihu.js） | python（纯Python实现）
+        size: node引擎的worker数量
+    """
+    if engine == "python":
+        return NativeSigner()
+    if engine == "node":
+        return get_sign_pool(size)
+    raise ValueError(f"未知的签名引擎: {engine}")
+
+
+def close_sign_pool():
+    """关闭全局签名进程池"""
+    global _SIGN_POOL
+    with _SIGN_POOL_LOCK:
+        if _SIGN_POOL is not None:
+            _SIGN_POOL.close()
+            _SIGN_POOL = None
 
 
 def sign(url: str, cookies: str) -> Dict:
@@ -19,11 +378,16 @@ def sign(url: str, cookies: str) -> Dict:
     Returns:
         包含签名信息的字典
     """
-    global _ZHIHU_SIGN_JS
-    if not _ZHIHU_SIGN_JS:
-        js_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "libs", "zhihu.js")
-        with open(js_path, mode="r", encoding="utf-8-sig") as f:
-            _ZHIHU_SIGN_JS = execjs.compile(f.read())
-    
-    return _ZHIHU_SIGN_JS.call("get_sign", url, cookies)
+    return get_signer(zhihu_config.SIGN_ENGINE).sign(url, cookies)
+
 
+def sign_many(paths: Sequence[str], cookies: str) -> List[Dict]:
+    """
+    批量知乎签名
+    Args:
+        paths: 请求URL列表（包含查询参数）
+        cookies: 请求Cookie字符串（必须包含d_c0）
+    Returns:
+        与paths顺序一致的签名结果列表
+    """
+    return get_signer(zhihu_config.SIGN_ENGINE).sign_many(paths, cookies)
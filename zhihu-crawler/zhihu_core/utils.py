@@ -2,19 +2,112 @@
 """
 工具函数
 """
+import html as html_lib
 import re
-from typing import Dict
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from config import zhihu_config
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml为可选加速后端
+    etree = None
+    lxml_html = None
+
+# HTML转文本后端: python（预编译正则） | lxml（需安装lxml）
+_USE_LXML = zhihu_config.HTML_TEXT_BACKEND == 'lxml' and lxml_html is not None
+
+# 预编译的HTML清理正则（不使用IGNORECASE，知乎返回的标签均为小写，避免逐字符大小写匹配的开销）
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+# 产生换行的块级标签
+_BLOCK_TAG_RE = re.compile(
+    r'</?(?:p|div|br|hr|li|ul|ol|dl|dt|dd|tr|table|h[1-6]|blockquote|pre|figure|figcaption'
+    r'|section|article|header|footer)(?=[\s/>])[^>]*>'
+)
+# 其余标签、声明；只有"<"后紧跟字母、"/"、"!"或"?"时才视为标签，保留"a < b"这类文本
+_TAG_RE = re.compile(r'<[A-Za-z/!?][^>]*>')
+_MULTI_NEWLINE_RE = re.compile(r'\n\n+')
+
+# 常见实体直接用str.replace解码；&amp;必须最后处理，避免"&amp;lt;"被二次解码
+_COMMON_ENTITIES = (
+    ('&lt;', '<'), ('&gt;', '>'), ('&quot;', '"'), ('&#34;', '"'), ('&#39;', "'"), ('&nbsp;', '\xa0'),
+)
+
+# 块级标签集合（lxml后端使用）
+_BLOCK_TAGS = frozenset({
+    'p', 'div', 'br', 'hr', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'tr', 'table',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'figure', 'figcaption',
+    'section', 'article', 'header', 'footer',
+})
+
+
+def _extract_text_python(html: str) -> str:
+    """
+    预编译正则清理HTML：块级标签替换为换行，其余标签移除，最后解码实体。
+    每一步都是C层面的整串替换；纯文本（标题、多数评论）直接跳过。
+    """
+    if '<' in html:
+        if '<script' in html or '<style' in html:
+            html = _SCRIPT_STYLE_RE.sub('', html)
+        if '<!--' in html:
+            html = _COMMENT_RE.sub('', html)
+        html = _BLOCK_TAG_RE.sub('\n', html)
+        html = _TAG_RE.sub('', html)
+        if '\n\n' in html:
+            html = _MULTI_NEWLINE_RE.sub('\n', html)
+    if '&' in html:
+        html = _unescape_entities(html)
+    return html.strip()
+
+
+def _unescape_entities(text: str) -> str:
+    """解码HTML实体，结果与html.unescape一致"""
+    for entity, char in _COMMON_ENTITIES:
+        if entity in text:
+            text = text.replace(entity, char)
+    if '&' in text:
+        if text.count('&') == text.count('&amp;'):
+            text = text.replace('&amp;', '&')
+        else:
+            text = html_lib.unescape(text)
+    return text
+
+
+def _extract_text_lxml(html: str) -> str:
+    """lxml(C实现)解析后按块级标签换行输出文本"""
+    root = lxml_html.fragment_fromstring(html, create_parent='div')
+    etree.strip_elements(root, 'script', 'style', etree.Comment, etree.ProcessingInstruction, with_tail=False)
+
+    parts: List[str] = []
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        is_block = element.tag in _BLOCK_TAGS
+        if event == 'start':
+            if is_block and parts and not parts[-1].endswith('\n'):
+                parts.append('\n')
+            if element.text:
+                parts.append(element.text)
+        else:
+            if is_block and parts and not parts[-1].endswith('\n'):
+                parts.append('\n')
+            if element.tail and element is not root:
+                parts.append(element.tail)
+    # 与python后端一致：块级标签之间源码中的换行也合并为一个
+    text = ''.join(parts)
+    if '\n\n' in text:
+        text = _MULTI_NEWLINE_RE.sub('\n', text)
+    return text.strip()
 
 
 def extract_text_from_html(html: str) -> str:
-    """从HTML中提取纯文本，移除所有标签"""
+    """从HTML中提取纯文本：移除标签、解码HTML实体并保留段落换行"""
     if not html:
         return ""
-    # 移除script和style元素
-    clean_html = re.sub(r'<(script|style)[^>]*>.*?</\1>', '', html, flags=re.DOTALL)
-    # 移除所有其他标签
-    clean_text = re.sub(r'<[^>]+>', '', clean_html).strip()
-    return clean_text
+    if _USE_LXML:
+        return _extract_text_lxml(html)
+    return _extract_text_python(html)
 
 
 def convert_str_cookie_to_dict(cookie_str: str) -> Dict[str, str]:
@@ -44,3 +137,25 @@ def judge_zhihu_url(url: str) -> str:
     else:
         return "unknown"
 
+
+# 各类内容URL中的ID（只匹配路径，忽略域名、查询参数和末尾斜杠）
+_CONTENT_ID_RES = {
+    "answer": re.compile(r"/question/(\d+)/answer/(\d+)"),
+    "article": re.compile(r"/p/(\d+)"),
+    "zvideo": re.compile(r"/zvideo/(\d+)"),
+}
+
+
+def parse_zhihu_content_url(url: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    解析内容URL的类型和ID
+    Returns:
+        (类型, ID元组)：answer为(question_id, answer_id)，article/zvideo为(内容ID,)；
+        短链接等无法识别的URL返回 ("unknown", ())
+    """
+    note_type = judge_zhihu_url(url)
+    pattern = _CONTENT_ID_RES.get(note_type)
+    match = pattern.search(urlparse(url).path) if pattern else None
+    if match is None:
+        return "unknown", ()
+    return note_type, match.groups()
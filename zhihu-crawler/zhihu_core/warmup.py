@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+预热会话缓存
+
+创作者模式开始前访问一次搜索页，由其Set-Cookie得到后续请求需要的Cookie。
+按账号保存这些Cookie及其过期时间，下次运行（或其他并行的任务）在未过期时直接复用，
+不再重复访问搜索页；Cookie过期或账号返回403时作废，重新预热。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from http.cookiejar import http2time
+from http.cookies import CookieError, SimpleCookie
+from typing import Iterable, List, Optional
+
+
+def parse_set_cookies(lines: Iterable[str], now: Optional[float] = None) -> List[dict]:
+    """
+    解析响应的Set-Cookie
+    Returns:
+        [{"name", "value", "domain", "path", "expires"}]，expires为过期时间戳（会话Cookie为None），
+        已过期（即服务端要求删除）的Cookie不返回
+    """
+    now = time.time() if now is None else now
+    cookies = []
+    for line in lines:
+        parsed = SimpleCookie()
+        try:
+            parsed.load(line)
+        except CookieError:
+            continue
+        for morsel in parsed.values():
+            expires = None
+            if morsel["max-age"]:
+                try:
+                    expires = int(now) + int(morsel["max-age"])
+                except ValueError:
+                    pass
+            elif morsel["expires"]:
+                expires = http2time(morsel["expires"])
+                expires = int(expires) if expires is not None else None
+            if expires is not None and expires <= now:
+                continue
+            cookies.append({
+                "name": morsel.key,
+                "value": morsel.value,
+                "domain": morsel["domain"] or None,
+                "path": morsel["path"] or None,
+                "expires": expires,
+            })
+    return cookies
+
+
+class WarmupSessionStore:
+    """
+    预热会话存储（SQLite），多个进程可共用同一文件
+    Args:
+        db_path: 数据库文件路径
+        max_age: 预热结果最长复用时间（秒），Cookie自身的过期时间更早时以其为准
+    """
+
+    def __init__(self, db_path: str, max_age: int):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS warmup_sessions ("
+            "account TEXT PRIMARY KEY, cookies TEXT NOT NULL, "
+            "warmed_at INTEGER NOT NULL, expires_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, account: str) -> Optional[List[dict]]:
+        """查询账号未过期的预热Cookie，没有记录或已过期时返回None（需要重新预热）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cookies FROM warmup_sessions WHERE account = ? AND expires_at > ?",
+                (account, int(time.time())),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, account: str, cookies: List[dict]):
+        """保存预热得到的Cookie，以其中最早的过期时间和max_age中较早者作为会话过期时间"""
+        now = int(time.time())
+        expires_at = min([c["expires"] for c in cookies if c.get("expires")] + [now + self.max_age])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO warmup_sessions (account, cookies, warmed_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (account, json.dumps(cookies), now, expires_at),
+            )
+            self._conn.commit()
+
+    def invalidate(self, account: str):
+        """作废账号的预热会话（例如返回了403），下次需要重新预热"""
+        with self._lock:
+            self._conn.execute("DELETE FROM warmup_sessions WHERE account = ?", (account,))
+            self._conn.commit()
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
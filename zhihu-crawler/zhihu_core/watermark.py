@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+创作者增量爬取水位线
+
+按 (url_token, 内容流) 记录上次完整爬取时见到的最新created_time。
+回答和想法接口都按创建时间倒序返回，翻页遇到不晚于水位线的数据即可停止。
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, Tuple
+
+
+class WatermarkStore:
+    """
+    水位线存储（SQLite）
+    Args:
+        db_path: 数据库文件路径
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            "url_token TEXT NOT NULL, stream TEXT NOT NULL, created_time INTEGER NOT NULL, "
+            "PRIMARY KEY (url_token, stream))"
+        )
+        # 尚未爬完的内容流已见到的最新created_time，断点续爬时从这里恢复
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending_watermarks ("
+            "url_token TEXT NOT NULL, stream TEXT NOT NULL, created_time INTEGER NOT NULL, "
+            "PRIMARY KEY (url_token, stream))"
+        )
+        self._conn.commit()
+        # 本次运行中各内容流见到的最新created_time，流完整结束后才写入水位线
+        self._pending: Dict[Tuple[str, str], int] = {
+            (url_token, stream): created_time
+            for url_token, stream, created_time in self._conn.execute(
+                "SELECT url_token, stream, created_time FROM pending_watermarks"
+            )
+        }
+
+    def get(self, url_token: str, stream: str) -> int:
+        """查询水位线，没有记录时返回0（全量爬取）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_time FROM watermarks WHERE url_token = ? AND stream = ?",
+                (url_token, stream),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def observe(self, url_token: str, stream: str, created_time: int):
+        """记录本次运行见到的created_time"""
+        if not created_time:
+            return
+        key = (url_token, stream)
+        if created_time > self._pending.get(key, 0):
+            self._pending[key] = created_time
+
+    def save_pending(self, url_token: str, stream: str):
+        """持久化未爬完内容流的最新created_time，中断后续爬时不丢失"""
+        created_time = self._pending.get((url_token, stream), 0)
+        if not created_time:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_watermarks (url_token, stream, created_time) VALUES (?, ?, ?)",
+                (url_token, stream, created_time),
+            )
+            self._conn.commit()
+
+    def commit(self, url_token: str, stream: str):
+        """
+        内容流已完整爬到上次水位线（或末页），推进水位线
+        中途失败的流不会调用commit，下次仍从旧水位线开始
+        """
+        created_time = self._pending.pop((url_token, stream), 0)
+        if not created_time:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO watermarks (url_token, stream, created_time) VALUES (?, ?, ?) "
+                "ON CONFLICT (url_token, stream) DO UPDATE SET created_time = "
+                "MAX(created_time, excluded.created_time)",
+                (url_token, stream, created_time),
+            )
+            self._conn.execute(
+                "DELETE FROM pending_watermarks WHERE url_token = ? AND stream = ?", (url_token, stream)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()